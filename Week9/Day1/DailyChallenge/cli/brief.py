@@ -1,19 +1,50 @@
 # cli/brief.py
 import argparse
+import hashlib
+import json
 import os
+import re
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import urlparse
 from datetime import date
+from typing import Optional
 
 import requests
+from requests.adapters import HTTPAdapter
 
 
-def call_server(method: str, base_url: str, path: str, token: str, json=None):
+TRACE_HEADER = "X-Trace-Id"
+
+# Fetches per topic run side by side (one per chosen domain)
+FETCHES_PER_TOPIC = 3
+
+
+class BriefError(Exception):
+    """A topic could not be briefed (no results, no usable domains...)."""
+
+
+def make_session(pool_size: int) -> requests.Session:
+    """One keep-alive session whose pool can hold a connection per in-flight call."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def call_server(method: str, base_url: str, path: str, token: str, json=None, trace_id=None, session=None):
     url = base_url.rstrip("/") + path
     headers = {
         "Authorization": f"Bearer {token}",
         "Content-Type": "application/json",
     }
-    resp = requests.request(method, url, headers=headers, json=json, timeout=60)
+    if trace_id:
+        headers[TRACE_HEADER] = trace_id
+    http = session or requests
+    resp = http.request(method, url, headers=headers, json=json, timeout=60)
     resp.raise_for_status()
     return resp.json()
 
@@ -34,98 +65,279 @@ def choose_three_domains(results):
     return chosen
 
 
-def main():
-    parser = argparse.ArgumentParser(
-        description="Tiny web briefing client (search → fetch → summarize → save)"
-    )
-    parser.add_argument("topic", help="Topic to brief on (quoted)")
-    parser.add_argument(
-        "--server-url",
-        default="http://localhost:8000",
-        help="Base URL of the tool server (default: http://localhost:8000)",
-    )
-    parser.add_argument(
-        "--token",
-        default=os.environ.get("MCP_HTTP_TOKEN", ""),
-        help="Bearer token (default: MCP_HTTP_TOKEN env)",
-    )
-    args = parser.parse_args()
+def topic_slug(topic: str) -> str:
+    slug = re.sub(r"[^a-z0-9]+", "-", topic.lower()).strip("-")[:60]
+    # Non-ASCII topics have no slug: a short hash keeps their filenames apart
+    return slug or hashlib.sha1(topic.encode("utf-8")).hexdigest()[:8]
 
-    if not args.token:
-        raise SystemExit("Error: MCP_HTTP_TOKEN env or --token is required")
 
-    base_url = args.server_url
-    token = args.token
-    topic = args.topic
+def build_markdown(topic: str, today: str, bullets, sources) -> str:
+    md_lines = []
+    md_lines.append(f"# Briefing: {topic}")
+    md_lines.append("")
+    md_lines.append(f"_Generated on {today}_")
+    md_lines.append("")
+    for b in bullets:
+        md_lines.append(f"- {b}")
+    md_lines.append("")
+    md_lines.append("## Sources")
+    for s in sorted(sources, key=lambda x: x.get("i", 0)):
+        i = s.get("i")
+        title = s.get("title", "")
+        url = s.get("url", "")
+        md_lines.append(f"- [{i}] {title} — {url}")
+
+    return "\n".join(md_lines)
+
+
+def run_brief(
+    session: requests.Session,
+    base_url: str,
+    token: str,
+    topic: str,
+    summary_mode: str = "single",
+    filename: Optional[str] = None,
+    trace_id: Optional[str] = None,
+    fetch_pool: Optional[ThreadPoolExecutor] = None,
+):
+    """
+    search → fetch (concurrently) → summarize → save for one topic.
+
+    Returns (saved_path, timings) where timings holds seconds per step.
+    """
+    timings = {}
+    started = time.perf_counter()
+
+    def call(path, payload):
+        return call_server(
+            "POST", base_url, path, token, json=payload, trace_id=trace_id, session=session
+        )
 
     # 1) search_web
-    search_payload = {"query": topic, "k": 5}
-    search_resp = call_server(
-        "POST", base_url, "/tools/search_web", token, json=search_payload
-    )
+    t = time.perf_counter()
+    search_resp = call("/tools/search_web", {"query": topic, "k": 5})
+    timings["search"] = time.perf_counter() - t
     results = search_resp.get("results", [])
     if not results:
-        raise SystemExit("No search results returned")
+        raise BriefError("No search results returned")
 
     selected_results = choose_three_domains(results)
     if not selected_results:
-        raise SystemExit("Could not select any domains from results")
-
-    # 2) fetch_readable for 3 domains
-    docs = []
-    for r in selected_results:
-        url = r["url"]
-        fetch_payload = {"url": url}
-        fetch_resp = call_server(
-            "POST", base_url, "/tools/fetch_readable", token, json=fetch_payload
-        )
-        docs.append(
-            {
-                "title": fetch_resp["title"],
-                "url": fetch_resp["url"],
-                "text": fetch_resp["text"],
-            }
-        )
+        raise BriefError("Could not select any domains from results")
+
+    # 2) fetch_readable for 3 domains, overlapped
+    t = time.perf_counter()
+    own_pool = fetch_pool is None
+    pool = fetch_pool or ThreadPoolExecutor(max_workers=FETCHES_PER_TOPIC)
+    try:
+        futures = [
+            pool.submit(call, "/tools/fetch_readable", {"url": r["url"]})
+            for r in selected_results
+        ]
+        fetched = [f.result() for f in futures]
+    finally:
+        if own_pool:
+            pool.shutdown()
+    docs = [
+        {"title": f["title"], "url": f["url"], "text": f["text"]} for f in fetched
+    ]
+    timings["fetch"] = time.perf_counter() - t
 
     # 3) summarize_with_citations
-    summarize_payload = {"topic": topic, "docs": docs}
-    summary_resp = call_server(
-        "POST", base_url, "/tools/summarize_with_citations", token, json=summarize_payload
+    t = time.perf_counter()
+    summary_resp = call(
+        "/tools/summarize_with_citations",
+        {"topic": topic, "docs": docs, "mode": summary_mode},
     )
+    timings["summarize"] = time.perf_counter() - t
 
     bullets = summary_resp.get("bullets", [])
     sources = summary_resp.get("sources", [])
 
     # 4) Build Markdown
     today = date.today().isoformat()
-    filename = f"brief_{today}.md"
+    filename = filename or f"brief_{today}.md"
+    content = build_markdown(topic, today, bullets, sources)
 
-    md_lines = []
-    md_lines.append(f"# Briefing: {topic}")
-    md_lines.append("")
-    md_lines.append(f"_Generated on {today}_")
-    md_lines.append("")
-    for b in bullets:
-        md_lines.append(f"- {b}")
-    md_lines.append("")
-    md_lines.append("## Sources")
-    for s in sorted(sources, key=lambda x: x.get("i", 0)):
-        i = s.get("i")
-        title = s.get("title", "")
-        url = s.get("url", "")
-        md_lines.append(f"- [{i}] {title} — {url}")
+    # 5) save_markdown
+    t = time.perf_counter()
+    save_resp = call("/tools/save_markdown", {"filename": filename, "content": content})
+    timings["save"] = time.perf_counter() - t
+    timings["total"] = time.perf_counter() - started
 
-    content = "\n".join(md_lines)
+    return save_resp.get("path", filename), timings
 
-    # 5) save_markdown
-    save_payload = {"filename": filename, "content": content}
-    save_resp = call_server(
-        "POST", base_url, "/tools/save_markdown", token, json=save_payload
+
+def read_topics(source: str):
+    stream = sys.stdin if source == "-" else open(source, "r", encoding="utf-8")
+    try:
+        topics = [line.strip() for line in stream]
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    # A topic listed twice is briefed once (same output file)
+    return list(dict.fromkeys(t for t in topics if t and not t.startswith("#")))
+
+
+def batch_filenames(topics, today: str):
+    """One output file per topic; topics with the same slug get -2, -3... suffixes."""
+    names = {}
+    used = set()
+    for topic in topics:
+        stem = f"brief_{today}_{topic_slug(topic)}"
+        name, n = f"{stem}.md", 1
+        while name in used:
+            n += 1
+            name = f"{stem}-{n}.md"
+        used.add(name)
+        names[topic] = name
+    return names
+
+
+def run_batch(args) -> int:
+    """
+    Brief many topics concurrently over one keep-alive session.
+
+    Writes a JSON summary of per-topic timings and failures; returns the
+    process exit code (1 if any topic failed).
+    """
+    topics = read_topics(args.batch)
+    if not topics:
+        raise SystemExit("No topics to process")
+
+    workers = max(1, args.workers)
+    session = make_session(pool_size=workers * FETCHES_PER_TOPIC)
+    # One file per topic: the single-topic name would collide
+    filenames = batch_filenames(topics, date.today().isoformat())
+    started = time.perf_counter()
+
+    def one(topic):
+        trace_id = uuid.uuid4().hex
+        entry = {"topic": topic, "trace_id": trace_id}
+        try:
+            path, timings = run_brief(
+                session,
+                args.server_url,
+                args.token,
+                topic,
+                summary_mode=args.summary_mode,
+                filename=filenames[topic],
+                trace_id=trace_id,
+                fetch_pool=fetch_pool,
+            )
+            entry.update(ok=True, path=path, timings={k: round(v, 3) for k, v in timings.items()})
+        except Exception as e:  # one bad topic must not abort the batch
+            entry.update(ok=False, error=f"{type(e).__name__}: {e}")
+        return entry
+
+    entries = []
+    with ThreadPoolExecutor(max_workers=workers * FETCHES_PER_TOPIC) as fetch_pool, \
+            ThreadPoolExecutor(max_workers=workers) as topic_pool:
+        futures = [topic_pool.submit(one, t) for t in topics]
+        for f in as_completed(futures):
+            entry = f.result()
+            entries.append(entry)
+            status = entry.get("path") if entry["ok"] else f"FAILED {entry['error']}"
+            print(f"[{len(entries)}/{len(topics)}] {entry['topic']}: {status}", file=sys.stderr)
+
+    # Report in input order, whatever order topics finished in
+    order = {t: i for i, t in enumerate(topics)}
+    entries.sort(key=lambda e: order[e["topic"]])
+    failed = [e for e in entries if not e["ok"]]
+    summary = {
+        "topics": len(topics),
+        "succeeded": len(topics) - len(failed),
+        "failed": len(failed),
+        "workers": workers,
+        "wall_seconds": round(time.perf_counter() - started, 3),
+        "results": entries,
+    }
+
+    text = json.dumps(summary, indent=2, ensure_ascii=False)
+    if args.summary_json:
+        with open(args.summary_json, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(os.path.abspath(args.summary_json))
+    else:
+        print(text)
+    return 1 if failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Tiny web briefing client (search → fetch → summarize → save)"
     )
-    path = save_resp.get("path", filename)
+    parser.add_argument("topic", nargs="?", help="Topic to brief on (quoted)")
+    parser.add_argument(
+        "--server-url",
+        default="http://localhost:8000",
+        help="Base URL of the tool server (default: http://localhost:8000)",
+    )
+    parser.add_argument(
+        "--token",
+        default=os.environ.get("MCP_HTTP_TOKEN", ""),
+        help="Bearer token (default: MCP_HTTP_TOKEN env)",
+    )
+    parser.add_argument(
+        "--summary-mode",
+        choices=["single", "map_reduce"],
+        default="single",
+        help="Summarization strategy on the server (default: single)",
+    )
+    parser.add_argument(
+        "--trace",
+        action="store_true",
+        help="Print the trace id to stderr (server needs TRACE_ENABLED=1)",
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="FILE",
+        help="Brief every topic in FILE (one per line, '-' for stdin) instead of TOPIC",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Topics processed concurrently in --batch mode (default: 4)",
+    )
+    parser.add_argument(
+        "--summary-json",
+        metavar="PATH",
+        help="Write the --batch JSON summary to PATH instead of stdout",
+    )
+    args = parser.parse_args()
+
+    if not args.token:
+        raise SystemExit("Error: MCP_HTTP_TOKEN env or --token is required")
+
+    if args.batch:
+        if args.topic:
+            raise SystemExit("Error: give either TOPIC or --batch, not both")
+        sys.exit(run_batch(args))
+
+    if not args.topic:
+        raise SystemExit("Error: TOPIC or --batch FILE is required")
+
+    # One trace id per run; the server records spans under it when tracing is on
+    trace_id = uuid.uuid4().hex
+    if args.trace:
+        print(f"trace_id={trace_id}", file=sys.stderr)
+
+    session = make_session(pool_size=FETCHES_PER_TOPIC)
+    try:
+        path, _ = run_brief(
+            session,
+            args.server_url,
+            args.token,
+            args.topic,
+            summary_mode=args.summary_mode,
+            trace_id=trace_id,
+        )
+    except BriefError as e:
+        raise SystemExit(str(e))
 
     print(path)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
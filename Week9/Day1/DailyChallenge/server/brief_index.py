@@ -0,0 +1,161 @@
+# server/brief_index.py
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from datetime import date
+from typing import List, Optional, Tuple
+
+from .config import BRIEF_INDEX_PATH
+from .schemas import BriefHit
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS briefs (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    brief_date TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    UNIQUE (topic, brief_date)
+);
+DROP INDEX IF EXISTS briefs_hash;
+CREATE INDEX IF NOT EXISTS briefs_path ON briefs (path);
+CREATE VIRTUAL TABLE IF NOT EXISTS briefs_fts USING fts5 (
+    topic, content, tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+_TOPIC_RE = re.compile(r"^#\s*Briefing:\s*(.+)$", re.MULTILINE)
+_DATE_RE = re.compile(r"(\d{4}-\d{2}-\d{2})")
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+# One connection per thread: FastAPI runs sync endpoints in a thread pool.
+_local = threading.local()
+
+
+def _connect() -> sqlite3.Connection:
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        parent = os.path.dirname(os.path.abspath(BRIEF_INDEX_PATH))
+        os.makedirs(parent, exist_ok=True)
+        conn = sqlite3.connect(BRIEF_INDEX_PATH, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        _local.conn = conn
+    return conn
+
+
+def parse_brief(filename: str, content: str) -> Tuple[str, str]:
+    """
+    Returns (topic, date) for a brief, using the '# Briefing: <topic>' header
+    written by the CLI and the first YYYY-MM-DD found in the content or filename.
+    """
+    m = _TOPIC_RE.search(content)
+    topic = m.group(1).strip() if m else os.path.splitext(filename)[0]
+
+    m = _DATE_RE.search(content) or _DATE_RE.search(filename)
+    brief_date = m.group(1) if m else date.today().isoformat()
+    return topic, brief_date
+
+
+def index_brief(path: str, filename: str, content: str) -> bool:
+    """
+    Adds or refreshes a saved brief in the index.
+
+    A brief is identified by (topic, date). Saving the same content again is
+    a no-op; saving new content for the same topic and date replaces the entry.
+    Entries of other briefs previously saved at the same path are removed,
+    since the file on disk no longer holds them.
+    Returns True if the index changed.
+    """
+    topic, brief_date = parse_brief(filename, content)
+    content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    conn = _connect()
+    with conn:
+        stale = conn.execute(
+            "SELECT id FROM briefs WHERE path = ? AND NOT (topic = ? AND brief_date = ?)",
+            (path, topic, brief_date),
+        ).fetchall()
+        for (stale_id,) in stale:
+            conn.execute("DELETE FROM briefs WHERE id = ?", (stale_id,))
+            conn.execute("DELETE FROM briefs_fts WHERE rowid = ?", (stale_id,))
+
+        row = conn.execute(
+            "SELECT id, content_hash FROM briefs WHERE topic = ? AND brief_date = ?",
+            (topic, brief_date),
+        ).fetchone()
+        if row and row[1] == content_hash:
+            return bool(stale)
+
+        if row:
+            brief_id = row[0]
+            conn.execute(
+                "UPDATE briefs SET path = ?, filename = ?, content_hash = ? WHERE id = ?",
+                (path, filename, content_hash, brief_id),
+            )
+            conn.execute("DELETE FROM briefs_fts WHERE rowid = ?", (brief_id,))
+        else:
+            cur = conn.execute(
+                "INSERT INTO briefs (path, filename, topic, brief_date, content_hash) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (path, filename, topic, brief_date, content_hash),
+            )
+            brief_id = cur.lastrowid
+
+        conn.execute(
+            "INSERT INTO briefs_fts (rowid, topic, content) VALUES (?, ?, ?)",
+            (brief_id, topic, content),
+        )
+    return True
+
+
+def _match_expression(query: str) -> Optional[str]:
+    # Quote every term so user input can never hit FTS5 query syntax errors;
+    # the last term is a prefix match to support search-as-you-type.
+    terms = _TERM_RE.findall(query)
+    if not terms:
+        return None
+    quoted = ['"' + t.replace('"', '""') + '"' for t in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def search_briefs(query: str, limit: int, offset: int) -> Tuple[List[BriefHit], int]:
+    """
+    Ranked full-text search over saved briefs (BM25, topic weighted above body).
+    Returns (hits for the requested page, total number of matches).
+    """
+    expr = _match_expression(query)
+    if expr is None:
+        return [], 0
+
+    conn = _connect()
+    total = conn.execute(
+        "SELECT count(*) FROM briefs_fts WHERE briefs_fts MATCH ?", (expr,)
+    ).fetchone()[0]
+
+    rows = conn.execute(
+        """
+        SELECT b.path, b.topic, b.brief_date,
+               bm25(briefs_fts, 5.0, 1.0) AS score,
+               snippet(briefs_fts, 1, '**', '**', '…', 16)
+        FROM briefs_fts
+        JOIN briefs b ON b.id = briefs_fts.rowid
+        WHERE briefs_fts MATCH ?
+        ORDER BY score
+        LIMIT ? OFFSET ?
+        """,
+        (expr, limit, offset),
+    ).fetchall()
+
+    hits = [
+        # bm25() is "lower is better"; flip the sign so larger scores rank higher.
+        BriefHit(path=path, topic=topic, date=d, score=-score, snippet=snip)
+        for path, topic, d, score, snip in rows
+    ]
+    return hits, total
@@ -0,0 +1,126 @@
+# server/cassette.py
+"""
+Record/replay layer for every upstream HTTP exchange (Serper, page fetches, Ollama).
+
+CASSETTE_MODE:
+  - "off" (default): plain `requests` calls.
+  - "record": perform the real call and store the response in CASSETTE_DIR.
+  - "replay": serve stored responses only; a miss raises requests.ConnectionError,
+    which the callers already turn into a 502.
+
+Each exchange is one gzip file named after a fingerprint of the request
+(method, URL, query params and JSON body; headers are left out so API keys
+never reach the disk). In replay mode, CASSETTE_REPLAY_LATENCY scales the
+recorded latency (0 = instant, 1 = as recorded).
+"""
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+from datetime import timedelta
+from typing import Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from .config import CASSETTE_DIR, CASSETTE_MODE, CASSETTE_REPLAY_LATENCY
+
+
+# Response headers worth keeping; the rest only bloats the cassette.
+# Content-Encoding is left out: the stored body is already decoded.
+_KEPT_HEADERS = ("content-type", "content-language")
+
+
+def fingerprint(method: str, url: str, params=None, json_body=None) -> str:
+    key = json.dumps(
+        {
+            "method": method.upper(),
+            "url": url,
+            "params": params,
+            "json": json_body,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def _cassette_path(fp: str) -> str:
+    return os.path.join(CASSETTE_DIR, f"{fp}.json.gz")
+
+
+def _save(fp: str, resp: requests.Response, elapsed: float) -> None:
+    meta = {
+        "method": resp.request.method if resp.request is not None else None,
+        "url": resp.url,
+        "status": resp.status_code,
+        "reason": resp.reason,
+        "encoding": resp.encoding,
+        "headers": {k: v for k, v in resp.headers.items() if k.lower() in _KEPT_HEADERS},
+        "elapsed": elapsed,
+    }
+    os.makedirs(CASSETTE_DIR, exist_ok=True)
+    # Write to a temp file and rename so concurrent readers never see half a file
+    fd, tmp = tempfile.mkstemp(dir=CASSETTE_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb") as f:
+            f.write(json.dumps(meta).encode("utf-8") + b"\n")
+            f.write(resp.content)
+        os.replace(tmp, _cassette_path(fp))
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _load(fp: str) -> Optional[requests.Response]:
+    path = _cassette_path(fp)
+    if not os.path.exists(path):
+        return None
+    with gzip.open(path, "rb") as f:
+        header, _, body = f.read().partition(b"\n")
+    meta = json.loads(header)
+
+    resp = requests.Response()
+    resp.status_code = meta["status"]
+    resp.reason = meta.get("reason")
+    resp.encoding = meta.get("encoding")
+    resp.url = meta["url"]
+    # Filtered again for cassettes recorded with a wider header set
+    resp.headers = CaseInsensitiveDict(
+        {k: v for k, v in meta.get("headers", {}).items() if k.lower() in _KEPT_HEADERS}
+    )
+    resp.elapsed = timedelta(seconds=meta.get("elapsed", 0.0))
+    resp._content = body
+    return resp
+
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    """Drop-in for requests.request() that honours CASSETTE_MODE."""
+    if CASSETTE_MODE == "off":
+        return requests.request(method, url, **kwargs)
+
+    fp = fingerprint(method, url, kwargs.get("params"), kwargs.get("json"))
+
+    if CASSETTE_MODE == "replay":
+        resp = _load(fp)
+        if resp is None:
+            raise requests.ConnectionError(f"Cassette miss for {method.upper()} {url}")
+        if CASSETTE_REPLAY_LATENCY > 0:
+            time.sleep(resp.elapsed.total_seconds() * CASSETTE_REPLAY_LATENCY)
+        return resp
+
+    start = time.perf_counter()
+    resp = requests.request(method, url, **kwargs)
+    _save(fp, resp, time.perf_counter() - start)
+    return resp
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
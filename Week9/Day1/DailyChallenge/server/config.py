@@ -8,15 +8,40 @@ SERPER_API_KEY = os.environ.get("SERPER_API_KEY")
 # Ollama config
 OLLAMA_BASE_URL = os.environ.get("OLLAMA_BASE_URL", "http://localhost:11434")
 OLLAMA_MODEL = os.environ.get("OLLAMA_MODEL", "llama3.2:1b")  # or llama3, gemma3 etc.
+# Max Ollama calls in flight at once (match OLLAMA_NUM_PARALLEL on the Ollama side)
+OLLAMA_MAX_CONCURRENCY = int(os.environ.get("OLLAMA_MAX_CONCURRENCY", "2"))
+
+# Per-document summaries for map-reduce mode; empty string disables the cache
+DOC_SUMMARY_CACHE_DIR = os.environ.get("DOC_SUMMARY_CACHE_DIR", "cache/doc_summaries")
+
+# Saved briefs
+OUTPUT_DIR = os.environ.get("OUTPUT_DIR", "output")
+BRIEF_INDEX_PATH = os.environ.get(
+    "BRIEF_INDEX_PATH", os.path.join(OUTPUT_DIR, "briefs_index.sqlite3")
+)
+
+# Span tracing (see server/tracing.py); disabled unless TRACE_ENABLED=1
+TRACE_ENABLED = os.environ.get("TRACE_ENABLED", "0").lower() in ("1", "true", "yes")
+TRACE_PATH = os.environ.get("TRACE_PATH", "traces/spans.jsonl")
+
+# Upstream record/replay (see server/cassette.py): off | record | replay
+CASSETTE_MODE = os.environ.get("CASSETTE_MODE", "off").lower()
+CASSETTE_DIR = os.environ.get("CASSETTE_DIR", "cassettes")
+CASSETTE_REPLAY_LATENCY = float(os.environ.get("CASSETTE_REPLAY_LATENCY", "0"))
 
 
 def require_config():
     missing = []
     if not MCP_HTTP_TOKEN:
         missing.append("MCP_HTTP_TOKEN")
-    if not SERPER_API_KEY:
+    # Replaying a cassette never talks to Serper, so no key is needed
+    if not SERPER_API_KEY and CASSETTE_MODE != "replay":
         missing.append("SERPER_API_KEY")
     if missing:
         raise RuntimeError(
             f"Missing required environment variables: {', '.join(missing)}"
+        )
+    if CASSETTE_MODE not in ("off", "record", "replay"):
+        raise RuntimeError(
+            f"Invalid CASSETTE_MODE {CASSETTE_MODE!r} (expected off, record or replay)"
         )
\ No newline at end of file
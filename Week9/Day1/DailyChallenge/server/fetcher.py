@@ -4,6 +4,9 @@ import requests
 from fastapi import HTTPException
 from bs4 import BeautifulSoup
 
+from . import cassette
+from .tracing import span
+
 
 def fetch_readable(url: str) -> Tuple[str, str]:
     """
@@ -11,7 +14,9 @@ def fetch_readable(url: str) -> Tuple[str, str]:
     'main content' heuristic: concatenate all <p> tags.
     """
     try:
-        resp = requests.get(url, timeout=10)
+        with span("fetch.http", url=url) as s:
+            resp = cassette.get(url, timeout=10)
+            s.set(status=resp.status_code, bytes=len(resp.content))
     except requests.RequestException as e:
         raise HTTPException(status_code=502, detail=f"Error fetching URL: {e}")
 
@@ -21,12 +26,14 @@ def fetch_readable(url: str) -> Tuple[str, str]:
             detail=f"Non-200 response fetching URL: {resp.status_code}",
         )
 
-    soup = BeautifulSoup(resp.text, "html.parser")
+    with span("fetch.parse", url=url) as s:
+        soup = BeautifulSoup(resp.text, "html.parser")
 
-    title = soup.title.string.strip() if soup.title and soup.title.string else url
+        title = soup.title.string.strip() if soup.title and soup.title.string else url
 
-    paragraphs = [p.get_text(" ", strip=True) for p in soup.find_all("p")]
-    text = "\n\n".join(p for p in paragraphs if p)
+        paragraphs = [p.get_text(" ", strip=True) for p in soup.find_all("p")]
+        text = "\n\n".join(p for p in paragraphs if p)
+        s.set(chars=len(text))
 
     # Truncate to avoid overloading the LLM
     max_chars = 8000
@@ -1,13 +1,14 @@
 # server/main.py
 from typing import List
 
-from fastapi import FastAPI, Depends, Header, HTTPException
+from fastapi import FastAPI, Depends, Header, HTTPException, Request
 from fastapi.responses import JSONResponse
 
-from .config import MCP_HTTP_TOKEN, require_config
-from . import serper_client
+from .config import MCP_HTTP_TOKEN, OUTPUT_DIR, require_config
+from . import brief_index, serper_client
 from .fetcher import fetch_readable
 from .summarizer import summarize_with_citations
+from .tracing import TRACE_HEADER, span, trace_context
 from .schemas import (
     ToolsListResponse,
     ToolInfo,
@@ -19,6 +20,8 @@ from .schemas import (
     SummarizeResponse,
     SaveMarkdownRequest,
     SaveMarkdownResponse,
+    SearchBriefsRequest,
+    SearchBriefsResponse,
 )
 
 import os
@@ -31,6 +34,16 @@ require_config()
 app = FastAPI(title="Tiny Tool API Server")
 
 
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    # No-op unless TRACE_ENABLED=1 and the client sent a trace id
+    with trace_context(request.headers.get(TRACE_HEADER)):
+        with span(f"{request.method} {request.url.path}") as s:
+            response = await call_next(request)
+            s.set(status=response.status_code)
+            return response
+
+
 def verify_bearer_token(authorization: str = Header(...)):
     if not MCP_HTTP_TOKEN:
         raise HTTPException(
@@ -85,6 +98,7 @@ def list_tools(_: None = Depends(verify_bearer_token)):
                             "required": ["title", "url", "text"],
                         },
                     },
+                    "mode": {"type": "string", "enum": ["single", "map_reduce"]},
                 },
                 "required": ["topic", "docs"],
             },
@@ -100,6 +114,18 @@ def list_tools(_: None = Depends(verify_bearer_token)):
                 "required": ["filename", "content"],
             },
         ),
+        ToolInfo(
+            name="search_briefs",
+            input_schema={
+                "type": "object",
+                "properties": {
+                    "query": {"type": "string"},
+                    "limit": {"type": "integer", "minimum": 1, "maximum": 100},
+                    "offset": {"type": "integer", "minimum": 0},
+                },
+                "required": ["query"],
+            },
+        ),
     ]
     return ToolsListResponse(tools=tools)
 
@@ -127,7 +153,7 @@ def summarize_endpoint(
     payload: SummarizeRequest,
     _: None = Depends(verify_bearer_token),
 ):
-    return summarize_with_citations(payload.topic, payload.docs)
+    return summarize_with_citations(payload.topic, payload.docs, mode=payload.mode)
 
 
 @app.post("/tools/save_markdown", response_model=SaveMarkdownResponse)
@@ -140,13 +166,32 @@ def save_markdown(
     if not safe_name:
         raise HTTPException(status_code=400, detail="Invalid filename")
 
-    output_dir = Path("output")
-    output_dir.mkdir(exist_ok=True)
+    output_dir = Path(OUTPUT_DIR)
+    output_dir.mkdir(parents=True, exist_ok=True)
     path = output_dir / safe_name
 
     path.write_text(payload.content, encoding="utf-8")
+    abs_path = str(path.resolve())
+
+    # Keep the search index in step with the files on disk
+    with span("brief_index.update", filename=safe_name) as s:
+        s.set(changed=brief_index.index_brief(abs_path, safe_name, payload.content))
 
-    return SaveMarkdownResponse(path=str(path.resolve()))
+    return SaveMarkdownResponse(path=abs_path)
+
+
+@app.post("/tools/search_briefs", response_model=SearchBriefsResponse)
+def search_briefs(
+    payload: SearchBriefsRequest,
+    _: None = Depends(verify_bearer_token),
+):
+    hits, total = brief_index.search_briefs(payload.query, payload.limit, payload.offset)
+    next_offset = payload.offset + len(hits)
+    return SearchBriefsResponse(
+        results=hits,
+        total=total,
+        next_offset=next_offset if next_offset < total else None,
+    )
 
 
 @app.get("/")
@@ -1,6 +1,6 @@
 # server/schemas.py
-from typing import List, Dict
-from pydantic import BaseModel, HttpUrl
+from typing import List, Dict, Literal, Optional
+from pydantic import BaseModel, Field, HttpUrl
 
 
 class ToolInfo(BaseModel):
@@ -47,6 +47,7 @@ class Doc(BaseModel):
 class SummarizeRequest(BaseModel):
     topic: str
     docs: List[Doc]
+    mode: Literal["single", "map_reduce"] = "single"
 
 
 class SourceEntry(BaseModel):
@@ -66,4 +67,24 @@ class SaveMarkdownRequest(BaseModel):
 
 
 class SaveMarkdownResponse(BaseModel):
-    path: str
\ No newline at end of file
+    path: str
+
+
+class SearchBriefsRequest(BaseModel):
+    query: str
+    limit: int = Field(10, ge=1, le=100)
+    offset: int = Field(0, ge=0)
+
+
+class BriefHit(BaseModel):
+    path: str
+    topic: str
+    date: str
+    score: float
+    snippet: str
+
+
+class SearchBriefsResponse(BaseModel):
+    results: List[BriefHit]
+    total: int
+    next_offset: Optional[int] = None
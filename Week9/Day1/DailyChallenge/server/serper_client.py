@@ -3,25 +3,29 @@ from typing import List
 import requests
 from fastapi import HTTPException
 
-from .config import SERPER_API_KEY
+from . import cassette
+from .config import CASSETTE_MODE, SERPER_API_KEY
 from .schemas import SearchResult
+from .tracing import span
 
 
 SERPER_SEARCH_URL = "https://google.serper.dev/search"
 
 
 def search_web(query: str, k: int) -> List[SearchResult]:
-    if not SERPER_API_KEY:
+    if not SERPER_API_KEY and CASSETTE_MODE != "replay":
         raise HTTPException(status_code=500, detail="SERPER_API_KEY not configured")
 
     headers = {
-        "X-API-KEY": SERPER_API_KEY,
+        "X-API-KEY": SERPER_API_KEY or "",
         "Content-Type": "application/json",
     }
     payload = {"q": query}
 
     try:
-        resp = requests.post(SERPER_SEARCH_URL, json=payload, headers=headers, timeout=10)
+        with span("serper.search", query=query) as s:
+            resp = cassette.post(SERPER_SEARCH_URL, json=payload, headers=headers, timeout=10)
+            s.set(status=resp.status_code)
     except requests.RequestException as e:
         raise HTTPException(status_code=502, detail=f"Error calling Serper.dev: {e}")
 
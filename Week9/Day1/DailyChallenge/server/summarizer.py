@@ -1,45 +1,71 @@
 # server/summarizer.py
-from typing import List
+import contextvars
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
 import requests
 from fastapi import HTTPException
 
-from .config import OLLAMA_BASE_URL, OLLAMA_MODEL
+from . import cassette
+from .config import (
+    DOC_SUMMARY_CACHE_DIR,
+    OLLAMA_BASE_URL,
+    OLLAMA_MAX_CONCURRENCY,
+    OLLAMA_MODEL,
+)
 from .schemas import Doc, SourceEntry, SummarizeResponse
-
-
-def summarize_with_citations(topic: str, docs: List[Doc]) -> SummarizeResponse:
-    if not docs:
-        raise HTTPException(status_code=400, detail="No documents provided")
-
-    # Build sources list (1-based indices)
-    sources: List[SourceEntry] = []
-    for idx, d in enumerate(docs, start=1):
-        sources.append(SourceEntry(i=idx, title=d.title, url=str(d.url)))
-
-    # Build prompt for the LLM
-    sources_text_lines = []
-    for s, d in zip(sources, docs):
-        snippet = d.text[:1200]  # short snippet per source
-        sources_text_lines.append(
-            f"[{s.i}] {d.title} ({d.url})\n{snippet}\n"
-        )
-    sources_text = "\n\n".join(sources_text_lines)
-
-    system_prompt = (
-        "You are a helpful assistant that writes concise research briefings.\n"
-        "You will be given a TOPIC and several SOURCES with indices [1], [2], etc.\n"
-        "Write exactly 5 bullet points about the topic.\n"
-        "Each bullet must:\n"
-        "- Be at most 200 characters.\n"
-        "- Include at least one citation marker like [1] or [2] that refers to a source.\n"
-        "Output format:\n"
-        "- Exactly 5 lines.\n"
-        "- Each line starts with '- ' followed by the text.\n"
-        "- Do not add any extra text before or after the bullets."
-    )
-
-    user_prompt = f"TOPIC: {topic}\n\nSOURCES:\n{sources_text}"
-
+from .tracing import span
+
+
+BRIEF_SYSTEM_PROMPT = (
+    "You are a helpful assistant that writes concise research briefings.\n"
+    "You will be given a TOPIC and several SOURCES with indices [1], [2], etc.\n"
+    "Write exactly 5 bullet points about the topic.\n"
+    "Each bullet must:\n"
+    "- Be at most 200 characters.\n"
+    "- Include at least one citation marker like [1] or [2] that refers to a source.\n"
+    "Output format:\n"
+    "- Exactly 5 lines.\n"
+    "- Each line starts with '- ' followed by the text.\n"
+    "- Do not add any extra text before or after the bullets."
+)
+
+# Map step: topic-independent on purpose, so a document's summary can be
+# reused by any topic that cites it.
+MAP_SYSTEM_PROMPT = (
+    "You are a helpful assistant that extracts the key facts from one SOURCE.\n"
+    "Write at most 4 short factual points, each at most 200 characters.\n"
+    "Output format:\n"
+    "- Each line starts with '- ' followed by the text.\n"
+    "- Do not add any extra text before or after the points."
+)
+
+REDUCE_SYSTEM_PROMPT = (
+    "You are a helpful assistant that writes concise research briefings.\n"
+    "You will be given a TOPIC and NOTES. Each note ends with a citation marker\n"
+    "like [1] or [2] naming the source it came from.\n"
+    "Merge the notes into exactly 5 bullet points about the topic.\n"
+    "Each bullet must:\n"
+    "- Be at most 200 characters.\n"
+    "- Keep the citation markers of the notes it is based on.\n"
+    "Output format:\n"
+    "- Exactly 5 lines.\n"
+    "- Each line starts with '- ' followed by the text.\n"
+    "- Do not add any extra text before or after the bullets."
+)
+
+# Per-document prompts are small, so the map step can read more of each source
+MAP_DOC_CHARS = 4000
+
+# Shared by every Ollama call in the process
+_llm_slots = threading.BoundedSemaphore(max(1, OLLAMA_MAX_CONCURRENCY))
+
+
+def _ollama_chat(system_prompt: str, user_prompt: str, span_name: str = "ollama.chat") -> str:
     body = {
         "model": OLLAMA_MODEL,
         "stream": False,
@@ -49,12 +75,15 @@ def summarize_with_citations(topic: str, docs: List[Doc]) -> SummarizeResponse:
         ],
     }
 
-    try:
-        resp = requests.post(
-            f"{OLLAMA_BASE_URL}/api/chat", json=body, timeout=60
-        )
-    except requests.RequestException as e:
-        raise HTTPException(status_code=502, detail=f"Error calling Ollama: {e}")
+    with _llm_slots:
+        try:
+            with span(span_name, model=OLLAMA_MODEL, prompt_chars=len(user_prompt)) as s:
+                resp = cassette.post(
+                    f"{OLLAMA_BASE_URL}/api/chat", json=body, timeout=60
+                )
+                s.set(status=resp.status_code)
+        except requests.RequestException as e:
+            raise HTTPException(status_code=502, detail=f"Error calling Ollama: {e}")
 
     if resp.status_code != 200:
         raise HTTPException(
@@ -64,24 +93,133 @@ def summarize_with_citations(topic: str, docs: List[Doc]) -> SummarizeResponse:
 
     data = resp.json()
     message = data.get("message", {})
-    content = message.get("content", "")
+    return message.get("content", "")
+
 
+def _parse_bullets(content: str) -> List[str]:
     lines = [line.strip() for line in content.splitlines() if line.strip()]
     bullets: List[str] = []
     for line in lines:
         if line.startswith("- "):
             bullets.append(line[2:].strip())
 
-    # Fallback: if the model didn't follow the format, just take first 5 lines
+    # Fallback: if the model didn't follow the format, just take the lines
     if not bullets:
         bullets = lines
+    return bullets
+
 
+def _five_bullets(bullets: List[str]) -> List[str]:
     bullets = bullets[:5]
     # If fewer than 5, pad with empty / generic bullets
     while len(bullets) < 5:
         bullets.append("[No additional information][1]")
 
     # Enforce max length 200 chars
-    bullets = [b[:200] for b in bullets]
+    return [b[:200] for b in bullets]
+
+
+def _doc_cache_path(doc: Doc) -> Optional[str]:
+    if not DOC_SUMMARY_CACHE_DIR:
+        return None
+    key = json.dumps(
+        [OLLAMA_MODEL, MAP_SYSTEM_PROMPT, str(doc.url), doc.text[:MAP_DOC_CHARS]],
+        ensure_ascii=False,
+    )
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    return os.path.join(DOC_SUMMARY_CACHE_DIR, f"{digest}.json")
+
+
+def _load_doc_points(path: Optional[str]) -> Optional[List[str]]:
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            # An empty list (stored by earlier versions) counts as a miss
+            return json.load(f)["points"] or None
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _store_doc_points(path: Optional[str], points: List[str]) -> None:
+    if not path:
+        return
+    os.makedirs(DOC_SUMMARY_CACHE_DIR, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=DOC_SUMMARY_CACHE_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"points": points}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _summarize_doc(doc: Doc) -> List[str]:
+    """Map step: key points of one document (cached by model + content)."""
+    path = _doc_cache_path(doc)
+    with span("summarize.map", url=str(doc.url)) as s:
+        points = _load_doc_points(path)
+        s.set(cache_hit=points is not None)
+        if points is None:
+            user_prompt = f"SOURCE: {doc.title} ({doc.url})\n{doc.text[:MAP_DOC_CHARS]}"
+            points = _parse_bullets(_ollama_chat(MAP_SYSTEM_PROMPT, user_prompt))[:4]
+            # An unparseable answer is retried on the next run, not cached
+            if points:
+                _store_doc_points(path, points)
+    return points
+
+
+def _map_reduce(topic: str, docs: List[Doc], sources: List[SourceEntry]) -> List[str]:
+    # Map: per-document summaries, run concurrently (Ollama calls are still
+    # bounded by _llm_slots). copy_context keeps the current trace in workers.
+    workers = max(1, min(len(docs), OLLAMA_MAX_CONCURRENCY))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(contextvars.copy_context().run, _summarize_doc, d) for d in docs
+        ]
+        per_doc = [f.result() for f in futures]
+
+    # Reduce: one small prompt over the citation-tagged notes
+    notes_lines = []
+    for s, points in zip(sources, per_doc):
+        for p in points:
+            notes_lines.append(f"- {p} [{s.i}]")
+    notes_text = "\n".join(notes_lines)
+
+    user_prompt = f"TOPIC: {topic}\n\nNOTES:\n{notes_text}"
+    content = _ollama_chat(REDUCE_SYSTEM_PROMPT, user_prompt, span_name="summarize.reduce")
+    return _parse_bullets(content)
+
+
+def summarize_with_citations(topic: str, docs: List[Doc], mode: str = "single") -> SummarizeResponse:
+    """
+    mode="single": every source snippet in one prompt (fine for a few sources).
+    mode="map_reduce": summarize each source on its own, then merge the notes
+    into 5 bullets; prompt size stays flat as sources are added.
+    """
+    if not docs:
+        raise HTTPException(status_code=400, detail="No documents provided")
+
+    # Build sources list (1-based indices)
+    sources: List[SourceEntry] = []
+    for idx, d in enumerate(docs, start=1):
+        sources.append(SourceEntry(i=idx, title=d.title, url=str(d.url)))
+
+    if mode == "map_reduce":
+        bullets = _map_reduce(topic, docs, sources)
+        return SummarizeResponse(bullets=_five_bullets(bullets), sources=sources)
+
+    # Build prompt for the LLM
+    sources_text_lines = []
+    for s, d in zip(sources, docs):
+        snippet = d.text[:1200]  # short snippet per source
+        sources_text_lines.append(
+            f"[{s.i}] {d.title} ({d.url})\n{snippet}\n"
+        )
+    sources_text = "\n\n".join(sources_text_lines)
+
+    user_prompt = f"TOPIC: {topic}\n\nSOURCES:\n{sources_text}"
+    content = _ollama_chat(BRIEF_SYSTEM_PROMPT, user_prompt)
 
-    return SummarizeResponse(bullets=bullets, sources=sources)
\ No newline at end of file
+    return SummarizeResponse(bullets=_five_bullets(_parse_bullets(content)), sources=sources)
@@ -0,0 +1,124 @@
+# server/trace_report.py
+"""
+Render a recorded trace as a text waterfall.
+
+Usage:
+    python -m server.trace_report                 # latest trace
+    python -m server.trace_report <trace_id>
+    python -m server.trace_report <trace_id> --summary
+"""
+import argparse
+import json
+import os
+import sys
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+
+def load_spans(path: str, trace_id: Optional[str]) -> List[dict]:
+    spans: List[dict] = []
+    last_trace = None
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            last_trace = rec.get("trace_id")
+            spans.append(rec)
+
+    wanted = trace_id or last_trace
+    return [s for s in spans if s.get("trace_id") == wanted]
+
+
+def _depths(spans: List[dict]) -> Dict[str, int]:
+    by_id = {s["span_id"]: s for s in spans}
+    depths: Dict[str, int] = {}
+
+    def depth(s: dict) -> int:
+        sid = s["span_id"]
+        if sid not in depths:
+            parent = by_id.get(s.get("parent_id"))
+            depths[sid] = 0 if parent is None else depth(parent) + 1
+        return depths[sid]
+
+    for s in spans:
+        depth(s)
+    return depths
+
+
+def render_waterfall(spans: List[dict], width: int = 60) -> str:
+    spans = sorted(spans, key=lambda s: s["start"])
+    t0 = spans[0]["start"]
+    end = max(s["start"] + s["duration_ms"] / 1000 for s in spans)
+    total_ms = max((end - t0) * 1000, 1e-6)
+    depths = _depths(spans)
+
+    label_width = max(2 * depths[s["span_id"]] + len(s["name"]) for s in spans)
+    lines = [f"trace {spans[0]['trace_id']}  total {total_ms:.1f} ms  spans {len(spans)}"]
+    for s in spans:
+        offset_ms = (s["start"] - t0) * 1000
+        col = int(offset_ms / total_ms * width)
+        length = max(1, int(s["duration_ms"] / total_ms * width))
+        bar = " " * col + "█" * min(length, width - col)
+        label = "  " * depths[s["span_id"]] + s["name"]
+        flag = "  !" if s.get("error") else ""
+        lines.append(
+            f"{label:<{label_width}}  {offset_ms:8.1f} {s['duration_ms']:8.1f} ms  |{bar:<{width}}|{flag}"
+        )
+    return "\n".join(lines)
+
+
+def render_summary(spans: List[dict]) -> str:
+    """Self time per span name, i.e. a flat flamegraph."""
+    child_ms: Dict[str, float] = defaultdict(float)
+    for s in spans:
+        if s.get("parent_id"):
+            child_ms[s["parent_id"]] += s["duration_ms"]
+
+    self_ms: Dict[str, float] = defaultdict(float)
+    counts: Dict[str, int] = defaultdict(int)
+    for s in spans:
+        self_ms[s["name"]] += max(0.0, s["duration_ms"] - child_ms[s["span_id"]])
+        counts[s["name"]] += 1
+
+    total = sum(self_ms.values()) or 1e-6
+    lines = [f"{'self ms':>10} {'%':>6} {'calls':>6}  name"]
+    for name, ms in sorted(self_ms.items(), key=lambda kv: -kv[1]):
+        lines.append(f"{ms:10.1f} {ms / total * 100:6.1f} {counts[name]:6d}  {name}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a trace from the JSONL span log")
+    parser.add_argument("trace_id", nargs="?", help="Trace id (default: latest trace)")
+    parser.add_argument(
+        "--path",
+        default=os.environ.get("TRACE_PATH", "traces/spans.jsonl"),
+        help="Span log (default: TRACE_PATH env or traces/spans.jsonl)",
+    )
+    parser.add_argument("--width", type=int, default=60, help="Bar width in characters")
+    parser.add_argument(
+        "--summary", action="store_true", help="Also print self time per span name"
+    )
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        raise SystemExit(f"No span log at {args.path}")
+
+    spans = load_spans(args.path, args.trace_id)
+    if not spans:
+        raise SystemExit("No spans found for that trace")
+
+    print(render_waterfall(spans, width=args.width))
+    if args.summary:
+        print()
+        print(render_summary(spans))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+# server/tracing.py
+"""
+Tiny span tracer with a local JSONL exporter (no external collector).
+
+A trace is active only when tracing is enabled (TRACE_ENABLED=1) and the
+incoming request carries an X-Trace-Id header. Otherwise span() returns a
+shared no-op context manager, so instrumented code pays one bool check.
+"""
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from .config import TRACE_ENABLED, TRACE_PATH
+
+
+TRACE_HEADER = "X-Trace-Id"
+
+_trace_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "trace_id", default=None
+)
+_span_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "span_id", default=None
+)
+
+_write_lock = threading.Lock()
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    def __init__(self, name: str, attrs: dict):
+        self.name = name
+        self.attrs = attrs
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+
+def _export(record: dict) -> None:
+    line = json.dumps(record, ensure_ascii=False) + "\n"
+    with _write_lock:
+        parent = os.path.dirname(os.path.abspath(TRACE_PATH))
+        os.makedirs(parent, exist_ok=True)
+        with open(TRACE_PATH, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+@contextmanager
+def _recording_span(trace_id: str, name: str, attrs: dict) -> Iterator[_Span]:
+    span = _Span(name, attrs)
+    span_id = uuid.uuid4().hex[:16]
+    parent_id = _span_id.get()
+    token = _span_id.set(span_id)
+    start = time.time()
+    t0 = time.perf_counter()
+    error = None
+    try:
+        yield span
+    except BaseException as e:
+        error = repr(e)
+        raise
+    finally:
+        duration_ms = (time.perf_counter() - t0) * 1000
+        _span_id.reset(token)
+        record = {
+            "trace_id": trace_id,
+            "span_id": span_id,
+            "parent_id": parent_id,
+            "name": name,
+            "start": start,
+            "duration_ms": round(duration_ms, 3),
+            "attrs": span.attrs,
+        }
+        if error:
+            record["error"] = error
+        _export(record)
+
+
+def span(name: str, **attrs):
+    """
+    Record a span around a block of code:
+
+        with span("serper.search", query=q) as s:
+            ...
+            s.set(results=len(results))
+    """
+    if not TRACE_ENABLED:
+        return _NOOP
+    trace_id = _trace_id.get()
+    if trace_id is None:
+        return _NOOP
+    return _recording_span(trace_id, name, attrs)
+
+
+@contextmanager
+def trace_context(trace_id: Optional[str]) -> Iterator[None]:
+    """Make trace_id the current trace for the duration of the block."""
+    if not TRACE_ENABLED or not trace_id:
+        yield
+        return
+    token = _trace_id.set(trace_id)
+    try:
+        yield
+    finally:
+        _trace_id.reset(token)
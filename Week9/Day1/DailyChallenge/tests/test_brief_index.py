@@ -0,0 +1,85 @@
+"""Full-text index of saved briefs (server/brief_index.py)."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from server import brief_index  # noqa: E402
+
+
+def brief(topic, body, day="2025-11-25"):
+    return f"# Briefing: {topic}\n\n_Generated on {day}_\n\n{body}\n"
+
+
+@pytest.fixture(autouse=True)
+def index_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(brief_index, "BRIEF_INDEX_PATH", str(tmp_path / "index.sqlite3"))
+    monkeypatch.setattr(brief_index, "_local", brief_index.threading.local())
+    yield
+    conn = getattr(brief_index._local, "conn", None)
+    if conn is not None:
+        conn.close()
+
+
+def test_parse_brief_reads_header_and_date():
+    assert brief_index.parse_brief("x.md", brief("AI in the EU", "text")) == ("AI in the EU", "2025-11-25")
+    topic, day = brief_index.parse_brief("brief_2024-01-02.md", "no header")
+    assert (topic, day) == ("brief_2024-01-02", "2024-01-02")
+
+
+def test_same_content_is_deduplicated_by_hash():
+    content = brief("Solar power", "Panels got cheaper.")
+    assert brief_index.index_brief("/out/a.md", "a.md", content) is True
+    assert brief_index.index_brief("/out/a.md", "a.md", content) is False
+    hits, total = brief_index.search_briefs("solar", 10, 0)
+    assert total == 1 and hits[0].path == "/out/a.md"
+
+
+def test_new_content_for_same_topic_and_date_replaces_entry():
+    brief_index.index_brief("/out/a.md", "a.md", brief("Solar power", "Panels got cheaper."))
+    assert brief_index.index_brief("/out/b.md", "b.md", brief("Solar power", "Batteries too."))
+    assert brief_index.search_briefs("panels", 10, 0) == ([], 0)
+    hits, total = brief_index.search_briefs("batteries", 10, 0)
+    assert total == 1 and hits[0].path == "/out/b.md"
+
+
+def test_overwritten_path_drops_the_previous_topic():
+    brief_index.index_brief("/out/brief.md", "brief.md", brief("Cats", "Cats sleep a lot."))
+    assert brief_index.index_brief("/out/brief.md", "brief.md", brief("Dogs", "Dogs bark."))
+    assert brief_index.search_briefs("cats", 10, 0) == ([], 0)
+    assert brief_index.search_briefs("dogs", 10, 0)[1] == 1
+
+
+def test_search_ranks_topic_matches_first_and_paginates():
+    brief_index.index_brief("/out/1.md", "1.md", brief("Wind energy", "Turbines and grids."))
+    brief_index.index_brief("/out/2.md", "2.md", brief("Grid storage", "Wind energy needs storage."))
+    brief_index.index_brief("/out/3.md", "3.md", brief("Hydrogen", "Wind energy can make hydrogen."))
+    hits, total = brief_index.search_briefs("wind", 2, 0)
+    assert total == 3 and len(hits) == 2
+    assert hits[0].topic == "Wind energy"
+    assert hits[0].score >= hits[1].score
+    rest, _ = brief_index.search_briefs("wind", 2, 2)
+    assert len(rest) == 1
+    assert {h.path for h in hits + rest} == {"/out/1.md", "/out/2.md", "/out/3.md"}
+
+
+def test_last_term_is_a_prefix_and_snippet_is_highlighted():
+    brief_index.index_brief("/out/1.md", "1.md", brief("Regulation", "The AI Act entered into force."))
+    hits, total = brief_index.search_briefs("regul", 10, 0)
+    assert total == 1
+    hits, _ = brief_index.search_briefs("act", 10, 0)
+    assert "**Act**" in hits[0].snippet
+
+
+@pytest.mark.parametrize("query", ['"unbalanced', "AND OR NOT", "a:b (c", "*", "NEAR(x y)"])
+def test_fts_syntax_in_queries_is_quoted(query):
+    brief_index.index_brief("/out/1.md", "1.md", brief("Syntax", "and or not near x y a b c"))
+    hits, total = brief_index.search_briefs(query, 10, 0)
+    assert total == len(hits)
+
+
+def test_query_without_terms_returns_nothing():
+    assert brief_index.search_briefs("  ?! ", 10, 0) == ([], 0)
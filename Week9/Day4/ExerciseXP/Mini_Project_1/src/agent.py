@@ -3,26 +3,81 @@ Agent orchestrating MCP tool calls using an LLM (Groq or Ollama).
 
 - Takes a user goal.
 - Iteratively asks the LLM what to do next.
-- The LLM either calls an MCP tool or finishes with a final markdown answer.
+- The LLM either calls an MCP tool, calls several independent tools at once
+  (run concurrently), or finishes with a final markdown answer.
 - Logs each tool call for observability.
 
 Robustness:
 - LLM cannot finish before at least one tool call.
-- JSON parsing is tolerant (tries raw and "first JSON object").
+- Planning calls send the plan JSON Schema as a structured-output constraint
+  (LLM_STRUCTURED_OUTPUT, see plan_schema.py); answers are checked against
+  the same schema, and free text is searched for the first valid plan.
 - None-valued args are stripped before calling tools.
+
+LLM responses are cached on disk (llm_cache.py): rerunning the same goal
+replays identical prompts, which are then answered without calling the model.
+Each step log records whether its planning call was a cache hit.
+
+Planning calls are streamed (LLM_STREAM) and cut off as soon as the plan's
+JSON object is complete, instead of waiting for trailing chatter.
+
+Goals that name one or two URLs skip LLM planning (AGENT_FAST_PATH, see
+fast_path.py): the fetch -> write_file -> add_metadata sequence runs directly
+and the LLM only writes the note. On any deviation the planning loop below
+takes over.
+
+Full tool outputs are kept per run (artifacts.py) under handles like @step1;
+plans reference them ("content": "# Title ... {{@step1}}") instead of
+copying a fetched page into write_file, and references are expanded right
+before the tool call.
+
+Each step log carries wall-clock timings (LLM call, limiter wait, MCP
+spawn/handshake, tool call) and the backend's token counts and timings
+(llm_usage.py); run totals are kept in ResearchAgent.last_run_stats.
+
+With LLM_BACKEND=auto each LLM call goes to the currently fastest healthy
+backend, optionally hedged on the other one (llm_router.py); the decision is
+recorded in the step log.
+
+The tool history in planning prompts is kept under a token budget
+(HISTORY_TOKEN_BUDGET, see history.py), and the system prompt is identical
+at every step so a loaded Ollama model (OLLAMA_KEEP_ALIVE) can reuse it.
 """
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
+import time
 from dataclasses import dataclass
 from typing import Dict, Any, List, Tuple
 
+import requests
+
+from artifacts import ArtifactError, ArtifactStore, step_handle
 from config import Config
-from llm_ollama import chat as ollama_chat
-from llm_groq import chat as groq_chat
+from history import CompactHistory, HistoryCompactor, TokenMeter
+from fast_path import NOTE_SCHEMA, final_answer as fast_path_answer, goal_urls, note_messages, parse_note
+from llm_ollama import achat_with_usage as ollama_achat, chat_stream as ollama_chat_stream, chat_with_usage as ollama_chat
+from llm_groq import achat_with_usage as groq_achat, chat_stream as groq_chat_stream, chat_with_usage as groq_chat
+from llm_cache import LLMResponseCache, cache_key
+from llm_limits import LLMLimiter
+from llm_router import LLMRouter
+from llm_stream import StreamedChat
+from llm_usage import LLMUsage, sum_usage
 from mcp_client import MCPClient, MCPToolCallResult
+from plan_schema import MAX_PARALLEL_CALLS, PLAN_SCHEMA, PlanParse, parse_plan
+
+
+# LLM_STRUCTURED_OUTPUT values, strictest first (a 400 from the backend
+# steps down to the next one)
+STRUCTURED_OUTPUT_MODES = ("schema", "json", "off")
+
+# (server, tool) -> (server, tool) it must wait for when both are in one plan.
+CALL_DEPENDENCIES: Dict[Tuple[str, str], Tuple[str, str]] = {
+    ("kb_metadata", "add_metadata"): ("filesystem", "write_file"),
+}
 
 
 @dataclass
@@ -37,42 +92,110 @@ class StepLog:
     success: bool
     error: str | None
     output_snippet: str
+    # Planning LLM call that produced this step: "hit", "miss", "bypass" or "off"
+    llm_cache: str | None = None
+    # Cache hit rate over this run's LLM calls so far
+    llm_cache_hit_rate: float | None = None
+    # Streaming timings of that planning call (None if cached / not streamed)
+    llm_stream: Dict[str, Any] | None = None
+    # How the plan was read from the answer: "direct", "extracted" or "failed"
+    plan_parse: str | None = None
+    # Plan JSON Schema violations (None if the plan was valid)
+    plan_errors: List[str] | None = None
+    # Who chose this call: "llm" (planning loop) or "fast_path" (rule-based)
+    planner: str = "llm"
+    # Handle of the full output in the run's artifact store, e.g. "@step1"
+    artifact: str | None = None
+    # Seconds per phase: llm, llm_wait, prompt_eval, eval, load (backend's own
+    # timings), spawn, handshake, tool (last attempt), tool_total (all attempts).
+    # LLM entries only on the first call of a step, so sums do not double count.
+    timings: Dict[str, float] | None = None
+    # Tokens of the planning LLM call: {"prompt": ..., "completion": ...}
+    tokens: Dict[str, int] | None = None
+    # Backend router decision for the planning call (LLM_BACKEND=auto)
+    llm_route: Dict[str, Any] | None = None
+    # Tool history sent with the planning call: steps in full / digested /
+    # dropped / omitted and its estimated tokens (see history.py)
+    history: Dict[str, int] | None = None
 
 
-def _extract_first_json_object(text: str) -> Dict[str, Any] | None:
+@dataclass
+class LLMCall:
+    """Result of one LLM request made by the agent."""
+
+    text: str
+    cache: str = "off"  # "hit", "miss", "bypass" or "off"
+    cache_key: str | None = None
+    stream: Dict[str, Any] | None = None
+    # Structured-output mode the request was sent with
+    structured: str = "off"
+    # Wall clock of the whole call (limiter wait included; ~0 on a cache hit)
+    seconds: float = 0.0
+    wait_s: float = 0.0
+    # Token counts / backend timings (None on a cache hit or an early-stopped stream)
+    usage: LLMUsage | None = None
+    # LLMRouter decision (None unless LLM_BACKEND=auto, or on a cache hit)
+    route: Dict[str, Any] | None = None
+
+    def timings(self) -> Dict[str, float]:
+        timings = {"llm": self.seconds}
+        if self.wait_s:
+            timings["llm_wait"] = self.wait_s
+        if self.usage is not None:
+            for key, value in (
+                ("prompt_eval", self.usage.prompt_eval_s),
+                ("eval", self.usage.eval_s),
+                ("load", self.usage.load_s),
+            ):
+                if value is not None:
+                    timings[key] = value
+        return timings
+
+    def tokens(self) -> Dict[str, int] | None:
+        if self.usage is None or (self.usage.prompt_tokens is None and self.usage.completion_tokens is None):
+            return None
+        return {"prompt": self.usage.prompt_tokens, "completion": self.usage.completion_tokens}
+
+
+def step_timings(llm_call: LLMCall | None, result: MCPToolCallResult) -> Dict[str, float] | None:
+    """StepLog.timings for one tool call (and the LLM call that planned it, if given)."""
+    timings = llm_call.timings() if llm_call is not None else {}
+    for key, name in (("spawn", "spawn"), ("handshake", "handshake"), ("call", "tool"), ("total", "tool_total")):
+        if key in result.timings:
+            timings[name] = result.timings[key]
+    return {k: round(v, 3) for k, v in timings.items()} or None
+
+
+def structured_format(
+    backend: str,
+    mode: str,
+    schema: Dict[str, Any] = PLAN_SCHEMA,
+    name: str = "agent_plan",
+) -> Any:
     """
-    Try to extract and parse the first JSON object in a string.
-
-    Some models output text around JSON. We:
-      - find the first '{'
-      - track brace depth until matching '}'
-      - attempt json.loads on that substring
+    Backend-specific structured-output parameter for JSON calls:
+    Ollama's `format` or Groq's `response_format` (None for mode "off").
     """
-    start = text.find("{")
-    if start < 0:
+    if mode == "off":
         return None
+    if backend == "groq":
+        if mode == "schema":
+            return {"type": "json_schema", "json_schema": {"name": name, "schema": schema}}
+        return {"type": "json_object"}
+    return schema if mode == "schema" else "json"
 
-    depth = 0
-    for i in range(start, len(text)):
-        ch = text[i]
-        if ch == "{":
-            depth += 1
-        elif ch == "}":
-            depth -= 1
-            if depth == 0:
-                candidate = text[start : i + 1]
-                try:
-                    return json.loads(candidate)
-                except Exception:
-                    return None
-    return None
-
-
-def llm_chat(config: Config, messages: List[Dict[str, str]]) -> str:
+
+def llm_chat(
+    config: Config, messages: List[Dict[str, str]], format: Any = None, backend: str | None = None
+) -> Tuple[str, LLMUsage | None]:
     """
-    Dispatch LLM calls to either Groq or Ollama based on config.llm_backend.
+    Dispatch LLM calls to either Groq or Ollama: `backend`, defaulting to
+    config.llm_backend.
+
+    format is a structured_format() value for the same backend. Returns
+    (text, usage reported by the backend).
     """
-    if config.llm_backend == "groq":
+    if (backend or config.llm_backend) == "groq":
         if not (config.groq_base_url and config.groq_model and config.groq_api_key):
             raise RuntimeError("Groq backend selected but GROQ_* env vars are not fully set.")
         return groq_chat(
@@ -80,6 +203,8 @@ def llm_chat(config: Config, messages: List[Dict[str, str]]) -> str:
             model=config.groq_model,
             api_key=config.groq_api_key,
             messages=messages,
+            temperature=config.llm_temperature,
+            response_format=format,
         )
 
     # Default: Ollama
@@ -87,9 +212,83 @@ def llm_chat(config: Config, messages: List[Dict[str, str]]) -> str:
         base_url=config.ollama_base_url,
         model=config.ollama_model,
         messages=messages,
+        temperature=config.llm_temperature,
+        format=format,
+        keep_alive=config.ollama_keep_alive or None,
+    )
+
+
+async def allm_chat(
+    config: Config, messages: List[Dict[str, str]], format: Any = None, backend: str | None = None
+) -> Tuple[str, LLMUsage | None]:
+    """asyncio counterpart of llm_chat(), for callers running on an event loop."""
+    if (backend or config.llm_backend) == "groq":
+        if not (config.groq_base_url and config.groq_model and config.groq_api_key):
+            raise RuntimeError("Groq backend selected but GROQ_* env vars are not fully set.")
+        return await groq_achat(
+            base_url=config.groq_base_url,
+            model=config.groq_model,
+            api_key=config.groq_api_key,
+            messages=messages,
+            temperature=config.llm_temperature,
+            response_format=format,
+        )
+
+    return await ollama_achat(
+        base_url=config.ollama_base_url,
+        model=config.ollama_model,
+        messages=messages,
+        temperature=config.llm_temperature,
+        format=format,
+        keep_alive=config.ollama_keep_alive or None,
+    )
+
+
+def llm_chat_stream(
+    config: Config,
+    messages: List[Dict[str, str]],
+    stop_at_json: bool = True,
+    format: Any = None,
+    backend: str | None = None,
+) -> StreamedChat:
+    """Streaming counterpart of llm_chat() (see llm_stream.py)."""
+    if (backend or config.llm_backend) == "groq":
+        if not (config.groq_base_url and config.groq_model and config.groq_api_key):
+            raise RuntimeError("Groq backend selected but GROQ_* env vars are not fully set.")
+        return groq_chat_stream(
+            base_url=config.groq_base_url,
+            model=config.groq_model,
+            api_key=config.groq_api_key,
+            messages=messages,
+            temperature=config.llm_temperature,
+            stop_at_json=stop_at_json,
+            response_format=format,
+        )
+
+    return ollama_chat_stream(
+        base_url=config.ollama_base_url,
+        model=config.ollama_model,
+        messages=messages,
+        temperature=config.llm_temperature,
+        stop_at_json=stop_at_json,
+        format=format,
+        keep_alive=config.ollama_keep_alive or None,
     )
 
 
+def llm_cache_key(config: Config, messages: List[Dict[str, str]], format: Any = None) -> str:
+    """
+    Cache key of an llm_chat() call: backend, model, temperature, messages, format.
+
+    With LLM_BACKEND=auto either backend may answer, so the key names both models.
+    """
+    if config.llm_backend == "auto":
+        model = f"ollama:{config.ollama_model},groq:{config.groq_model}"
+    else:
+        model = config.groq_model if config.llm_backend == "groq" else config.ollama_model
+    return cache_key(config.llm_backend, model, config.llm_temperature, messages, format=format)
+
+
 class ResearchAgent:
     """
     Agent that uses the LLM to decide which MCP tool to call next.
@@ -104,6 +303,12 @@ class ResearchAgent:
         "args": { ... }
       }
 
+    Several independent tool calls (run concurrently):
+      {
+        "action": "call_tools",
+        "calls": [ {"server": ..., "tool": ..., "args": {...}}, ... ]
+      }
+
     Finish:
       {
         "action": "finish",
@@ -111,22 +316,177 @@ class ResearchAgent:
       }
     """
 
-    def __init__(self, config: Config, mcp_client: MCPClient, logger: logging.Logger | None = None):
+    def __init__(
+        self,
+        config: Config,
+        mcp_client: MCPClient,
+        logger: logging.Logger | None = None,
+        llm_limiter: LLMLimiter | None = None,
+        llm_router: LLMRouter | None = None,
+    ):
+        """
+        Several agents may share one MCPClient (pooled sessions), one
+        LLMLimiter and one LLMRouter (see batch_runner.py); each agent runs
+        one goal at a time. The router is only used with LLM_BACKEND=auto.
+        """
         self.config = config
         self.mcp_client = mcp_client
         self.log = logger or logging.getLogger(__name__)
+        self.llm_limiter = llm_limiter or LLMLimiter.from_config(config)
+        self.llm_router: LLMRouter | None = None
+        if config.llm_backend == "auto":
+            self.llm_router = llm_router or LLMRouter.from_config(config)
+        self.llm_cache = LLMResponseCache.from_config(config)
+        self._bypass_llm_cache = config.llm_cache_mode == "refresh"
+        self._run_cache_lookups = 0
+        self._run_cache_hits = 0
+        self._run_streams: List[StreamedChat] = []
+        self._run_plans: List[PlanParse] = []
+        self._run_llm: List[LLMCall] = []
+        self._run_tools: List[Dict[str, float]] = []
+        self._run_started = time.perf_counter()
+        self._artifacts = ArtifactStore()
+        self._run_expanded_chars = 0
+        self._history = HistoryCompactor(config.history_token_budget, TokenMeter())
+        # Totals of the last run_research() call (see _run_stats)
+        self.last_run_stats: Dict[str, Any] = {}
+        if config.llm_structured_output not in STRUCTURED_OUTPUT_MODES:
+            raise ValueError(
+                f"LLM_STRUCTURED_OUTPUT must be one of {STRUCTURED_OUTPUT_MODES}, "
+                f"got {config.llm_structured_output!r}"
+            )
+        self._structured_output = config.llm_structured_output
+
+    def _llm(
+        self,
+        messages: List[Dict[str, str]],
+        expect_json: bool = False,
+        schema: Dict[str, Any] = PLAN_SCHEMA,
+        kind: str = "plan",
+    ) -> LLMCall:
+        """
+        One LLM request, through the response cache.
+
+        expect_json=True constrains the answer to `schema` (the plan schema
+        by default; LLM_STRUCTURED_OUTPUT) and streams it per
+        config.llm_stream, which can stop at the end of the first JSON
+        object. `kind` tags the cached answer ("plan", "note").
+
+        A backend that rejects the format with HTTP 400 (older Ollama, a Groq
+        model without json_schema support) is retried with the next, looser
+        mode, which is then kept for the rest of this agent's life.
+        """
+        while True:
+            mode = self._structured_output if expect_json else "off"
+            try:
+                return self._llm_once(messages, expect_json, mode, schema, kind)
+            except requests.HTTPError as e:
+                if mode == "off" or e.response is None or e.response.status_code != 400:
+                    raise
+                looser = STRUCTURED_OUTPUT_MODES[STRUCTURED_OUTPUT_MODES.index(mode) + 1]
+                self.log.warning(
+                    f"Backend rejected structured output mode {mode!r} ({e}); falling back to {looser!r}"
+                )
+                self._structured_output = looser
+
+    def _llm_once(
+        self,
+        messages: List[Dict[str, str]],
+        expect_json: bool,
+        mode: str,
+        schema: Dict[str, Any],
+        kind: str,
+    ) -> LLMCall:
+        call = LLMCall(text="", structured=mode)
+        self._run_llm.append(call)
+        t0 = time.perf_counter()
+
+        def send(backend: str) -> Tuple[LLMCall, StreamedChat | None]:
+            """One request to `backend`; may run twice at once when the router hedges."""
+            sent = LLMCall(text="", structured=mode)
+            fmt = structured_format(backend, mode, schema, name=f"agent_{kind}")
+            # Groq does not stream constrained (json_schema) output; a
+            # schema-constrained answer has no trailing chatter to cut anyway.
+            # JSON mode still streams.
+            stream = expect_json and self.config.llm_stream in ("on", "measure") and not (
+                mode == "schema" and backend == "groq"
+            )
+            with self.llm_limiter.slot(backend) as waited:
+                sent.wait_s = waited
+                if waited > 0.05:
+                    self.log.info(f"LLM limiter: waited {waited:.2f}s for a {backend} request slot")
+                if stream:
+                    # A schema-constrained answer ends with its object anyway:
+                    # read it to the final record, which carries the usage.
+                    streamed = llm_chat_stream(
+                        self.config,
+                        messages,
+                        stop_at_json=self.config.llm_stream == "on" and mode != "schema",
+                        format=fmt,
+                        backend=backend,
+                    )
+                    sent.text, sent.stream, sent.usage = streamed.text, streamed.as_log(), streamed.usage
+                    self.log.info(f"LLM stream ({backend}): {sent.stream}")
+                    return sent, streamed
+                sent.text, sent.usage = llm_chat(self.config, messages, format=fmt, backend=backend)
+                return sent, None
+
+        def request() -> str:
+            if self.llm_router is None:
+                sent, streamed = send(self.config.llm_backend)
+            else:
+                (sent, streamed), decision = self.llm_router.call(send)
+                call.route = decision.as_log()
+                self.log.info(f"LLM route: {call.route}")
+            call.stream, call.usage, call.wait_s = sent.stream, sent.usage, sent.wait_s
+            if streamed is not None:
+                self._run_streams.append(streamed)
+            return sent.text
+
+        if self.llm_cache is None:
+            call.text = request()
+        else:
+            # Under LLM_BACKEND=auto the key uses the backend-neutral form
+            # of the constraint (the schema itself, or "json")
+            key_backend = "ollama" if self.config.llm_backend == "auto" else self.config.llm_backend
+            fmt = structured_format(key_backend, mode, schema, name=f"agent_{kind}")
+            call.cache_key = llm_cache_key(self.config, messages, format=fmt)
+            call.text, call.cache = self.llm_cache.get_or_call(
+                call.cache_key,
+                request,
+                bypass=self._bypass_llm_cache,
+                meta={"kind": kind, "structured": mode} if expect_json else None,
+            )
+            if call.cache != "bypass":
+                self._run_cache_lookups += 1
+                self._run_cache_hits += call.cache == "hit"
+        call.seconds = time.perf_counter() - t0
+        self.log.info(
+            f"LLM call: cache {call.cache}, {call.seconds:.2f}s"
+            + (f", usage {call.usage.as_log()}" if call.usage else "")
+        )
+        return call
+
+    def _run_cache_hit_rate(self) -> float | None:
+        if not self._run_cache_lookups:
+            return None
+        return self._run_cache_hits / self._run_cache_lookups
 
     def _ask_model_for_plan(
         self,
         user_goal: str,
         history_summary: str,
         must_call_tool: bool,
-    ) -> Dict[str, Any]:
+    ) -> Tuple[Dict[str, Any], LLMCall, PlanParse]:
         """
         Ask the LLM what to do next and parse its JSON response.
 
         If must_call_tool=True, we explicitly forbid action="finish"
-        in the instructions (used before the first tool call).
+        in the instructions (used before the first tool call). That rule
+        goes in the user message: the system message stays byte-identical
+        across steps, so Ollama can reuse its evaluated prefix.
+
+        Returns (plan, the LLM call it came from, how it was parsed).
         """
         base_system_msg = """
 You are an MCP planning agent.
@@ -150,7 +510,17 @@ VALID RESPONSE SCHEMAS
   "args": { ... }
 }
 
-2) To FINISH, respond with:
+2) To CALL SEVERAL INDEPENDENT TOOLS AT ONCE, respond with:
+
+{
+  "action": "call_tools",
+  "calls": [
+    { "server": "<server_name>", "tool": "<tool_name>", "args": { ... } },
+    { "server": "<server_name>", "tool": "<tool_name>", "args": { ... } }
+  ]
+}
+
+3) To FINISH, respond with:
 
 {
   "action": "finish",
@@ -158,7 +528,7 @@ VALID RESPONSE SCHEMAS
 }
 
 Where:
-- action is either "call_tool" or "finish".
+- action is one of "call_tool", "call_tools" or "finish".
 - server is one of: "fetch", "filesystem", "kb_metadata".
 - tool is:
     - "fetch"         (on server "fetch")
@@ -239,11 +609,29 @@ ARGUMENT RULES
   - "file_path" MUST match the "path" you used for filesystem.write_file.
   - "summary" should be a short human-readable summary (2–3 sentences).
 
+------------------------------------------------------------
+ARTIFACTS (FULL TOOL OUTPUTS)
+------------------------------------------------------------
+
+The history only shows the start of each output, but the FULL output of every
+successful tool call is stored under a handle, shown as artifact=@stepN in the
+history (@stepN.K for the K-th call of a "call_tools" step with several calls).
+
+Inside ANY string argument, write {{@stepN}} to insert that full output.
+Do NOT copy fetched page text into "content" yourself. Instead write, e.g.:
+
+  "content": "# Model Context Protocol\\n\\nShort intro written by you.\\n\\n{{@step1}}"
+
 ------------------------------------------------------------
 PLANNING RULES
 ------------------------------------------------------------
 
 - Never repeat the exact same tool call with the exact same arguments more than once.
+- Use "call_tools" when calls do not need each other's output, e.g. fetching
+  two URLs at once (at most 5 calls). A call whose arguments depend on another
+  call's output (write_file content built from a fetch) must wait for a later step.
+- "filesystem.write_file" and "kb_metadata.add_metadata" for the same note MAY be
+  sent together in one "call_tools"; add_metadata then runs after write_file succeeds.
 - Prefer at most 1–2 fetch calls before moving to write_file.
 - Once the note has been written successfully, immediately follow with add_metadata.
 - Only use "finish" AFTER at least one successful tool call.
@@ -268,98 +656,238 @@ Remember:
 - Do NOT add any explanation, comments, or extra text outside the JSON.
 """
         system_msg = base_system_msg
+        step_rule = ""
         if must_call_tool:
-            system_msg += "\n\nFor THIS step you are NOT allowed to use action 'finish'. You MUST use action 'call_tool'."
+            step_rule = "\nFor THIS step you are NOT allowed to use action 'finish'. You MUST use action 'call_tool' or 'call_tools'.\n"
 
         user_msg = f"""
 User goal:
 {user_goal}
 
-Recent tool history:
+Tool history (older steps condensed):
 {history_summary}
-
+{step_rule}
 Respond ONLY with ONE JSON object following the schema above.
 """.strip()
 
-        raw = llm_chat(
-            self.config,
+        call = self._llm(
             [
                 {"role": "system", "content": system_msg},
                 {"role": "user", "content": user_msg},
             ],
-        ).strip()
+            expect_json=True,
+        )
+        parsed = parse_plan(call.text)
+        self._run_plans.append(parsed)
+        if call.usage is not None and call.usage.prompt_tokens:
+            prompt_chars = len(system_msg) + len(user_msg)
+            self._history.meter.observe(prompt_chars, call.usage.prompt_tokens)
+            self.log.info(
+                f"Planning prompt: ~{self._history.meter.estimate(system_msg + user_msg)} tokens estimated, "
+                f"{call.usage.prompt_tokens} evaluated by the backend"
+            )
 
-        # Remove markdown fences if present
-        if raw.startswith("```"):
-            raw = raw.strip("`")
-            if raw.lower().startswith("json"):
-                raw = raw[4:].strip()
+        if not parsed.valid and call.cache_key is not None:
+            # Do not replay an unusable answer on the next run of this goal
+            self.llm_cache.discard(call.cache_key)
 
-        # Try direct JSON parsing first
-        try:
-            plan = json.loads(raw)
-        except Exception:
-            # If that fails, try to extract first {...}
-            plan = _extract_first_json_object(raw)
+        if parsed.plan is None:
+            self.log.warning("Failed to parse a plan from the model output; forcing finish.")
+            return {"action": "finish", "answer": call.text.strip()}, call, parsed
 
-        if plan is None:
-            self.log.warning("Failed to parse JSON; forcing finish.")
-            return {"action": "finish", "answer": raw}
+        if parsed.errors:
+            self.log.warning(f"Plan does not match the schema ({'; '.join(parsed.errors)}); using it anyway.")
+        return parsed.plan, call, parsed
 
-        if not isinstance(plan, dict) or "action" not in plan:
-            self.log.warning("JSON without 'action'; forcing finish.")
-            return {"action": "finish", "answer": json.dumps(plan, indent=2)}
-
-        return plan
+    def _compact_history(self, logs: List[StepLog]) -> CompactHistory:
+        """
+        Tool history for the LLM within HISTORY_TOKEN_BUDGET: newest steps in
+        full, older ones as one-line digests (see history.py).
+        """
+        return self._history.compact(
+            logs, lambda handle: self._artifacts.describe(handle) if handle in self._artifacts else None
+        )
 
     def _summarize_logs(self, logs: List[StepLog]) -> str:
         """
-        Create a compact summary of the last few tool calls for the LLM.
+        Create a compact summary of the tool calls for the LLM.
         """
-        if not logs:
-            return "(no tool calls yet)"
-
-        parts: List[str] = []
-        for log in logs[-5:]:
-            status = "ok" if log.success else f"error: {log.error}"
-            snippet = (log.output_snippet or "").replace("\n", " ")
-            if len(snippet) > 150:
-                snippet = snippet[:150] + "..."
-            parts.append(
-                f"Step {log.step}: {log.server}.{log.tool}, status={status}, output={snippet}"
-            )
-        return "\n".join(parts)
+        return self._compact_history(logs).text
 
-    def _call_tool(self, server: str, tool: str, args: Dict[str, Any]) -> MCPToolCallResult:
+    async def _call_tool_async(self, server: str, tool: str, args: Dict[str, Any]) -> MCPToolCallResult:
         """
         Call an MCP tool with a small retry loop.
 
         - Removes None-valued args.
-        - Logs before and after the call for observability.
+        - Expands artifact references ({{@step1}}); an unknown handle fails
+          the call without contacting the server.
+        - Logs before and after the call for observability (with the
+          unexpanded args).
+
+        The returned result's timings sum spawn/handshake over all attempts
+        ("call" is the last attempt's) and add "total", the wall clock of
+        all attempts.
         """
         cleaned_args = {k: v for k, v in args.items() if v is not None}
+        try:
+            call_args, inserted = self._artifacts.expand(cleaned_args)
+        except ArtifactError as e:
+            self.log.warning(f"MCP call {server}.{tool} not sent: {e}")
+            return MCPToolCallResult(success=False, text=None, error=str(e))
+        if inserted:
+            self._run_expanded_chars += inserted
+            self.log.info(f"Expanded artifact references: {inserted} chars inserted into {server}.{tool} args")
 
         attempts = max(1, self.config.max_tool_retries)
         last: MCPToolCallResult | None = None
+        t0 = time.perf_counter()
+        spent: Dict[str, float] = {}
 
         for attempt in range(1, attempts + 1):
             self.log.info(
                 f"MCP call -> server={server} tool={tool} attempt={attempt} args={cleaned_args!r}"
             )
-            last = self.mcp_client.call_tool(server, tool, cleaned_args)
+            last = await self.mcp_client.call_tool_async(server, tool, call_args)
+            for phase in ("spawn", "handshake"):
+                spent[phase] = spent.get(phase, 0.0) + last.timings.get(phase, 0.0)
             if last.success:
                 self.log.info(
                     f"MCP result <- server={server} tool={tool} success=True "
                     f"len(text)={len(last.text or '')}"
                 )
-                return last
+                break
 
             self.log.warning(
                 f"MCP result <- server={server} tool={tool} success=False error={last.error!r}"
             )
 
+        last.timings = {**last.timings, **spent, "total": time.perf_counter() - t0}  # type: ignore[union-attr]
+        self._run_tools.append(last.timings)  # type: ignore[union-attr]
         return last  # type: ignore[return-value]
 
+    def _keep_artifact(self, result: MCPToolCallResult, step: int, index: int | None = None) -> str | None:
+        """Store a successful output under its handle; returns the handle."""
+        if not result.success or result.text is None:
+            return None
+        handle = step_handle(step, index)
+        self._artifacts.put(handle, result.text)
+        return handle
+
+    def _call_tool(self, server: str, tool: str, args: Dict[str, Any]) -> MCPToolCallResult:
+        """Blocking version of _call_tool_async (runs on the MCP client loop)."""
+        return self.mcp_client.submit(self._call_tool_async(server, tool, args)).result()
+
+    async def _call_tools_async(self, calls: List[Dict[str, Any]]) -> List[MCPToolCallResult]:
+        """
+        Run independent tool calls concurrently (per-server limits apply in
+        MCPClient). A call listed in CALL_DEPENDENCIES waits for its
+        prerequisite from the same batch and is skipped if that failed.
+        """
+        keys = [(c["server"], c["tool"]) for c in calls]
+        tasks: List[asyncio.Task] = []
+
+        async def run(i: int) -> MCPToolCallResult:
+            prereq = CALL_DEPENDENCIES.get(keys[i])
+            deps = [tasks[j] for j in range(len(calls)) if j != i and keys[j] == prereq]
+            if deps:
+                dep_results = await asyncio.gather(*deps)
+                failed = [r for r in dep_results if not r.success]
+                if failed:
+                    return MCPToolCallResult(
+                        success=False,
+                        text=None,
+                        error=f"Skipped: prerequisite {prereq[0]}.{prereq[1]} failed ({failed[0].error})",
+                    )
+            return await self._call_tool_async(calls[i]["server"], calls[i]["tool"], calls[i].get("args") or {})
+
+        for i in range(len(calls)):
+            tasks.append(asyncio.ensure_future(run(i)))
+        return list(await asyncio.gather(*tasks))
+
+    def _call_tools(self, calls: List[Dict[str, Any]]) -> List[MCPToolCallResult]:
+        return self.mcp_client.submit(self._call_tools_async(calls)).result()
+
+    def _run_fast_path(self, user_goal: str, logs: List[StepLog], max_steps: int) -> str | None:
+        """
+        Run the standard workflow for a URL goal without LLM planning.
+
+        Step 1 fetches the URL(s) concurrently, one LLM call writes the note,
+        step 2 runs write_file + add_metadata (add_metadata waits for the
+        write, see CALL_DEPENDENCIES). Steps are appended to logs as they run.
+
+        Returns the final answer, or None if the goal does not fit or
+        anything deviated; the planning loop then continues from logs.
+        """
+        if self.config.agent_fast_path != "on" or max_steps < 2:
+            return None
+        urls = goal_urls(user_goal)
+        if urls is None:
+            return None
+        self.log.info(f"Fast path: goal names {urls}; skipping LLM planning")
+
+        def run_step(
+            step: int, calls: List[Dict[str, Any]], llm_call: LLMCall | None = None
+        ) -> List[MCPToolCallResult]:
+            results = self._call_tools(calls)
+            for i, (call, result) in enumerate(zip(calls, results), start=1):
+                logs.append(
+                    StepLog(
+                        step=step,
+                        action="call_tools",
+                        server=call["server"],
+                        tool=call["tool"],
+                        args=call["args"],
+                        success=result.success,
+                        error=result.error,
+                        output_snippet=(result.text or "")[:300],
+                        llm_cache=llm_call.cache if llm_call else None,
+                        llm_cache_hit_rate=self._run_cache_hit_rate(),
+                        llm_stream=llm_call.stream if llm_call else None,
+                        planner="fast_path",
+                        artifact=self._keep_artifact(result, step, i if len(calls) > 1 else None),
+                        timings=step_timings(llm_call if i == 1 else None, result),
+                        tokens=llm_call.tokens() if llm_call and i == 1 else None,
+                        llm_route=llm_call.route if llm_call and i == 1 else None,
+                    )
+                )
+            return results
+
+        fetched = run_step(1, [{"server": "fetch", "tool": "fetch", "args": {"url": u}} for u in urls])
+        if not all(r.success for r in fetched):
+            self.log.warning("Fast path: fetch failed; handing over to LLM planning.")
+            return None
+
+        note_call = self._llm(
+            note_messages(user_goal, {u: r.text or "" for u, r in zip(urls, fetched)}),
+            expect_json=True,
+            schema=NOTE_SCHEMA,
+            kind="note",
+        )
+        note = parse_note(note_call.text)
+        if note is None:
+            if note_call.cache_key is not None:
+                self.llm_cache.discard(note_call.cache_key)
+            self.log.warning("Fast path: no usable note in the model output; handing over to LLM planning.")
+            return None
+
+        written = run_step(
+            2,
+            [
+                {"server": "filesystem", "tool": "write_file", "args": {"path": note.path, "content": note.content}},
+                {
+                    "server": "kb_metadata",
+                    "tool": "add_metadata",
+                    "args": {"topic": note.title, "file_path": note.path, "summary": note.summary},
+                },
+            ],
+            llm_call=note_call,
+        )
+        if not all(r.success for r in written):
+            self.log.warning("Fast path: saving the note failed; handing over to LLM planning.")
+            return None
+
+        return fast_path_answer(note, urls)
+
     def _summarize_final_answer(self, user_goal: str, logs: List[StepLog]) -> str:
         """
         If the planning loop never produced a 'finish' action, we still want to
@@ -377,31 +905,60 @@ Tool history:
 Summarize the findings in markdown.
 """.strip()
 
-        return llm_chat(
-            self.config,
+        return self._llm(
             [
                 {"role": "system", "content": sys_msg},
                 {"role": "user", "content": user_msg},
             ],
-        ).strip()
+        ).text.strip()
 
-    def run_research(self, user_goal: str, max_steps: int = 5) -> Tuple[str, List[Dict[str, Any]]]:
+    def run_research(
+        self,
+        user_goal: str,
+        max_steps: int = 5,
+        bypass_llm_cache: bool | None = None,
+    ) -> Tuple[str, List[Dict[str, Any]]]:
         """
         Main entry point used by Streamlit.
 
+        bypass_llm_cache=True forces fresh LLM answers for this run (they
+        still refresh the cache); None keeps the LLM_CACHE setting.
+
         Returns:
             final_answer_markdown, list_of_logs_as_dicts
+
+        Run totals (time, tokens, MCP phases) are left in self.last_run_stats.
         """
+        if bypass_llm_cache is not None:
+            self._bypass_llm_cache = bypass_llm_cache
+        self._run_cache_lookups = 0
+        self._run_cache_hits = 0
+        self._run_streams = []
+        self._run_plans = []
+        self._run_llm = []
+        self._run_tools = []
+        self._run_started = time.perf_counter()
+        self._artifacts = ArtifactStore()
+        self._run_expanded_chars = 0
+
         logs: List[StepLog] = []
-        used_tool = False
+        final_answer = self._run_fast_path(user_goal, logs, max_steps)
+        if final_answer is not None:
+            self.last_run_stats = self._run_stats()
+            self._log_run_stats()
+            return final_answer, [vars(l) for l in logs]
+
+        used_tool = any(l.success for l in logs)
         final_answer = "No answer produced."
 
-        for step in range(1, max_steps + 1):
-            history_summary = self._summarize_logs(logs)
+        for step in range(logs[-1].step + 1 if logs else 1, max_steps + 1):
+            history = self._compact_history(logs)
+            if history.dropped or history.omitted or history.digests:
+                self.log.info(f"History compacted: {history.as_log()}")
 
-            plan = self._ask_model_for_plan(
+            plan, llm_call, parsed = self._ask_model_for_plan(
                 user_goal=user_goal,
-                history_summary=history_summary,
+                history_summary=history.text,
                 must_call_tool=not used_tool,  # before first tool, forbid finish
             )
 
@@ -439,6 +996,16 @@ Summarize the findings in markdown.
                         success=result.success,
                         error=result.error,
                         output_snippet=snippet,
+                        llm_cache=llm_call.cache,
+                        llm_cache_hit_rate=self._run_cache_hit_rate(),
+                        llm_stream=llm_call.stream,
+                        plan_parse=parsed.method,
+                        plan_errors=parsed.errors or None,
+                        artifact=self._keep_artifact(result, step),
+                        timings=step_timings(llm_call, result),
+                        tokens=llm_call.tokens(),
+                        llm_route=llm_call.route,
+                        history=history.as_log(),
                     )
                 )
 
@@ -447,6 +1014,49 @@ Summarize the findings in markdown.
 
                 continue  # next planning step
 
+            # Handle several independent tool calls in one step
+            if action == "call_tools":
+                calls = plan.get("calls")
+                if (
+                    not isinstance(calls, list)
+                    or not calls
+                    or not all(isinstance(c, dict) and c.get("server") and c.get("tool") for c in calls)
+                ):
+                    final_answer = f"Invalid tool call plan: {json.dumps(plan, indent=2)}"
+                    break
+
+                calls = calls[:MAX_PARALLEL_CALLS]
+                results = self._call_tools(calls)
+
+                # One history update for the whole batch
+                for i, (call, result) in enumerate(zip(calls, results), start=1):
+                    logs.append(
+                        StepLog(
+                            step=step,
+                            action="call_tools",
+                            server=call["server"],
+                            tool=call["tool"],
+                            args=call.get("args") or {},
+                            success=result.success,
+                            error=result.error,
+                            output_snippet=(result.text or "")[:300],
+                            llm_cache=llm_call.cache,
+                            llm_cache_hit_rate=self._run_cache_hit_rate(),
+                            llm_stream=llm_call.stream,
+                            plan_parse=parsed.method,
+                            plan_errors=parsed.errors or None,
+                            artifact=self._keep_artifact(result, step, i if len(calls) > 1 else None),
+                            timings=step_timings(llm_call if i == 1 else None, result),
+                            tokens=llm_call.tokens() if i == 1 else None,
+                            llm_route=llm_call.route if i == 1 else None,
+                            history=history.as_log() if i == 1 else None,
+                        )
+                    )
+                    if result.success:
+                        used_tool = True
+
+                continue  # next planning step
+
             # Unknown action → bail with debug info
             final_answer = f"Unknown action from model: {json.dumps(plan, indent=2)}"
             break
@@ -455,4 +1065,70 @@ Summarize the findings in markdown.
         if final_answer == "No answer produced.":
             final_answer = self._summarize_final_answer(user_goal, logs)
 
-        return final_answer, [vars(l) for l in logs]
\ No newline at end of file
+        self.last_run_stats = self._run_stats()
+        self._log_run_stats()
+        return final_answer, [vars(l) for l in logs]
+
+    def _run_stats(self) -> Dict[str, Any]:
+        """
+        Totals of the current run: wall clock, every LLM call (planning, note,
+        summary) with the backend's token counts and timings, and MCP phases.
+        """
+        stats: Dict[str, Any] = {
+            "seconds": time.perf_counter() - self._run_started,
+            "llm_calls": len(self._run_llm),
+            "llm_s": sum(c.seconds for c in self._run_llm),
+            "llm_wait_s": sum(c.wait_s for c in self._run_llm),
+            "tool_calls": len(self._run_tools),
+            "mcp_spawn_s": sum(t.get("spawn", 0.0) for t in self._run_tools),
+            "mcp_handshake_s": sum(t.get("handshake", 0.0) for t in self._run_tools),
+            "tool_s": sum(t.get("total", 0.0) for t in self._run_tools),
+        }
+        stats = {k: round(v, 3) if isinstance(v, float) else v for k, v in stats.items()}
+        winners = [c.route["winner"] for c in self._run_llm if c.route and c.route.get("winner")]
+        if winners:
+            stats["llm_backends"] = {b: winners.count(b) for b in sorted(set(winners))}
+        stats.update(sum_usage(c.usage for c in self._run_llm))
+        return stats
+
+    def _log_run_stats(self) -> None:
+        """One-line summaries of this run's LLM usage."""
+        stats = self.last_run_stats
+        msg = f"LLM calls this run: {stats['llm_calls']} ({stats['llm_s']:.2f}s"
+        if "prompt_tokens" in stats or "completion_tokens" in stats:
+            msg += f", {stats.get('prompt_tokens', 0)} prompt + {stats.get('completion_tokens', 0)} completion tokens"
+        msg += ")"
+        if stats["llm_wait_s"] > 0.05:
+            msg += f"; {stats['llm_wait_s']:.2f}s waiting on LLM concurrency/rate limits"
+        self.log.info(msg)
+        if stats["tool_calls"]:
+            self.log.info(
+                f"MCP: {stats['tool_calls']} tool calls, {stats['tool_s']:.2f}s "
+                f"(spawn {stats['mcp_spawn_s']:.2f}s, handshake {stats['mcp_handshake_s']:.2f}s); "
+                f"run total {stats['seconds']:.2f}s"
+            )
+        if self._run_expanded_chars:
+            self.log.info(
+                f"Artifacts: {self._run_expanded_chars} chars of tool output passed by reference "
+                f"instead of being generated by the LLM"
+            )
+        if self._run_cache_lookups:
+            self.log.info(
+                f"LLM cache: {self._run_cache_hits}/{self._run_cache_lookups} hits this run "
+                f"({self._run_cache_hit_rate():.0%})"
+            )
+        if self._run_plans:
+            valid = sum(p.valid for p in self._run_plans)
+            methods = {m: sum(p.method == m for p in self._run_plans) for m in ("direct", "extracted", "failed")}
+            self.log.info(
+                f"Plans: {valid}/{len(self._run_plans)} schema-valid "
+                f"(direct {methods['direct']}, extracted {methods['extracted']}, failed {methods['failed']}); "
+                f"structured output: {self._structured_output}"
+            )
+        if self._run_streams:
+            stopped = sum(s.stopped_early for s in self._run_streams)
+            saved = [s.saved_s for s in self._run_streams if s.saved_s is not None]
+            msg = f"LLM streaming: {stopped}/{len(self._run_streams)} planning calls stopped at the end of the JSON plan"
+            if saved:
+                msg += f"; stopping early would have saved {sum(saved):.2f}s ({sum(saved) / len(saved):.2f}s per call)"
+            self.log.info(msg)
\ No newline at end of file
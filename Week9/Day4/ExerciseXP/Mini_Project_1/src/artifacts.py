@@ -0,0 +1,102 @@
+r"""
+Per-run store of full tool outputs, addressable from plan arguments.
+
+The step history shown to the LLM only carries a 300-character snippet of
+each output. To save a fetched page the model used to re-type it inside
+write_file's "content", token by token. Instead, every successful tool
+output is kept here under a handle:
+
+    @step1      output of the (single) call made at step 1
+    @step1.2    second call of a multi-call "call_tools" batch at step 1
+
+and any string argument may reference it:
+
+    "content": "# MCP overview\n\nFetched from ...\n\n{{@step1}}"
+    "content": "@step1"          (the whole value is the reference)
+
+The agent expands references right before the tool call, so only the short
+placeholder is generated by the model.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, List, Tuple
+
+
+_HANDLE = r"@step\d+(?:\.\d+)?"
+_INLINE_RE = re.compile(r"\{\{\s*(" + _HANDLE + r")\s*\}\}")
+_WHOLE_RE = re.compile(r"\s*(" + _HANDLE + r")\s*")
+
+
+class ArtifactError(ValueError):
+    """A plan referenced a handle that does not exist (yet)."""
+
+
+def step_handle(step: int, index: int | None = None) -> str:
+    return f"@step{step}" if index is None else f"@step{step}.{index}"
+
+
+class ArtifactStore:
+    """Full tool outputs of one agent run, by handle."""
+
+    def __init__(self) -> None:
+        self._items: Dict[str, str] = {}
+
+    def __contains__(self, handle: str) -> bool:
+        return handle in self._items
+
+    def put(self, handle: str, text: str) -> None:
+        self._items[handle] = text
+
+    def describe(self, handle: str) -> str:
+        return f"{handle} ({len(self._items[handle])} chars)"
+
+    @property
+    def handles(self) -> List[str]:
+        return list(self._items)
+
+    def _get(self, handle: str) -> str:
+        try:
+            return self._items[handle]
+        except KeyError:
+            available = ", ".join(self._items) or "none yet"
+            raise ArtifactError(f"Unknown artifact {handle}; available: {available}") from None
+
+    def expand(self, value: Any) -> Tuple[Any, int]:
+        """
+        Replace references in value (recursively through dicts and lists).
+
+        Returns (expanded value, characters inserted). Raises ArtifactError
+        for an unknown handle.
+        """
+        if isinstance(value, str):
+            whole = _WHOLE_RE.fullmatch(value)
+            if whole:
+                text = self._get(whole.group(1))
+                return text, len(text)
+            if "{{" not in value:
+                return value, 0
+            inserted = 0
+
+            def sub(m: re.Match) -> str:
+                nonlocal inserted
+                text = self._get(m.group(1))
+                inserted += len(text)
+                return text
+
+            return _INLINE_RE.sub(sub, value), inserted
+
+        if isinstance(value, dict):
+            out: Dict[str, Any] = {}
+            total = 0
+            for k, v in value.items():
+                out[k], n = self.expand(v)
+                total += n
+            return out, total
+
+        if isinstance(value, list):
+            items = [self.expand(v) for v in value]
+            return [v for v, _ in items], sum(n for _, n in items)
+
+        return value, 0
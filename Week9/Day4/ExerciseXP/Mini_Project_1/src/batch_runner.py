@@ -0,0 +1,165 @@
+"""
+Run many research goals concurrently.
+
+ResearchAgent.run_research handles one goal at a time, and most of a run is
+spent waiting on the LLM or on MCP servers. The batch runner starts up to
+`max_concurrent_goals` runs at once. Each goal gets its own ResearchAgent, since
+per-run state lives on the agent, and all of them share:
+
+  - one MCPClient: pooled server sessions, started once, with the
+    per-server call limits (MCP_SERVER_CONCURRENCY)
+  - one LLMLimiter: total in-flight LLM requests (LLM_MAX_CONCURRENCY) and
+    per-backend requests/minute (OLLAMA_RPM, GROQ_RPM)
+  - one LLMRouter (LLM_BACKEND=auto): backend latency/error profiles
+
+so a queue of goals drains as fast as the LLM backend allows. Results are
+yielded as each goal finishes, not in input order.
+
+When Ollama may serve the batch, its model is loaded (an empty chat request,
+through the async client) while the first goals start, instead of on their
+first planning call.
+
+Usage:
+    python src/batch_runner.py goals.txt [--concurrency 4] [--max-steps 5] > results.jsonl
+
+goals.txt holds one goal per line; each finished goal prints one JSON line.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import logging
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List
+
+from agent import ResearchAgent, allm_chat
+from config import Config, get_config
+from llm_limits import LLMLimiter
+from llm_router import LLMRouter
+from mcp_client import MCPClient
+
+
+@dataclass
+class GoalResult:
+    """Outcome of one goal of a batch."""
+
+    index: int  # position in the input list
+    goal: str
+    answer: str | None
+    logs: List[Dict[str, Any]] = field(default_factory=list)
+    error: str | None = None
+    seconds: float = 0.0
+    # ResearchAgent.last_run_stats: LLM/MCP time and tokens of this goal
+    stats: Dict[str, Any] = field(default_factory=dict)
+
+
+async def warm_up_ollama(config: Config, log: logging.Logger) -> None:
+    """Have Ollama load the model (a chat without messages only loads it)."""
+    t0 = time.perf_counter()
+    try:
+        await allm_chat(config, [], backend="ollama")
+    except Exception as e:
+        log.warning(f"Ollama warm-up failed: {e!r}")
+        return
+    log.info(f"Ollama model {config.ollama_model!r} loaded in {time.perf_counter() - t0:.1f}s")
+
+
+async def run_batch(
+    goals: List[str],
+    config: Config,
+    mcp_client: MCPClient,
+    max_concurrent_goals: int | None = None,
+    max_steps: int = 5,
+    llm_limiter: LLMLimiter | None = None,
+    logger: logging.Logger | None = None,
+) -> AsyncIterator[GoalResult]:
+    """
+    Research every goal, at most max_concurrent_goals at a time
+    (default: config.batch_max_concurrent_goals), yielding each GoalResult
+    as soon as it is done. A failing goal yields a result with `error` set
+    and does not stop the batch.
+    """
+    log = logger or logging.getLogger(__name__)
+    limiter = llm_limiter or LLMLimiter.from_config(config)
+    router = LLMRouter.from_config(config) if config.llm_backend == "auto" else None
+    concurrency = max(1, max_concurrent_goals or config.batch_max_concurrent_goals)
+    slots = asyncio.Semaphore(concurrency)
+    # Own pool: the default executor has min(32, cpus + 4) threads, which
+    # would silently cap the concurrency on small machines.
+    executor = concurrent.futures.ThreadPoolExecutor(concurrency, thread_name_prefix="research-goal")
+    loop = asyncio.get_running_loop()
+
+    async def run_one(index: int, goal: str) -> GoalResult:
+        async with slots:
+            agent = ResearchAgent(
+                config, mcp_client, logger=log.getChild(f"goal{index}"), llm_limiter=limiter, llm_router=router
+            )
+            t0 = time.perf_counter()
+            try:
+                # The agent is synchronous (blocking HTTP to the LLM, MCP calls
+                # waited on via the client loop): give it a worker thread.
+                answer, logs = await loop.run_in_executor(executor, agent.run_research, goal, max_steps)
+            except Exception as e:
+                log.warning(f"Goal {index} failed: {e!r}")
+                return GoalResult(index, goal, None, error=repr(e), seconds=time.perf_counter() - t0)
+            return GoalResult(
+                index, goal, answer, logs, seconds=time.perf_counter() - t0, stats=agent.last_run_stats
+            )
+
+    # Not an agent request, so it does not take an LLMLimiter slot: Ollama
+    # loads the model once however many requests wait for it.
+    warm_up = (
+        asyncio.create_task(warm_up_ollama(config, log)) if config.llm_backend in ("ollama", "auto") else None
+    )
+    tasks = [asyncio.create_task(run_one(i, g)) for i, g in enumerate(goals)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+        if warm_up is not None:
+            warm_up.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def _main_async(args: argparse.Namespace) -> None:
+    config = get_config()
+    logging.basicConfig(
+        level=config.log_level.upper(),
+        format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
+        stream=sys.stderr,
+    )
+    log = logging.getLogger("batch_runner")
+
+    with open(args.goals, "r", encoding="utf-8") as f:
+        goals = [line.strip() for line in f if line.strip()]
+
+    t0 = time.perf_counter()
+    done = 0
+    with MCPClient(config, logger=log) as client:
+        async for result in run_batch(goals, config, client, args.concurrency, args.max_steps, logger=log):
+            done += 1
+            print(json.dumps(vars(result), ensure_ascii=False), flush=True)
+            log.info(
+                f"[{done}/{len(goals)}] goal {result.index} finished in {result.seconds:.1f}s"
+                + (f" with error {result.error}" if result.error else "")
+            )
+    log.info(f"Batch of {len(goals)} goals done in {time.perf_counter() - t0:.1f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Research many goals concurrently")
+    parser.add_argument("goals", help="Text file with one goal per line")
+    parser.add_argument("--concurrency", type=int, default=None, help="Goals in flight (default: BATCH_MAX_CONCURRENT_GOALS)")
+    parser.add_argument("--max-steps", type=int, default=5)
+    asyncio.run(_main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
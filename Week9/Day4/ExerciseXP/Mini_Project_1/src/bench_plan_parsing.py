@@ -0,0 +1,162 @@
+"""
+Plan parsing benchmark over recorded model outputs.
+
+Replays raw planning answers through:
+  - legacy:  the agent's previous parser (strip code fences, json.loads, else
+             the first {...} found by brace counting, which is not
+             string-aware)
+  - schema:  plan_schema.parse_plan (JSON tokenizer extraction + plan JSON
+             Schema validation)
+
+and reports, per structured-output mode the answers were recorded with:
+  - usable:  share of answers that yield an object with an "action"
+  - valid:   share that yield a schema-valid plan
+  - us/plan: parse (+ validate) time per answer
+  - steps:   expected planning steps for the ideal 4-step workflow
+             (fetch -> write_file -> add_metadata -> finish) if every
+             unusable answer costs one extra step, and the chance to finish
+             within --max-steps. This is a model derived from the usable
+             rate, not a replay of real runs.
+
+Recorded outputs come from the LLM response cache (planning answers are
+stored with meta {"kind": "plan", "structured": <mode>}) or from a JSONL file
+with one {"response": "...", "meta": {...}} object (or one JSON string) per
+line.
+
+Usage:
+    python src/bench_plan_parsing.py [--cache-dir ./.cache/llm_responses] [--file outputs.jsonl]
+                                     [--max-steps 5] [--repeat 20]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from config import get_config
+from llm_cache import LLMResponseCache
+from plan_schema import parse_plan, plan_errors
+
+
+WORKFLOW_STEPS = 4
+
+
+def _legacy_parse(text: str) -> Dict[str, Any] | None:
+    """The planner's parsing before plan_schema.py, kept for comparison."""
+    raw = text.strip()
+    if raw.startswith("```"):
+        raw = raw.strip("`")
+        if raw.lower().startswith("json"):
+            raw = raw[4:].strip()
+    try:
+        return json.loads(raw)
+    except Exception:
+        pass
+
+    start = raw.find("{")
+    if start < 0:
+        return None
+    depth = 0
+    for i in range(start, len(raw)):
+        if raw[i] == "{":
+            depth += 1
+        elif raw[i] == "}":
+            depth -= 1
+            if depth == 0:
+                try:
+                    return json.loads(raw[start : i + 1])
+                except Exception:
+                    return None
+    return None
+
+
+def _legacy(text: str) -> Tuple[bool, bool]:
+    plan = _legacy_parse(text)
+    usable = isinstance(plan, dict) and "action" in plan
+    return usable, usable and not plan_errors(plan)
+
+
+def _schema(text: str) -> Tuple[bool, bool]:
+    parsed = parse_plan(text)
+    return parsed.plan is not None, parsed.valid
+
+
+PARSERS: Dict[str, Callable[[str], Tuple[bool, bool]]] = {"legacy": _legacy, "schema": _schema}
+
+
+def _load(cache_dir: str | None, path: str | None) -> List[Dict[str, Any]]:
+    records: List[Dict[str, Any]] = []
+    if cache_dir:
+        for record in LLMResponseCache(cache_dir).iter_records():
+            if (record.get("meta") or {}).get("kind") == "plan":
+                records.append(record)
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                obj = json.loads(line)
+                records.append(obj if isinstance(obj, dict) else {"response": obj})
+    return [r for r in records if isinstance(r.get("response"), str)]
+
+
+def _finish_within(p: float, max_steps: int) -> float:
+    """P(at least WORKFLOW_STEPS usable plans within max_steps attempts)."""
+    return sum(
+        math.comb(k - 1, WORKFLOW_STEPS - 1) * p**WORKFLOW_STEPS * (1 - p) ** (k - WORKFLOW_STEPS)
+        for k in range(WORKFLOW_STEPS, max_steps + 1)
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Plan parsing benchmark over recorded model outputs")
+    parser.add_argument("--cache-dir", default=None, help="LLM cache to read (default: LLM_CACHE_DIR)")
+    parser.add_argument("--no-cache", action="store_true", help="Only read --file")
+    parser.add_argument("--file", default=None, help="JSONL file of recorded outputs")
+    parser.add_argument("--max-steps", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=20, help="Parse each output this many times for timing")
+    args = parser.parse_args()
+
+    cache_dir = None if args.no_cache else (args.cache_dir or get_config().llm_cache_dir)
+    records = _load(cache_dir, args.file)
+    if not records:
+        print("No recorded planning outputs found.")
+        return
+
+    groups: Dict[str, List[str]] = {}
+    for record in records:
+        mode = (record.get("meta") or {}).get("structured", "?")
+        groups.setdefault(mode, []).append(record["response"])
+    groups["all"] = [r["response"] for r in records]
+
+    print(
+        f"{'recorded':<9} {'n':>5}  {'parser':<7} {'usable':>7} {'valid':>7} {'us/plan':>8}  "
+        f"{'exp. steps':>10} {f'done<={args.max_steps}':>8}"
+    )
+    for mode, texts in groups.items():
+        if mode == "all" and len(groups) == 2:
+            continue  # single mode: "all" would repeat it
+        for name, parse in PARSERS.items():
+            results = [parse(t) for t in texts]
+            usable = sum(u for u, _ in results) / len(texts)
+            valid = sum(v for _, v in results) / len(texts)
+
+            t0 = time.perf_counter()
+            for _ in range(args.repeat):
+                for t in texts:
+                    parse(t)
+            us = (time.perf_counter() - t0) / (args.repeat * len(texts)) * 1e6
+
+            steps = f"{WORKFLOW_STEPS / usable:10.2f}" if usable else f"{'inf':>10}"
+            print(
+                f"{mode:<9} {len(texts):>5}  {name:<7} {usable:>7.1%} {valid:>7.1%} {us:>8.1f}  "
+                f"{steps} {_finish_within(usable, args.max_steps):>8.1%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -19,6 +19,7 @@ class Config:
     llm_backend:
       - "ollama" (default) to use local Ollama
       - "groq" to use GroqCloud
+      - "auto" to route each call to the faster healthy one (llm_router.py)
 
     The rest are self-explanatory environment-driven settings.
     """
@@ -29,12 +30,49 @@ class Config:
     # Ollama settings
     ollama_base_url: str
     ollama_model: str
+    # How long Ollama keeps the model loaded after a call, e.g. "30m"
+    # ("" = server default); a loaded model reuses the system prompt prefix
+    ollama_keep_alive: str
 
     # Groq settings (used only if llm_backend == "groq")
     groq_base_url: str | None
     groq_model: str | None
     groq_api_key: str | None
 
+    # Sampling temperature sent to either backend (None = backend default)
+    llm_temperature: float | None
+
+    # Backend router (LLM_BACKEND=auto): "on" also sends a call still running
+    # after the chosen backend's p90 latency to the other backend; a backend
+    # failing with a transient error is avoided for llm_router_cooldown_s
+    llm_hedge: str
+    llm_router_cooldown_s: float
+
+    # Streaming for planning calls: "on" (stop at the first complete JSON
+    # object; schema-constrained output ends there anyway and is read to
+    # the end for its token usage), "measure" (stream to the end, record
+    # what stopping would save) or "off" (plain non-streaming requests)
+    llm_stream: str
+
+    # Structured output for planning calls: "schema" (send the plan JSON
+    # Schema: Ollama `format`, Groq `response_format`), "json" (JSON mode
+    # only) or "off" (rely on the prompt)
+    llm_structured_output: str
+
+    # Limits on requests that reach an LLM backend (see llm_limits.py):
+    # in-flight requests across all agents, and requests/minute per backend
+    # (0 = unlimited), with a small burst allowance
+    llm_max_concurrency: int
+    ollama_rpm: float
+    groq_rpm: float
+    llm_rate_burst: int
+
+    # LLM response cache (see llm_cache.py)
+    llm_cache_mode: str
+    llm_cache_dir: str
+    llm_cache_ttl_s: float
+    llm_cache_max_mb: float
+
     # MCP server command lines (stdio) — names used by mcp_client.py
     fetch_cmd: str
     filesystem_cmd: str
@@ -44,7 +82,25 @@ class Config:
     kb_root_dir: str
     kb_metadata_path: str
 
+    # MCP session pool
+    mcp_idle_timeout_s: float
+    mcp_call_timeout_s: float
+    mcp_server_concurrency: int
+
+    # "on": reach all three servers through one gateway process
+    # (mcp_gateway.py) over a single session; "off": one session per server
+    mcp_gateway: str
+    mcp_gateway_cmd: str
+
+    # Batch runner (batch_runner.py): goals researched at the same time
+    batch_max_concurrent_goals: int
+
     # Agent behavior
+    # "on": goals naming URLs run fetch -> write -> register without LLM
+    # planning (see fast_path.py); "off": always plan with the LLM
+    agent_fast_path: str
+    # Estimated tokens of tool history in a planning prompt (see history.py)
+    history_token_budget: int
     max_tool_retries: int
     log_level: str
 
@@ -62,12 +118,32 @@ def get_config() -> Config:
         # Ollama
         ollama_base_url=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
         ollama_model=os.getenv("OLLAMA_MODEL", "llama3.2:3b"),
+        ollama_keep_alive=os.getenv("OLLAMA_KEEP_ALIVE", "30m"),
 
         # Groq
         groq_base_url=os.getenv("GROQ_BASE_URL"),
         groq_model=os.getenv("GROQ_MODEL"),
         groq_api_key=os.getenv("GROQ_API_KEY"),
 
+        llm_temperature=float(os.environ["LLM_TEMPERATURE"]) if os.getenv("LLM_TEMPERATURE") else None,
+        llm_hedge=os.getenv("LLM_HEDGE", "off").lower(),
+        llm_router_cooldown_s=float(os.getenv("LLM_ROUTER_COOLDOWN", "30")),
+        llm_stream=os.getenv("LLM_STREAM", "on").lower(),
+        llm_structured_output=os.getenv("LLM_STRUCTURED_OUTPUT", "schema").lower(),
+
+        llm_max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "2")),
+        ollama_rpm=float(os.getenv("OLLAMA_RPM", "0")),
+        # GroqCloud free tier: 30 requests/minute
+        groq_rpm=float(os.getenv("GROQ_RPM", "30")),
+        llm_rate_burst=int(os.getenv("LLM_RATE_BURST", "3")),
+
+        # LLM response cache: "on", "refresh" (skip reads, keep writing) or "off"
+        llm_cache_mode=os.getenv("LLM_CACHE", "on").lower(),
+        llm_cache_dir=os.getenv("LLM_CACHE_DIR", "./.cache/llm_responses"),
+        # Seconds before a cached response expires (0 = never)
+        llm_cache_ttl_s=float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600))),
+        llm_cache_max_mb=float(os.getenv("LLM_CACHE_MAX_MB", "100")),
+
         # MCP servers (stdio commands) — env var names stay as before
         fetch_cmd=os.getenv("MCP_FETCH_CMD", "uvx mcp-server-fetch"),
         filesystem_cmd=os.getenv(
@@ -83,7 +159,20 @@ def get_config() -> Config:
         kb_root_dir=os.getenv("KB_ROOT_DIR", "./kb"),
         kb_metadata_path=os.getenv("KB_METADATA_PATH", "./kb/metadata.jsonl"),
 
+        # MCP session pool: idle servers are shut down after this many seconds
+        mcp_idle_timeout_s=float(os.getenv("MCP_SESSION_IDLE_TIMEOUT", "300")),
+        mcp_call_timeout_s=float(os.getenv("MCP_CALL_TIMEOUT", "120")),
+        # Max in-flight tool calls per MCP server
+        mcp_server_concurrency=int(os.getenv("MCP_SERVER_CONCURRENCY", "4")),
+
+        mcp_gateway=os.getenv("MCP_GATEWAY", "off").lower(),
+        mcp_gateway_cmd=os.getenv("MCP_GATEWAY_CMD", "python src/mcp_gateway.py"),
+
+        batch_max_concurrent_goals=int(os.getenv("BATCH_MAX_CONCURRENT_GOALS", "4")),
+
         # Agent knobs
+        agent_fast_path=os.getenv("AGENT_FAST_PATH", "on").lower(),
+        history_token_budget=int(os.getenv("HISTORY_TOKEN_BUDGET", "400")),
         max_tool_retries=int(os.getenv("MAX_TOOL_RETRIES", "2")),
         log_level=os.getenv("LOG_LEVEL", "INFO"),
     )
\ No newline at end of file
@@ -0,0 +1,132 @@
+"""
+Rule-based planner for the standard research workflow.
+
+Most goals name one or two URLs and want the fixed sequence the planner
+prompt prescribes anyway:
+
+    fetch the URL(s) -> write_file a note -> add_metadata -> finish
+
+Planning those transitions with the LLM costs one call each. For such goals
+the agent runs the sequence directly and only asks the LLM for the parts
+that need it: the note (title, markdown body, summary), in one call. The
+tool calls, file path, metadata entry and final answer are built here.
+
+Anything unexpected (no/too many URLs, a failed fetch or write, an unusable
+note) hands control back to LLM planning, with the fast-path steps already in
+the tool history.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+from plan_schema import check_supported, is_valid, iter_json_objects
+
+
+# Goals naming more URLs than this are left to the LLM planner.
+MAX_FAST_PATH_URLS = 2
+
+# Characters of each fetched page passed to the note-writing call.
+MAX_SOURCE_CHARS = 8000
+
+_URL_RE = re.compile(r"https?://[^\s<>\"'`)\]]+")
+
+NOTE_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "title": {"type": "string"},
+        "content": {"type": "string"},
+        "summary": {"type": "string"},
+    },
+    "required": ["title", "content", "summary"],
+    "additionalProperties": False,
+}
+check_supported(NOTE_SCHEMA)
+
+
+@dataclass
+class Note:
+    title: str
+    content: str
+    summary: str
+
+    @property
+    def path(self) -> str:
+        """KB-relative path derived from the title, e.g. "notes/Model_Context_Protocol.md"."""
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", self.title).strip("_")[:60] or "note"
+        return f"notes/{slug}.md"
+
+
+def goal_urls(goal: str) -> List[str] | None:
+    """
+    URLs to fetch if the goal fits the fast path, else None.
+
+    Trailing punctuation is trimmed ("see https://x.org/page." -> ".../page")
+    and duplicates are dropped.
+    """
+    urls: List[str] = []
+    for match in _URL_RE.findall(goal):
+        url = match.rstrip(".,;:!?")
+        if url not in urls:
+            urls.append(url)
+    if not urls or len(urls) > MAX_FAST_PATH_URLS:
+        return None
+    return urls
+
+
+def note_messages(goal: str, sources: Dict[str, str]) -> List[Dict[str, str]]:
+    """Messages for the single LLM call of the fast path: write the note."""
+    system_msg = """
+You write notes for a markdown knowledge base.
+
+You are given a research goal and the content of the web page(s) it refers to.
+Respond with EXACTLY ONE JSON object and nothing else:
+
+{
+  "title": "<short topic title, e.g. Overview of MCP>",
+  "content": "<the note in markdown: a heading, key points, and the source URL(s)>",
+  "summary": "<2-3 sentences summarizing the note>"
+}
+
+Use only information from the sources. Do not wrap the JSON in code fences.
+""".strip()
+
+    parts = []
+    for url, text in sources.items():
+        if len(text) > MAX_SOURCE_CHARS:
+            text = text[:MAX_SOURCE_CHARS] + "\n[...truncated]"
+        parts.append(f"Source: {url}\n{text}")
+
+    user_msg = f"""
+Research goal:
+{goal}
+
+Sources:
+{chr(10).join(parts)}
+
+Respond ONLY with ONE JSON object following the schema above.
+""".strip()
+
+    return [
+        {"role": "system", "content": system_msg},
+        {"role": "user", "content": user_msg},
+    ]
+
+
+def parse_note(text: str) -> Note | None:
+    """First object in the answer matching NOTE_SCHEMA with non-empty fields."""
+    for obj in iter_json_objects(text):
+        if is_valid(NOTE_SCHEMA, obj) and all(obj[k].strip() for k in NOTE_SCHEMA["required"]):
+            return Note(obj["title"].strip(), obj["content"], obj["summary"].strip())
+    return None
+
+
+def final_answer(note: Note, urls: List[str]) -> str:
+    sources = "\n".join(f"- {u}" for u in urls)
+    return (
+        f"## {note.title}\n\n{note.summary}\n\n"
+        f"Note saved to `{note.path}` and registered in the KB metadata.\n\n"
+        f"Sources:\n{sources}"
+    )
@@ -0,0 +1,168 @@
+"""
+Token-budgeted tool history for the planning prompt.
+
+Every planning call sends the same system prompt plus the goal and a summary
+of the earlier tool calls. Left alone, that summary grows with each step, and
+on CPU Ollama's prompt evaluation time grows with it. HistoryCompactor keeps
+it under a token budget (HISTORY_TOKEN_BUDGET):
+
+1. Redundant steps are dropped once the workflow has moved on: failed
+   attempts of a call that later succeeded with the same arguments, and
+   earlier duplicates of a successful call.
+2. The newest steps are shown in full (status, artifact, output snippet).
+3. Older steps become one-line digests:
+       Step 1: fetch.fetch(url=https://...) ok -> @step1 (24311 chars)
+4. If that is still over budget, full steps are digested too (the newest is
+   always kept in full) and the oldest digests are folded into one
+   "(N earlier steps omitted)" line.
+
+Token counts are estimated from the character count. TokenMeter calibrates
+the chars-per-token ratio against the prompt_tokens the backend reports.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Tuple
+
+if TYPE_CHECKING:
+    from agent import StepLog
+
+
+# Steps shown with their output snippet; older ones are digested
+FULL_STEPS = 2
+SNIPPET_CHARS = 150
+DIGEST_ARG_CHARS = 60
+
+# Plausible chars-per-token range: outside it a reported prompt_tokens is
+# not the whole prompt (e.g. Ollama reusing a cached prefix) and is ignored
+_RATIO_RANGE = (1.5, 8.0)
+
+
+class TokenMeter:
+    """Estimates tokens from characters, calibrated by the backend's counts."""
+
+    def __init__(self, chars_per_token: float = 4.0, alpha: float = 0.3):
+        self.chars_per_token = chars_per_token
+        self.alpha = alpha
+        self._lock = threading.Lock()
+
+    def estimate(self, text: str) -> int:
+        return math.ceil(len(text) / self.chars_per_token)
+
+    def observe(self, prompt_chars: int, prompt_tokens: int | None) -> None:
+        """Fold one measured prompt into the ratio."""
+        if not prompt_tokens:
+            return
+        ratio = prompt_chars / prompt_tokens
+        if not _RATIO_RANGE[0] <= ratio <= _RATIO_RANGE[1]:
+            return
+        with self._lock:
+            self.chars_per_token += self.alpha * (ratio - self.chars_per_token)
+
+
+@dataclass
+class CompactHistory:
+    text: str
+    full: int = 0  # steps shown with their output
+    digests: int = 0  # steps shown as one-line digests
+    dropped: int = 0  # redundant steps left out
+    omitted: int = 0  # old steps left out to fit the budget
+    tokens: int = 0  # estimated tokens of text
+
+    def as_log(self) -> Dict[str, int]:
+        return {
+            "full": self.full,
+            "digests": self.digests,
+            "dropped": self.dropped,
+            "omitted": self.omitted,
+            "tokens": self.tokens,
+        }
+
+
+def drop_redundant(logs: List["StepLog"]) -> List["StepLog"]:
+    """Steps that still tell the planner something (see module docstring)."""
+    kept = []
+    for i, log in enumerate(logs):
+        later = logs[i + 1:]
+        # A later success of the same call, with the same arguments
+        if any(l.success and (l.server, l.tool, l.args) == (log.server, log.tool, log.args) for l in later):
+            continue  # superseded failure or repeated call
+        kept.append(log)
+    return kept
+
+
+def _short_args(args: Dict[str, Any] | None) -> str:
+    parts = []
+    for key, value in (args or {}).items():
+        text = str(value).replace("\n", " ")
+        if len(text) > DIGEST_ARG_CHARS:
+            text = text[:DIGEST_ARG_CHARS] + "..."
+        parts.append(f"{key}={text}")
+    return ", ".join(parts)
+
+
+class HistoryCompactor:
+    """Renders StepLogs for the planning prompt within `budget` tokens."""
+
+    def __init__(self, budget: int, meter: TokenMeter | None = None):
+        self.budget = budget
+        self.meter = meter or TokenMeter()
+
+    def full_line(self, log: "StepLog", artifact: str | None) -> str:
+        status = "ok" if log.success else f"error: {log.error}"
+        snippet = (log.output_snippet or "").replace("\n", " ")
+        if len(snippet) > SNIPPET_CHARS:
+            snippet = snippet[:SNIPPET_CHARS] + "..."
+        artifact_part = f", artifact={artifact}" if artifact else ""
+        return f"Step {log.step}: {log.server}.{log.tool}, status={status}{artifact_part}, output={snippet}"
+
+    def digest_line(self, log: "StepLog", artifact: str | None) -> str:
+        head = f"Step {log.step}: {log.server}.{log.tool}({_short_args(log.args)})"
+        if not log.success:
+            return f"{head} failed: {(log.error or '')[:80]}"
+        return f"{head} ok" + (f" -> {artifact}" if artifact else "")
+
+    def compact(self, logs: List["StepLog"], describe: Callable[[str | None], str | None]) -> CompactHistory:
+        """
+        History text for logs. describe(handle) gives the artifact label,
+        e.g. "@step1 (24311 chars)", or None if there is none.
+        """
+        if not logs:
+            return CompactHistory("(no tool calls yet)")
+        kept = drop_redundant(logs)
+        n_full = min(FULL_STEPS, len(kept))
+        omitted = 0
+
+        def render() -> Tuple[str, int]:
+            lines = []
+            if omitted:
+                lines.append(f"({omitted} earlier steps omitted)")
+            split = len(kept) - n_full
+            for log in kept[omitted:split]:
+                lines.append(self.digest_line(log, describe(log.artifact)))
+            for log in kept[split:]:
+                lines.append(self.full_line(log, describe(log.artifact)))
+            text = "\n".join(lines)
+            return text, self.meter.estimate(text)
+
+        text, tokens = render()
+        while tokens > self.budget:
+            if n_full > 1:
+                n_full -= 1
+            elif omitted < len(kept) - n_full:
+                omitted += 1
+            else:
+                break  # only the newest step left
+            text, tokens = render()
+
+        return CompactHistory(
+            text=text,
+            full=n_full,
+            digests=len(kept) - n_full - omitted,
+            dropped=len(logs) - len(kept),
+            omitted=omitted,
+            tokens=tokens,
+        )
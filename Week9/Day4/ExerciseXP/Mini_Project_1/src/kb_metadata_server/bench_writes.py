@@ -0,0 +1,110 @@
+"""
+Write throughput benchmark for kb_metadata storage.
+
+Runs N concurrent writers (threads, each calling add() in a loop) against:
+  - naive:        open / append / fsync / close per entry (the old add_metadata
+                  plus an fsync, so durability is comparable)
+  - jsonl-group:  JsonlStore with the group-commit writer
+  - sqlite-group: SQLiteStore with the group-commit writer
+
+and reports entries/sec plus, for group commit, the average batch size.
+Every file is checked afterwards for lost or interleaved lines.
+
+Usage:
+    python -m src.kb_metadata_server.bench_writes [--entries 2000] [--writers 1 8 64] [--dir ./kb]
+
+Use --dir on the disk the KB actually lives on: fsync cost (and therefore the
+gain from group commit) depends heavily on the device.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List
+
+from .jsonl_store import JsonlStore, iter_jsonl
+from .sqlite_store import SQLiteStore
+
+
+def _entry(writer: int, i: int) -> Dict[str, Any]:
+    return {
+        "topic": f"bench {writer % 7}",
+        "file_path": f"notes/bench_{writer}_{i}.md",
+        "summary": "Synthetic entry written by the kb_metadata write benchmark.",
+        "created_at": f"2025-01-01T00:00:00.{writer:03d}{i:06d}Z",
+    }
+
+
+def _naive_add(path: str) -> Callable[[Dict[str, Any]], None]:
+    def add(entry: Dict[str, Any]) -> None:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+    return add
+
+
+def _run(add: Callable[[Dict[str, Any]], None], writers: int, total: int) -> float:
+    per_writer = max(1, total // writers)
+    barrier = threading.Barrier(writers + 1)
+
+    def work(w: int) -> None:
+        barrier.wait()
+        for i in range(per_writer):
+            add(_entry(w, i))
+
+    threads = [threading.Thread(target=work, args=(w,)) for w in range(writers)]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    t0 = time.perf_counter()
+    for t in threads:
+        t.join()
+    return per_writer * writers / (time.perf_counter() - t0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="kb_metadata write throughput benchmark")
+    parser.add_argument("--entries", type=int, default=2000, help="Entries per run (split across writers)")
+    parser.add_argument("--writers", type=int, nargs="+", default=[1, 8, 64])
+    parser.add_argument("--dir", default=None, help="Where to create the scratch files (default: system temp)")
+    args = parser.parse_args()
+
+    print(f"{'writers':>7}  {'backend':<13} {'entries/s':>10}  {'avg batch':>9}")
+    for writers in args.writers:
+        if args.dir:
+            os.makedirs(args.dir, exist_ok=True)
+        with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+            expected = max(1, args.entries // writers) * writers
+            rows: List[tuple] = []
+
+            path = os.path.join(tmp, "naive.jsonl")
+            rows.append(("naive", _run(_naive_add(path), writers, args.entries), None))
+            assert sum(1 for _ in iter_jsonl(path)) == expected, "naive: lost or torn lines"
+
+            path = os.path.join(tmp, "group.jsonl")
+            store = JsonlStore(path)
+            rate = _run(store.add, writers, args.entries)
+            rows.append(("jsonl-group", rate, store._writer.entries / max(1, store._writer.batches)))
+            store.close()
+            assert sum(1 for _ in iter_jsonl(path)) == expected, "jsonl-group: lost or torn lines"
+
+            sqlite_store = SQLiteStore(os.path.join(tmp, "group.sqlite3"))
+            rate = _run(sqlite_store.add, writers, args.entries)
+            writer = sqlite_store._writer
+            rows.append(("sqlite-group", rate, writer.entries / max(1, writer.batches)))
+            assert len(sqlite_store.list()) == expected, "sqlite-group: lost entries"
+            sqlite_store.close()
+
+            for backend, rate, batch in rows:
+                batch_s = f"{batch:9.1f}" if batch is not None else f"{'-':>9}"
+                print(f"{writers:>7}  {backend:<13} {rate:>10.0f}  {batch_s}")
+
+
+if __name__ == "__main__":
+    main()
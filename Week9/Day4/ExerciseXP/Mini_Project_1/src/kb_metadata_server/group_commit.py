@@ -0,0 +1,98 @@
+"""
+Group-commit writer for kb_metadata.
+
+Callers hand entries to submit() and get a Future back. A single writer
+thread takes everything that queued up while the previous batch was being
+written and commits it in one go (one write + one fsync for JSONL, one
+transaction for SQLite), then resolves every caller's future. Under load
+batches grow on their own; a lone writer still sees the latency of a
+single commit.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import queue
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+Entry = Dict[str, Any]
+
+_STOP = object()
+
+
+class GroupCommitWriter:
+    """Batches concurrent submit() calls into calls to `commit(entries)`."""
+
+    def __init__(self, commit: Callable[[List[Entry]], None], name: str, max_batch: int = 5000):
+        self._commit = commit
+        self._name = name
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        # Totals since start, for benchmarks / debugging
+        self.batches = 0
+        self.entries = 0
+
+    def submit(self, entries: List[Entry]) -> concurrent.futures.Future:
+        """Queue entries for the next group commit; the future resolves once they are durable."""
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        if not entries:
+            future.set_result(None)
+            return future
+        self._ensure_started()
+        self._queue.put((list(entries), future))
+        return future
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+
+            pending: List[Tuple[List[Entry], concurrent.futures.Future]] = [item]
+            count = len(item[0])
+            stop = False
+            while count < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                pending.append(item)
+                count += len(item[0])
+
+            batch = [entry for entries, _ in pending for entry in entries]
+            try:
+                self._commit(batch)
+            except BaseException as exc:
+                for _, future in pending:
+                    future.set_exception(exc)
+            else:
+                self.batches += 1
+                self.entries += len(batch)
+                for _, future in pending:
+                    future.set_result(None)
+
+            if stop:
+                return
+
+    def close(self) -> None:
+        """Flush what is queued and stop the writer thread."""
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
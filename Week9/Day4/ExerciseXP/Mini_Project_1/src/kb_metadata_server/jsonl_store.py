@@ -0,0 +1,296 @@
+"""
+JSONL storage backend for kb_metadata (the original format).
+
+One JSON object per line in KB_METADATA_PATH:
+    {"topic": ..., "file_path": ..., "summary": ..., "created_at": ...}
+
+Entries are keyed by file_path: a later line for the same file_path replaces
+the earlier one (upsert), and a tombstone line
+    {"file_path": ..., "deleted": true, "created_at": ...}
+removes it. Legacy lines without a file_path are each their own entry.
+compact() rewrites the file with only the live entries.
+
+Listing is served from an in-memory index that tails the file: it remembers
+the byte offset it has parsed up to (plus the file's inode and mtime) and
+on each call only parses lines appended since. The index is rebuilt from
+scratch only when the file was truncated or replaced (log rotation, manual
+edit), so the cost of a call follows the new data, not the whole history.
+The same pass feeds the BM25 inverted index used by search().
+
+Writes go through a group-commit writer: concurrent appends are batched into
+one write + fsync under an exclusive advisory lock (fcntl.flock), so several
+server processes can share the file without interleaving partial lines.
+Compaction takes the same lock, writes the live entries to a temp file,
+fsyncs it and renames it over the log. Readers holding the old file keep a
+consistent snapshot; the tail index sees the new inode and rebuilds.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, single-process use only
+    fcntl = None
+
+from .group_commit import GroupCommitWriter
+from .search_index import MetadataSearchIndex
+
+
+def _ensure_dir_exists(path: str) -> None:
+    """Create parent directory for a file if it does not exist."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+
+def is_tombstone(entry: Dict[str, Any]) -> bool:
+    return entry.get("deleted") is True
+
+
+def entry_key(entry: Dict[str, Any], line_no: int) -> Any:
+    """Upsert key: the file_path, or the line number for legacy entries without one."""
+    file_path = entry.get("file_path")
+    return file_path if file_path is not None else ("line", line_no)
+
+
+def iter_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield every parseable JSON object in a JSONL file (bad lines are skipped)."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                obj = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(obj, dict):
+                yield obj
+
+
+class JsonlStore:
+    """Append-only metadata log in a JSONL file, with an incremental read index."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._writer = GroupCommitWriter(self._append_batch, name="kb-metadata-jsonl-writer")
+        self._reset_index()
+
+    def _reset_index(self) -> None:
+        self._offset = 0
+        self._inode: Optional[int] = None
+        self._mtime_ns: Optional[int] = None
+        # Live entries only, by doc id (ids grow, so dict order = write order)
+        self._docs: Dict[int, Dict[str, Any]] = {}
+        self._doc_ids: Dict[Any, int] = {}  # entry_key -> doc id
+        self._by_topic: Dict[str, Dict[int, Dict[str, Any]]] = {}
+        self._search = MetadataSearchIndex()
+        self._next_id = 0
+        self._records = 0  # lines parsed, live or not
+
+    def write(self, entries: List[Dict[str, Any]]) -> concurrent.futures.Future:
+        """Queue entries for the next group commit (future resolves once fsynced)."""
+        return self._writer.submit(entries)
+
+    def add(self, entry: Dict[str, Any]) -> None:
+        self.write([entry]).result()
+
+    def add_many(self, entries: List[Dict[str, Any]]) -> None:
+        self.write(entries).result()
+
+    def close(self) -> None:
+        self._writer.close()
+
+    def _open_locked(self, flags: int) -> int:
+        """
+        Open the log and take the exclusive lock on it.
+
+        If a compaction replaced the file while we waited for the lock, the
+        descriptor points at the old (unlinked) inode: reopen and try again.
+        """
+        while True:
+            fd = os.open(self.path, flags, 0o644)
+            if fcntl is None:
+                return fd
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                if os.fstat(fd).st_ino == os.stat(self.path).st_ino:
+                    return fd
+            except FileNotFoundError:
+                pass
+            os.close(fd)
+
+    def _append_batch(self, entries: List[Dict[str, Any]]) -> None:
+        """Append a batch with a single write and fsync, holding the file lock."""
+        data = "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in entries).encode("utf-8")
+        _ensure_dir_exists(self.path)
+        fd = self._open_locked(os.O_WRONLY | os.O_APPEND | os.O_CREAT)
+        try:
+            view = memoryview(data)
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+            os.fsync(fd)
+        finally:
+            # Closing the descriptor also releases the flock
+            os.close(fd)
+
+    def list(self, topic: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            self._refresh()
+            if topic is None:
+                return list(self._docs.values())
+            return list(self._by_topic.get(topic, {}).values())
+
+    def get(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """The live entry registered for file_path, or None."""
+        with self._lock:
+            self._refresh()
+            doc_id = self._doc_ids.get(file_path)
+            return None if doc_id is None else self._docs[doc_id]
+
+    def search(
+        self,
+        query: str,
+        created_after: Optional[str] = None,
+        created_before: Optional[str] = None,
+        limit: int = 10,
+        offset: int = 0,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        with self._lock:
+            self._refresh()
+            return self._search.search(
+                self._docs, query, created_after, created_before, limit, offset
+            )
+
+    def stale_fraction(self) -> float:
+        """Share of log lines that are superseded or tombstones (compaction would drop them)."""
+        with self._lock:
+            self._refresh()
+            if not self._records:
+                return 0.0
+            return 1 - len(self._docs) / self._records
+
+    def compact(self) -> Dict[str, Any]:
+        """
+        Rewrite the log keeping only live entries; safe with concurrent
+        readers and writers (in this or other processes).
+
+        Returns a small report: sizes, line counts and duration.
+        """
+        t0 = time.perf_counter()
+        if not os.path.exists(self.path):
+            return {"before_bytes": 0, "after_bytes": 0, "before_lines": 0, "after_lines": 0, "seconds": 0.0}
+
+        fd = self._open_locked(os.O_RDONLY)
+        try:
+            before_bytes = os.fstat(fd).st_size
+            live: Dict[Any, Dict[str, Any]] = {}
+            before_lines = 0
+            with open(fd, "rb", closefd=False) as f:
+                for raw in f:
+                    if not raw.endswith(b"\n"):
+                        break  # torn last line from a crashed writer
+                    try:
+                        obj = json.loads(raw)
+                    except json.JSONDecodeError:
+                        continue
+                    if not isinstance(obj, dict):
+                        continue
+                    before_lines += 1
+                    key = entry_key(obj, before_lines)
+                    # pop first so an upsert moves to the end, like in the index
+                    live.pop(key, None)
+                    if not is_tombstone(obj):
+                        live[key] = obj
+
+            tmp_path = self.path + ".compact.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as out:
+                for obj in live.values():
+                    out.write(json.dumps(obj, ensure_ascii=False) + "\n")
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(tmp_path, self.path)
+            dir_fd = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        finally:
+            os.close(fd)
+
+        report = {
+            "before_bytes": before_bytes,
+            "after_bytes": os.path.getsize(self.path),
+            "before_lines": before_lines,
+            "after_lines": len(live),
+            "seconds": round(time.perf_counter() - t0, 4),
+        }
+        print(f"[kb_metadata] Compacted {self.path}: {report}", file=sys.stderr)
+        return report
+
+    def _apply(self, obj: Dict[str, Any]) -> None:
+        """Apply one log record to the index (upsert or tombstone)."""
+        self._records += 1
+        key = entry_key(obj, self._records)
+        old_id = self._doc_ids.pop(key, None)
+        if old_id is not None:
+            old = self._docs.pop(old_id)
+            self._search.remove(old_id, old)
+            topic_docs = self._by_topic[old.get("topic")]
+            del topic_docs[old_id]
+            if not topic_docs:
+                del self._by_topic[old.get("topic")]
+
+        if is_tombstone(obj):
+            return
+        doc_id = self._next_id
+        self._next_id += 1
+        self._docs[doc_id] = obj
+        self._doc_ids[key] = doc_id
+        self._by_topic.setdefault(obj.get("topic"), {})[doc_id] = obj
+        self._search.add(doc_id, obj)
+
+    def _refresh(self) -> None:
+        """Bring the index up to date with the file (caller holds the lock)."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            self._reset_index()
+            return
+
+        if st.st_ino != self._inode or st.st_size < self._offset:
+            # Rotated/replaced (e.g. compacted) or truncated: start over.
+            self._reset_index()
+        elif st.st_size == self._offset:
+            if st.st_mtime_ns == self._mtime_ns:
+                return
+            # Same length but modified: rewritten in place.
+            self._reset_index()
+
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    # Half-written last line: pick it up on the next call.
+                    break
+                self._offset += len(raw)
+                line = raw.strip()
+                if not line:
+                    continue
+                try:
+                    obj = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(obj, dict):
+                    self._apply(obj)
+
+        self._inode = st.st_ino
+        self._mtime_ns = st.st_mtime_ns
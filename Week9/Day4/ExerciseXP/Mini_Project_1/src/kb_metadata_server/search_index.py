@@ -0,0 +1,159 @@
+"""
+In-memory inverted index for search_metadata (JSONL backend).
+
+- Documents are metadata entries; the indexed text is topic + summary.
+- Postings (term -> {doc_id: term frequency}) and document lengths are
+  updated as entries are added or replaced, so a search never re-tokenizes
+  the log.
+- Ranking is Okapi BM25. A query term ending in "*" matches every indexed
+  term with that prefix (found by bisecting a sorted vocabulary).
+
+The SQLite backend gets the same behaviour from its FTS5 table instead.
+"""
+
+from __future__ import annotations
+
+import bisect
+import heapq
+import math
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# Usual Okapi BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens (same split as SQLite FTS5's unicode61 tokenizer)."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _doc_tokens(entry: Dict[str, Any]) -> List[str]:
+    return tokenize(f"{entry.get('topic') or ''} {entry.get('summary') or ''}")
+
+
+def parse_query(query: str) -> List[Tuple[str, bool]]:
+    """
+    Split a search string into (term, is_prefix) pairs.
+
+    "trans* model" -> [("trans", True), ("model", False)]
+    """
+    terms: List[Tuple[str, bool]] = []
+    for word in query.split():
+        tokens = tokenize(word)
+        for i, token in enumerate(tokens):
+            terms.append((token, word.endswith("*") and i == len(tokens) - 1))
+    return terms
+
+
+def in_date_range(
+    created_at: str, created_after: Optional[str], created_before: Optional[str]
+) -> bool:
+    """
+    ISO-8601 timestamps compare correctly as strings, so a bare date such as
+    "2025-01-31" works as a bound too (after: inclusive, before: exclusive).
+    """
+    if created_after and created_at < created_after:
+        return False
+    if created_before and created_at >= created_before:
+        return False
+    return True
+
+
+class MetadataSearchIndex:
+    """BM25 inverted index over metadata entries, identified by integer ids."""
+
+    def __init__(self) -> None:
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._doc_len: Dict[int, int] = {}
+        self._total_len = 0
+        self._vocab: List[str] = []
+        self._vocab_dirty = False
+
+    def add(self, doc_id: int, entry: Dict[str, Any]) -> None:
+        tokens = _doc_tokens(entry)
+        self._doc_len[doc_id] = len(tokens)
+        self._total_len += len(tokens)
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                self._vocab_dirty = True
+            postings[doc_id] = postings.get(doc_id, 0) + 1
+
+    def remove(self, doc_id: int, entry: Dict[str, Any]) -> None:
+        """Drop a document previously added with `entry` (upsert / delete)."""
+        length = self._doc_len.pop(doc_id, None)
+        if length is None:
+            return
+        self._total_len -= length
+        for token in set(_doc_tokens(entry)):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[token]
+                self._vocab_dirty = True
+
+    def _expand(self, term: str, prefix: bool) -> List[str]:
+        if not prefix:
+            return [term] if term in self._postings else []
+        if self._vocab_dirty:
+            self._vocab = sorted(self._postings)
+            self._vocab_dirty = False
+        start = bisect.bisect_left(self._vocab, term)
+        end = bisect.bisect_left(self._vocab, term + "\U0010ffff")
+        return self._vocab[start:end]
+
+    def scores(self, query: str) -> Dict[int, float]:
+        """BM25 score of every document matching at least one query term."""
+        n_docs = len(self._doc_len)
+        if not n_docs:
+            return {}
+        avgdl = self._total_len / n_docs or 1.0
+
+        scores: Dict[int, float] = {}
+        for term, prefix in parse_query(query):
+            for token in self._expand(term, prefix):
+                postings = self._postings[token]
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * self._doc_len[doc_id] / avgdl)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return scores
+
+    def search(
+        self,
+        entries: Dict[int, Dict[str, Any]],
+        query: str,
+        created_after: Optional[str] = None,
+        created_before: Optional[str] = None,
+        limit: int = 10,
+        offset: int = 0,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Rank `entries` (doc_id -> entry, in write order) for `query`.
+
+        Returns (page of hits with a "score" key, total number of matches).
+        Without a query, matches are all entries in the date range, latest added first.
+        """
+        if not parse_query(query):
+            matches = [
+                e for e in reversed(entries.values())
+                if in_date_range(e.get("created_at") or "", created_after, created_before)
+            ]
+            return [dict(e, score=None) for e in matches[offset:offset + limit]], len(matches)
+
+        ranked = [
+            (score, doc_id)
+            for doc_id, score in self.scores(query).items()
+            if in_date_range(entries[doc_id].get("created_at") or "", created_after, created_before)
+        ]
+        top = heapq.nsmallest(offset + limit, ranked, key=lambda p: (-p[0], p[1]))
+        hits = [dict(entries[doc_id], score=score) for score, doc_id in top[offset:]]
+        return hits, len(ranked)
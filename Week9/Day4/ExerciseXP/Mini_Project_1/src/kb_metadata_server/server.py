@@ -1,47 +1,109 @@
 """
 Custom MCP server: "kb_metadata".
 
-This server exposes *two* very simple tools:
+This server exposes six tools:
 
 1) add_metadata(topic: str, file_path: str, summary: str) -> str
    - Appends a JSON line to KB_METADATA_PATH.
    - Intended to be called after writing a note file.
+   - Entries are keyed by file_path: registering the same file again
+     replaces its previous entry (upsert).
 
-2) list_metadata(topic: Optional[str]) -> str
+2) add_metadata_bulk(entries: list[{topic, file_path, summary}]) -> str
+   - Same, for many entries in one call (bulk imports).
+
+3) list_metadata(topic: Optional[str]) -> str
    - Returns a small markdown list of entries for the given topic (or all topics).
 
+4) search_metadata(query, created_after, created_before, limit, cursor, fields) -> str
+   - BM25-ranked keyword search over topic + summary ("term*" for prefixes),
+     with date-range filters, cursor pagination and field projection.
+   - Returns JSON: {"results": [...], "total": N, "next_cursor": "..." | null}.
+
+5) delete_metadata(file_path: str) -> str
+   - Appends a tombstone; the entry disappears from list/search.
+
+6) compact_metadata() -> str
+   - Rewrites the log keeping only live entries (atomic rename; safe while
+     other readers/writers are active). Returns a JSON size/time report.
+   - Also runs in the background every KB_METADATA_COMPACT_INTERVAL seconds
+     (0 = off, default) once at least half of the log is stale.
+
+Writes (1, 2, 5) are async and go through a group-commit writer: concurrent
+calls are batched into one durable append (one fsync) per batch.
+
+Storage backend (KB_METADATA_BACKEND):
+  - "jsonl" (default): append-only KB_METADATA_PATH, as before.
+  - "sqlite": KB_METADATA_DB_PATH (WAL, indexed, FTS5); lines appended to
+    KB_METADATA_PATH by other writers are imported continuously.
+
 Implementation uses the FastMCP helper from the official MCP Python SDK.
 It runs over STDIO by default when executed as `python -m src.kb_metadata_server.server`.
 """
 
 from __future__ import annotations
 
+import asyncio
 import json
 import os
+import sys
+import threading
+import time
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 
 from mcp.server.fastmcp import FastMCP
 
+from .jsonl_store import JsonlStore
+from .sqlite_store import SQLiteStore
+
 
 # Create the MCP server instance
 mcp = FastMCP("kb_metadata")
 
+_store: JsonlStore | SQLiteStore | None = None
+
+SEARCH_FIELDS = ("topic", "file_path", "summary", "created_at", "score")
+SEARCH_MAX_LIMIT = 50
+
+# Background compaction only bothers when at least this share of the log is stale
+COMPACT_MIN_STALE_FRACTION = 0.5
+
 
 def _metadata_path() -> str:
     """Resolve the metadata file path from env or fall back to ./kb/metadata.jsonl."""
     return os.environ.get("KB_METADATA_PATH", "./kb/metadata.jsonl")
 
 
-def _ensure_dir_exists(path: str) -> None:
-    """Create parent directory for a file if it does not exist."""
-    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+def _get_store() -> JsonlStore | SQLiteStore:
+    """Build the configured storage backend once per process."""
+    global _store
+    if _store is None:
+        backend = os.environ.get("KB_METADATA_BACKEND", "jsonl").lower()
+        if backend == "sqlite":
+            db_path = os.environ.get("KB_METADATA_DB_PATH", "./kb/metadata.sqlite3")
+            _store = SQLiteStore(db_path, jsonl_path=_metadata_path())
+        elif backend == "jsonl":
+            _store = JsonlStore(_metadata_path())
+        else:
+            raise ValueError(f"Unknown KB_METADATA_BACKEND: {backend!r} (expected 'jsonl' or 'sqlite')")
+    return _store
+
+
+def _new_entry(topic: str, file_path: str, summary: str) -> Dict[str, Any]:
+    return {
+        "topic": topic,
+        "file_path": file_path,
+        "summary": summary,
+        "created_at": datetime.utcnow().isoformat() + "Z",
+    }
 
 
 @mcp.tool()
-def add_metadata(topic: str, file_path: str, summary: str) -> str:
+async def add_metadata(topic: str, file_path: str, summary: str) -> str:
     """
-    Append a metadata entry as JSONL.
+    Record the metadata entry for a note file (replaces any previous entry
+    for the same file_path).
 
     Args:
         topic: Short topic label (e.g. "LLMs and MCP").
@@ -51,21 +113,35 @@ def add_metadata(topic: str, file_path: str, summary: str) -> str:
     Returns:
         Human-readable confirmation string.
     """
-    path = _metadata_path()
-    _ensure_dir_exists(path)
+    entry = _new_entry(topic, file_path, summary)
 
-    entry: Dict[str, Any] = {
-        "topic": topic,
-        "file_path": file_path,
-        "summary": summary,
-        "created_at": datetime.utcnow().isoformat() + "Z",
-    }
-
-    with open(path, "a", encoding="utf-8") as f:
-        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    await asyncio.wrap_future(_get_store().write([entry]))
 
     return f"Recorded metadata for topic='{topic}' and file='{file_path}'."
 
+
+@mcp.tool()
+async def add_metadata_bulk(entries: List[Dict[str, str]]) -> str:
+    """
+    Append many metadata entries at once (all-or-nothing validation).
+
+    Args:
+        entries: Objects with "topic", "file_path" and "summary" keys.
+
+    Returns:
+        Human-readable confirmation string.
+    """
+    new_entries = []
+    for i, e in enumerate(entries):
+        missing = [k for k in ("topic", "file_path", "summary") if not isinstance(e.get(k), str)]
+        if missing:
+            raise ValueError(f"entries[{i}] is missing string field(s): {missing}")
+        new_entries.append(_new_entry(e["topic"], e["file_path"], e["summary"]))
+
+    await asyncio.wrap_future(_get_store().write(new_entries))
+
+    return f"Recorded {len(new_entries)} metadata entries."
+
 @mcp.tool()
 def list_metadata(topic: Optional[str] = None) -> str:
     """
@@ -77,24 +153,7 @@ def list_metadata(topic: Optional[str] = None) -> str:
     Returns:
         A markdown-formatted list of entries.
     """
-    path = _metadata_path()
-    if not os.path.exists(path):
-        return "No metadata entries found yet."
-
-    entries: List[Dict[str, Any]] = []
-    with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                obj = json.loads(line)
-                entries.append(obj)
-            except json.JSONDecodeError:
-                continue
-
-    if topic is not None:
-        entries = [e for e in entries if e.get("topic") == topic]
+    entries: List[Dict[str, Any]] = _get_store().list(topic)
 
     if not entries:
         return f"No metadata entries found for topic '{topic}'." if topic else "No metadata entries found."
@@ -114,6 +173,116 @@ def list_metadata(topic: Optional[str] = None) -> str:
     return "\n".join(lines)
 
 
+@mcp.tool()
+def search_metadata(
+    query: str = "",
+    created_after: Optional[str] = None,
+    created_before: Optional[str] = None,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+) -> str:
+    """
+    Ranked keyword search over metadata entries (topic + summary).
+
+    Args:
+        query: Keywords, best matches first (BM25). End a word with "*" for a
+            prefix match ("transform*"). Empty: all entries, newest first.
+        created_after: Only entries created at/after this ISO date or timestamp.
+        created_before: Only entries created before this ISO date or timestamp.
+        limit: Page size (1-50).
+        cursor: "next_cursor" from the previous page.
+        fields: Subset of topic, file_path, summary, created_at, score to return.
+
+    Returns:
+        JSON with "results", "total" and "next_cursor" (null on the last page).
+    """
+    limit = max(1, min(limit, SEARCH_MAX_LIMIT))
+    try:
+        offset = int(cursor) if cursor else 0
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    if offset < 0:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+
+    fields = list(fields) if fields else list(SEARCH_FIELDS)
+    unknown = [f for f in fields if f not in SEARCH_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields {unknown}; expected a subset of {list(SEARCH_FIELDS)}")
+
+    hits, total = _get_store().search(query, created_after, created_before, limit, offset)
+
+    results = [{f: hit.get(f) for f in fields} for hit in hits]
+
+    next_offset = offset + len(hits)
+    return json.dumps(
+        {
+            "results": results,
+            "total": total,
+            "next_cursor": str(next_offset) if next_offset < total else None,
+        },
+        ensure_ascii=False,
+    )
+
+
+@mcp.tool()
+async def delete_metadata(file_path: str) -> str:
+    """
+    Delete the metadata entry of a note file.
+
+    Args:
+        file_path: Path the note was registered with.
+
+    Returns:
+        Human-readable confirmation string.
+    """
+    store = _get_store()
+    if await asyncio.to_thread(store.get, file_path) is None:
+        return f"No metadata entry found for file='{file_path}'."
+
+    tombstone = {
+        "file_path": file_path,
+        "deleted": True,
+        "created_at": datetime.utcnow().isoformat() + "Z",
+    }
+
+    await asyncio.wrap_future(store.write([tombstone]))
+
+    return f"Deleted metadata for file='{file_path}'."
+
+
+@mcp.tool()
+async def compact_metadata() -> str:
+    """
+    Compact the metadata store now, dropping superseded and deleted entries.
+
+    Returns:
+        JSON report: before/after bytes and lines, and seconds taken.
+    """
+    report = await asyncio.to_thread(_get_store().compact)
+    return json.dumps(report)
+
+
+def _start_background_compaction() -> None:
+    """Compact periodically if KB_METADATA_COMPACT_INTERVAL is set (seconds)."""
+    interval = float(os.environ.get("KB_METADATA_COMPACT_INTERVAL", "0") or 0)
+    if interval <= 0:
+        return
+
+    def loop() -> None:
+        while True:
+            time.sleep(interval)
+            try:
+                store = _get_store()
+                if store.stale_fraction() >= COMPACT_MIN_STALE_FRACTION:
+                    store.compact()
+            except Exception as exc:
+                print(f"[kb_metadata] Background compaction failed: {exc!r}", file=sys.stderr)
+
+    threading.Thread(target=loop, name="kb-metadata-compaction", daemon=True).start()
+
+
 if __name__ == "__main__":
+    _start_background_compaction()
     # Default transport is STDIO, which is what the MCP client expects.
     mcp.run()
\ No newline at end of file
@@ -0,0 +1,456 @@
+"""
+SQLite storage backend for kb_metadata.
+
+- WAL mode, so readers never block the writer (and vice versa).
+- Indexes on topic, file_path and created_at; listing/filtering is an
+  index lookup instead of a scan of the whole history.
+- FTS5 index over topic + summary, kept in sync by triggers; search() ranks
+  with its built-in bm25().
+- Writes are group-committed: concurrent add()/write() calls share one
+  transaction (see group_commit.py).
+- One row per file_path: a newer entry (by created_at) replaces the older
+  one, and a tombstone ({"deleted": true}) marks it deleted. Tombstone rows
+  are kept so that re-importing older JSONL lines cannot resurrect them.
+  Legacy JSONL lines without a file_path are each their own row (file_path
+  NULL), as in the JSONL store.
+- compact(): optimize the FTS index and VACUUM.
+- Compatibility with metadata.jsonl:
+    * migrate: one-shot import of an existing JSONL file;
+    * sync_jsonl(): continuous import of lines other writers append to the
+      JSONL file, resumed from the last imported byte offset.
+  Both are idempotent: an entry that is not newer than the stored row for
+  its file_path is ignored.
+
+One-shot migration:
+    python -m src.kb_metadata_server.sqlite_store migrate
+"""
+
+from __future__ import annotations
+
+import argparse
+import concurrent.futures
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .group_commit import GroupCommitWriter
+from .search_index import parse_query
+
+
+_FTS_TRIGGERS = (
+    """
+    CREATE TRIGGER IF NOT EXISTS entries_ai AFTER INSERT ON entries BEGIN
+        INSERT INTO entries_fts (rowid, topic, summary) VALUES (new.id, new.topic, new.summary);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS entries_ad AFTER DELETE ON entries BEGIN
+        INSERT INTO entries_fts (entries_fts, rowid, topic, summary)
+        VALUES ('delete', old.id, old.topic, old.summary);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS entries_au AFTER UPDATE ON entries BEGIN
+        INSERT INTO entries_fts (entries_fts, rowid, topic, summary)
+        VALUES ('delete', old.id, old.topic, old.summary);
+        INSERT INTO entries_fts (rowid, topic, summary) VALUES (new.id, new.topic, new.summary);
+    END
+    """,
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    topic TEXT NOT NULL,
+    file_path TEXT,  -- NULL for legacy entries, never upserted
+    summary TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    deleted INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS entries_topic ON entries (topic, created_at);
+CREATE UNIQUE INDEX IF NOT EXISTS entries_file_path_key ON entries (file_path);
+CREATE INDEX IF NOT EXISTS entries_created_at ON entries (created_at);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5 (
+    topic, summary, content = 'entries', content_rowid = 'id'
+);
+{fts_triggers};
+
+-- Where the continuous JSONL import left off, per file
+CREATE TABLE IF NOT EXISTS jsonl_import (
+    path TEXT PRIMARY KEY,
+    inode INTEGER NOT NULL,
+    offset INTEGER NOT NULL
+);
+""".format(fts_triggers=";\n".join(t.strip() for t in _FTS_TRIGGERS))
+
+
+class SQLiteStore:
+    """Metadata entries in a SQLite database (optionally fed from a JSONL file)."""
+
+    def __init__(self, db_path: str, jsonl_path: Optional[str] = None):
+        self.db_path = db_path
+        self.jsonl_path = jsonl_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        # FastMCP may call tools from worker threads; one connection, one lock.
+        self._lock = threading.Lock()
+        self._writer = GroupCommitWriter(self._commit_batch, name="kb-metadata-sqlite-writer")
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._upgrade()
+        self._conn.executescript(_SCHEMA)
+
+    def _upgrade(self) -> None:
+        """Bring databases created by earlier versions to the current schema."""
+        columns = [r["name"] for r in self._conn.execute("PRAGMA table_info(entries)")]
+        if columns and "deleted" not in columns:
+            # Before upsert semantics: keep only the newest row per file_path.
+            with self._conn:
+                self._conn.execute("ALTER TABLE entries ADD COLUMN deleted INTEGER NOT NULL DEFAULT 0")
+                self._conn.execute(
+                    """
+                    DELETE FROM entries WHERE id IN (
+                        SELECT id FROM (
+                            SELECT id, ROW_NUMBER() OVER (
+                                PARTITION BY file_path ORDER BY created_at DESC, id DESC
+                            ) AS rn
+                            FROM entries
+                        ) WHERE rn > 1
+                    )
+                    """
+                )
+                self._conn.execute("DROP INDEX IF EXISTS entries_file_path")
+
+        fts_columns = [r["name"] for r in self._conn.execute("PRAGMA table_info(entries_fts)")]
+        if fts_columns and "topic" not in fts_columns:
+            # Database from before topics were searchable: rebuild the FTS index.
+            self._conn.executescript(
+                "DROP TRIGGER IF EXISTS entries_ai; DROP TRIGGER IF EXISTS entries_ad; "
+                "DROP TRIGGER IF EXISTS entries_au; DROP TABLE entries_fts;"
+            )
+            self._conn.executescript(_SCHEMA)
+            with self._conn:
+                self._conn.execute("INSERT INTO entries_fts (entries_fts) VALUES ('rebuild')")
+
+        if any(r["name"] == "file_path" and r["notnull"] for r in self._conn.execute("PRAGMA table_info(entries)")):
+            # Legacy entries used to share the file_path "" (one row for all of
+            # them): make the column nullable and import them again.
+            with self._conn:
+                self._conn.execute(
+                    """
+                    CREATE TABLE entries_new (
+                        id INTEGER PRIMARY KEY,
+                        topic TEXT NOT NULL,
+                        file_path TEXT,
+                        summary TEXT NOT NULL,
+                        created_at TEXT NOT NULL,
+                        deleted INTEGER NOT NULL DEFAULT 0
+                    )
+                    """
+                )
+                self._conn.execute(
+                    "INSERT INTO entries_new SELECT id, topic, file_path, summary, created_at, deleted FROM entries"
+                )
+                # Drops the triggers too (recreated by _SCHEMA below)
+                self._conn.execute("DROP TABLE entries")
+                self._conn.execute("ALTER TABLE entries_new RENAME TO entries")
+            self._conn.executescript(_SCHEMA)
+            with self._conn:
+                self._conn.execute("INSERT INTO entries_fts (entries_fts) VALUES ('rebuild')")
+                self._conn.execute("DELETE FROM entries WHERE file_path = ''")
+                self._conn.execute("DELETE FROM jsonl_import")
+
+    def close(self) -> None:
+        self._writer.close()
+        with self._lock:
+            self._conn.close()
+
+    def _insert_many(self, entries: List[Dict[str, Any]]) -> int:
+        """
+        Upsert entries (and tombstones) by file_path; newest created_at wins.
+
+        Deleting the older row and inserting a new one (rather than UPDATE)
+        gives the entry a new id, so listings stay in write order. Legacy
+        entries without a file_path are plain inserts.
+        Returns the number of rows written.
+        """
+        newest: Dict[str, Dict[str, Any]] = {}
+        legacy: List[Dict[str, Any]] = []
+        for entry in entries:
+            file_path = entry.get("file_path")
+            if file_path is None:
+                if entry.get("deleted") is not True:  # a tombstone needs a path
+                    legacy.append(entry)
+                continue
+            current = newest.get(file_path)
+            if current is None or (entry.get("created_at") or "") >= (current.get("created_at") or ""):
+                newest[file_path] = entry
+
+        written = 0
+        if legacy:
+            written += self._conn.executemany(
+                "INSERT INTO entries (topic, file_path, summary, created_at) VALUES (?, NULL, ?, ?)",
+                [(e.get("topic") or "", e.get("summary") or "", e.get("created_at") or "") for e in legacy],
+            ).rowcount
+        if not newest:
+            return written
+
+        self._conn.executemany(
+            "DELETE FROM entries WHERE file_path = ? AND created_at < ?",
+            [(fp, e.get("created_at") or "") for fp, e in newest.items()],
+        )
+        cur = self._conn.executemany(
+            """
+            INSERT INTO entries (topic, file_path, summary, created_at, deleted)
+            SELECT ?, ?, ?, ?, ?
+            WHERE NOT EXISTS (SELECT 1 FROM entries WHERE file_path = ?)
+            """,
+            [
+                (
+                    e.get("topic") or "",
+                    fp,
+                    e.get("summary") or "",
+                    e.get("created_at") or "",
+                    1 if e.get("deleted") is True else 0,
+                    fp,
+                )
+                for fp, e in newest.items()
+            ],
+        )
+        return written + cur.rowcount
+
+    def _commit_batch(self, entries: List[Dict[str, Any]]) -> None:
+        with self._lock, self._conn:
+            self._insert_many(entries)
+
+    def write(self, entries: List[Dict[str, Any]]) -> concurrent.futures.Future:
+        """Queue entries for the next group commit (future resolves once committed)."""
+        return self._writer.submit(entries)
+
+    def add(self, entry: Dict[str, Any]) -> None:
+        self.write([entry]).result()
+
+    def add_many(self, entries: List[Dict[str, Any]]) -> None:
+        self.write(entries).result()
+
+    def list(self, topic: Optional[str] = None) -> List[Dict[str, Any]]:
+        self.sync_jsonl()
+        with self._lock:
+            if topic is None:
+                rows = self._conn.execute(
+                    "SELECT topic, file_path, summary, created_at FROM entries "
+                    "WHERE deleted = 0 ORDER BY id"
+                ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT topic, file_path, summary, created_at FROM entries "
+                    "WHERE topic = ? AND deleted = 0 ORDER BY created_at, id",
+                    (topic,),
+                ).fetchall()
+        return [dict(r) for r in rows]
+
+    def get(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """The live entry registered for file_path, or None."""
+        self.sync_jsonl()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT topic, file_path, summary, created_at FROM entries "
+                "WHERE file_path = ? AND deleted = 0",
+                (file_path,),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def search(
+        self,
+        query: str,
+        created_after: Optional[str] = None,
+        created_before: Optional[str] = None,
+        limit: int = 10,
+        offset: int = 0,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        BM25-ranked matches for `query` (best first), or the most recently
+        added entries first when the query is empty.
+
+        Returns (page of hits with "score", total number of matches).
+        """
+        self.sync_jsonl()
+
+        where = ["e.deleted = 0"]
+        params: List[Any] = []
+        if created_after:
+            where.append("e.created_at >= ?")
+            params.append(created_after)
+        if created_before:
+            where.append("e.created_at < ?")
+            params.append(created_before)
+
+        terms = parse_query(query)
+        if terms:
+            # Every term quoted (no FTS syntax from user input); OR semantics like BM25
+            match = " OR ".join(f'"{t}"' + ("*" if prefix else "") for t, prefix in terms)
+            source = "entries_fts JOIN entries e ON e.id = entries_fts.rowid"
+            where.insert(0, "entries_fts MATCH ?")
+            params.insert(0, match)
+            score = "-bm25(entries_fts)"
+            order = "bm25(entries_fts), e.id"
+        else:
+            source = "entries e"
+            score = "NULL"
+            order = "e.id DESC"
+        where_sql = f"WHERE {' AND '.join(where)}"
+
+        with self._lock:
+            total = self._conn.execute(
+                f"SELECT COUNT(*) FROM {source} {where_sql}", params
+            ).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT e.topic, e.file_path, e.summary, e.created_at, {score} AS score "
+                f"FROM {source} {where_sql} ORDER BY {order} LIMIT ? OFFSET ?",
+                [*params, limit, offset],
+            ).fetchall()
+        return [dict(r) for r in rows], total
+
+    def _file_bytes(self) -> int:
+        return sum(
+            os.path.getsize(p)
+            for p in (self.db_path, self.db_path + "-wal")
+            if os.path.exists(p)
+        )
+
+    def stale_fraction(self) -> float:
+        """Share of database pages that are free (what VACUUM would give back)."""
+        with self._lock:
+            pages = self._conn.execute("PRAGMA page_count").fetchone()[0]
+            free = self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return free / pages if pages else 0.0
+
+    def compact(self) -> Dict[str, Any]:
+        """
+        Merge the FTS index segments, checkpoint the WAL and VACUUM.
+
+        Superseded versions are already gone (upserts replace rows); tombstone
+        rows are kept on purpose, see the module docstring.
+        """
+        t0 = time.perf_counter()
+        with self._lock:
+            before_bytes = self._file_bytes()
+            before_rows = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            with self._conn:
+                self._conn.execute("INSERT INTO entries_fts (entries_fts) VALUES ('optimize')")
+            self._conn.execute("VACUUM")
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            report = {
+                "before_bytes": before_bytes,
+                "after_bytes": self._file_bytes(),
+                "before_lines": before_rows,
+                "after_lines": before_rows,
+                "seconds": round(time.perf_counter() - t0, 4),
+            }
+        print(f"[kb_metadata] Compacted {self.db_path}: {report}", file=sys.stderr)
+        return report
+
+    def sync_jsonl(self) -> int:
+        """
+        Import lines appended to the JSONL file since the last call.
+
+        Cheap when nothing changed (one stat + one indexed lookup). If the
+        file was replaced (different inode) or truncated, it is re-read from
+        the start; entries already stored are skipped, and legacy entries
+        (which have no file_path to match them by) are imported afresh.
+        Returns the number of rows written.
+        """
+        path = self.jsonl_path
+        if not path:
+            return 0
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return 0
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT inode, offset FROM jsonl_import WHERE path = ?", (path,)
+            ).fetchone()
+            offset = 0
+            if row is not None and row["inode"] == st.st_ino and row["offset"] <= st.st_size:
+                offset = row["offset"]
+            if row is not None and offset == st.st_size:
+                return 0
+
+            # Initial import into an empty database: index the FTS table in one
+            # pass at the end instead of row by row through the triggers.
+            bulk = self._conn.execute("SELECT 1 FROM entries LIMIT 1").fetchone() is None
+            imported = 0
+            batch: List[Dict[str, Any]] = []
+            with open(path, "rb") as f, self._conn:
+                if offset == 0 and not bulk:
+                    self._conn.execute("DELETE FROM entries WHERE file_path IS NULL")
+                if bulk:
+                    for name in ("entries_ai", "entries_ad", "entries_au"):
+                        self._conn.execute(f"DROP TRIGGER {name}")
+                f.seek(offset)
+                for raw in f:
+                    if not raw.endswith(b"\n"):
+                        # Half-written last line: pick it up on the next sync.
+                        break
+                    offset += len(raw)
+                    try:
+                        obj = json.loads(raw)
+                    except json.JSONDecodeError:
+                        continue
+                    if isinstance(obj, dict):
+                        batch.append(obj)
+                    if len(batch) >= 1000:
+                        imported += self._insert_many(batch)
+                        batch = []
+                imported += self._insert_many(batch)
+                if bulk:
+                    self._conn.execute("INSERT INTO entries_fts (entries_fts) VALUES ('rebuild')")
+                    for trigger in _FTS_TRIGGERS:
+                        self._conn.execute(trigger)
+                self._conn.execute(
+                    "INSERT INTO jsonl_import (path, inode, offset) VALUES (?, ?, ?) "
+                    "ON CONFLICT (path) DO UPDATE SET inode = excluded.inode, offset = excluded.offset",
+                    (path, st.st_ino, offset),
+                )
+            return imported
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="kb_metadata SQLite backend tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    migrate = sub.add_parser("migrate", help="Import an existing metadata.jsonl into SQLite")
+    migrate.add_argument(
+        "--jsonl",
+        default=os.environ.get("KB_METADATA_PATH", "./kb/metadata.jsonl"),
+        help="Source JSONL file (default: KB_METADATA_PATH or ./kb/metadata.jsonl)",
+    )
+    migrate.add_argument(
+        "--db",
+        default=os.environ.get("KB_METADATA_DB_PATH", "./kb/metadata.sqlite3"),
+        help="Target database (default: KB_METADATA_DB_PATH or ./kb/metadata.sqlite3)",
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    store = SQLiteStore(args.db, jsonl_path=args.jsonl)
+    imported = store.sync_jsonl()
+    store.close()
+    # stderr, like every other kb_metadata message: stdout is the MCP
+    # transport when this module is loaded by the server
+    print(
+        f"[kb_metadata] Imported {imported} entries from {args.jsonl} into {args.db} "
+        f"in {time.perf_counter() - start:.2f}s",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Disk-backed cache of LLM responses.
+
+Key: sha256 over (backend, model, temperature, messages, and the
+structured-output format when one is sent). Identical prompts,
+which is what a rerun of the same goal produces step by step, are answered
+from disk instead of waiting for Ollama/Groq.
+
+- One JSON file per response under <cache_dir>/<key[:2]>/<key>.json,
+  written atomically (temp file + rename).
+- TTL: entries older than `ttl_s` seconds are misses (0 = never expire).
+- Size: once the directory grows past `max_bytes`, the least recently used
+  entries (by mtime, refreshed on every hit) are deleted.
+- Records can carry a small `meta` dict (e.g. {"kind": "plan"}), which lets
+  bench_plan_parsing.py replay recorded planning outputs.
+- Modes (LLM_CACHE): "on" read + write, "refresh" skip reads but store
+  fresh answers, "off" no cache at all.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Tuple
+
+from config import Config
+
+
+CACHE_MODES = ("on", "off", "refresh")
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def cache_key(
+    backend: str,
+    model: str | None,
+    temperature: float | None,
+    messages: List[Dict[str, str]],
+    format: Any = None,
+) -> str:
+    request = {"backend": backend, "model": model, "temperature": temperature, "messages": messages}
+    if format is not None:
+        # Only added when set, so keys of unconstrained calls do not change
+        request["format"] = format
+    payload = json.dumps(request, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """LLM responses on disk, keyed by prompt; see module docstring."""
+
+    def __init__(self, cache_dir: str, ttl_s: float = 0.0, max_bytes: int = 100 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.ttl_s = ttl_s
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._total_bytes: int | None = None  # computed lazily on first write
+
+    @classmethod
+    def from_config(cls, config: Config) -> "LLMResponseCache | None":
+        if config.llm_cache_mode not in CACHE_MODES:
+            raise ValueError(f"LLM_CACHE must be one of {CACHE_MODES}, got {config.llm_cache_mode!r}")
+        if config.llm_cache_mode == "off":
+            return None
+        return cls(
+            config.llm_cache_dir,
+            ttl_s=config.llm_cache_ttl_s,
+            max_bytes=int(config.llm_cache_max_mb * 1024 * 1024),
+        )
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> str | None:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                record = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        if self.ttl_s and time.time() - record.get("created_at", 0) > self.ttl_s:
+            self.discard(key)
+            return None
+        try:
+            os.utime(path)  # mark as recently used for eviction
+        except OSError:
+            pass
+        return record.get("response")
+
+    def put(self, key: str, response: str, meta: Dict[str, Any] | None = None) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        record: Dict[str, Any] = {"created_at": time.time(), "response": response}
+        if meta:
+            record["meta"] = meta
+        data = json.dumps(record, ensure_ascii=False)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(size for _, _, size in self._scan())
+            else:
+                self._total_bytes += len(data.encode("utf-8"))
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def discard(self, key: str) -> None:
+        """Forget one response (e.g. one that turned out to be unusable)."""
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def _scan(self) -> List[Tuple[float, str, int]]:
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, path, st.st_size))
+        return entries
+
+    def _evict(self) -> None:
+        """Delete least recently used entries down to 90% of max_bytes (lock held)."""
+        entries = sorted(self._scan())
+        total = sum(size for _, _, size in entries)
+        target = self.max_bytes * 0.9
+        for _, path, size in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._total_bytes = total
+
+    def iter_records(self) -> List[Dict[str, Any]]:
+        """Every readable record on disk ({"created_at", "response", "meta"?})."""
+        records = []
+        for _, path, _ in self._scan():
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    records.append(json.load(f))
+            except (FileNotFoundError, json.JSONDecodeError):
+                continue
+        return records
+
+    def get_or_call(
+        self,
+        key: str,
+        call: Callable[[], str],
+        bypass: bool = False,
+        meta: Dict[str, Any] | None = None,
+    ) -> Tuple[str, str]:
+        """
+        Return (response, status) where status is "hit", "miss" or "bypass".
+
+        With bypass=True the cache is not read, but the fresh response is stored.
+        """
+        if not bypass:
+            cached = self.get(key)
+            if cached is not None:
+                self.stats.hits += 1
+                return cached, "hit"
+            self.stats.misses += 1
+
+        response = call()
+        self.put(key, response, meta=meta)
+        return response, "bypass" if bypass else "miss"
+
@@ -1,31 +1,68 @@
 # src/llm_groq.py
-from typing import List, Dict
+# Requests go through llm_http.post(): pooled keep-alive connections (one TLS
+# handshake per connection, not per call) and retries on 429/5xx.
+from typing import Any, Iterator, List, Dict, Optional, Tuple
+import json
 import time
 import requests
 
+from llm_http import post, run_blocking
+from llm_stream import StreamedChat, consume
+from llm_usage import LLMUsage
 
-def chat(base_url: str, model: str, api_key: str, messages: List[Dict[str, str]]) -> str:
+
+def chat(
+    base_url: str,
+    model: str,
+    api_key: str,
+    messages: List[Dict[str, str]],
+    temperature: Optional[float] = None,
+    response_format: Optional[Dict[str, Any]] = None,
+) -> str:
+    """Call Groq and return the assistant text (see chat_with_usage)."""
+    return chat_with_usage(base_url, model, api_key, messages, temperature, response_format)[0]
+
+
+def chat_with_usage(
+    base_url: str,
+    model: str,
+    api_key: str,
+    messages: List[Dict[str, str]],
+    temperature: Optional[float] = None,
+    response_format: Optional[Dict[str, Any]] = None,
+) -> Tuple[str, Optional[LLMUsage]]:
     """
-    Call Groq's OpenAI-compatible chat API and return the assistant text.
+    Call Groq's OpenAI-compatible chat API and return the assistant text
+    plus the reported token usage and timings.
 
     - Logs before and after the HTTP call.
-    - Uses a finite timeout.
+    - Uses a finite timeout; connection errors, 429 and 5xx are retried
+      with backoff (llm_http.post).
     - Prints any HTTP error body for debugging.
+
+    response_format is passed through as-is, e.g. {"type": "json_object"} or
+    {"type": "json_schema", "json_schema": {"name": ..., "schema": {...}}}.
     """
     url = f"{base_url.rstrip('/')}/chat/completions"
     print(f"[llm_groq] POST {url} model={model!r}")
     print(f"[llm_groq] messages count={len(messages)}")
 
+    payload = {
+        "model": model,
+        "messages": messages,
+        "stream": False,
+    }
+    if temperature is not None:
+        payload["temperature"] = temperature
+    if response_format is not None:
+        payload["response_format"] = response_format
+
     start = time.time()
     try:
-        resp = requests.post(
+        resp = post(
             url,
             headers={"Authorization": f"Bearer {api_key}"},
-            json={
-                "model": model,
-                "messages": messages,
-                "stream": False,
-            },
+            json=payload,
             timeout=40,
         )
     except Exception as e:
@@ -49,4 +86,94 @@ def chat(base_url: str, model: str, api_key: str, messages: List[Dict[str, str]]
 
     content = data["choices"][0]["message"]["content"]
     print(f"[llm_groq] Response text length={len(content)}")
-    return content
\ No newline at end of file
+    return content, LLMUsage.from_groq(data.get("usage"))
+
+
+async def achat_with_usage(
+    base_url: str,
+    model: str,
+    api_key: str,
+    messages: List[Dict[str, str]],
+    temperature: Optional[float] = None,
+    response_format: Optional[Dict[str, Any]] = None,
+) -> Tuple[str, Optional[LLMUsage]]:
+    """chat_with_usage() for asyncio callers (runs on the llm_http thread pool)."""
+    return await run_blocking(
+        chat_with_usage, base_url, model, api_key, messages, temperature, response_format
+    )
+
+
+def _stream_deltas(resp: requests.Response, final: Dict[str, Any]) -> Iterator[str]:
+    """
+    Text deltas from an OpenAI-style SSE stream ("data: {...}" lines).
+
+    Usage, sent with the last chunk (as "usage" or Groq's "x_groq.usage"),
+    is copied into `final`.
+    """
+    for raw in resp.iter_lines():
+        # iter_lines(decode_unicode=True) still yields bytes without a charset header
+        line = raw.decode("utf-8")
+        if not line.startswith("data:"):
+            continue
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            return
+        chunk = json.loads(data)
+        usage = chunk.get("usage") or (chunk.get("x_groq") or {}).get("usage")
+        if usage:
+            final.update(usage)
+        choices = chunk.get("choices") or []
+        if choices:
+            yield (choices[0].get("delta") or {}).get("content") or ""
+
+
+def chat_stream(
+    base_url: str,
+    model: str,
+    api_key: str,
+    messages: List[Dict[str, str]],
+    temperature: Optional[float] = None,
+    stop_at_json: bool = True,
+    response_format: Optional[Dict[str, Any]] = None,
+) -> StreamedChat:
+    """
+    Streaming version of chat().
+
+    With stop_at_json=True the stream is closed as soon as the first
+    top-level JSON object is complete, instead of waiting for the model
+    to finish talking.
+    """
+    url = f"{base_url.rstrip('/')}/chat/completions"
+    print(f"[llm_groq] POST {url} model={model!r} (stream)")
+
+    payload = {
+        "model": model,
+        "messages": messages,
+        "stream": True,
+    }
+    if temperature is not None:
+        payload["temperature"] = temperature
+    if response_format is not None:
+        payload["response_format"] = response_format
+
+    started = time.perf_counter()
+    resp = post(
+        url,
+        headers={"Authorization": f"Bearer {api_key}"},
+        json=payload,
+        timeout=40,
+        stream=True,
+    )
+    final: Dict[str, Any] = {}
+    with resp:
+        if not resp.ok:
+            print("[llm_groq] Error response body:", resp.text[:1000])
+            resp.raise_for_status()
+        result = consume(_stream_deltas(resp, final), started, stop_at_json=stop_at_json)
+    result.usage = LLMUsage.from_groq(final)
+
+    print(
+        f"[llm_groq] Streamed {len(result.text)} chars in {result.total_s:.2f}s "
+        f"(stopped_early={result.stopped_early})"
+    )
+    return result
\ No newline at end of file
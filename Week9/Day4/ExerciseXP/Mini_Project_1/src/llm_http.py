@@ -0,0 +1,122 @@
+"""
+Shared HTTP plumbing for the LLM clients (llm_ollama.py, llm_groq.py).
+
+- One requests.Session per backend host, with a connection pool sized for
+  concurrent agents (see llm_limits.py / batch_runner.py): keep-alive
+  connections are reused instead of a new TCP (and, for Groq, TLS) handshake
+  on every call.
+- post() retries transient failures (connection errors, HTTP 429/502/503/504)
+  with exponential backoff and full jitter, honouring Retry-After. Read
+  timeouts are not retried: the backend may still be generating the answer.
+- submit() runs a client call on a dedicated thread pool (LLMRouter's hedged
+  requests); run_blocking() awaits one from asyncio, for the async
+  counterparts (achat_with_usage) used by batch_runner.py.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import functools
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, TypeVar
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+# Connections kept alive per host; more concurrent requests still work but
+# open (and then drop) extra connections.
+POOL_MAXSIZE = 16
+
+# Retries after the first attempt, and the backoff between them
+MAX_RETRIES = 3
+BACKOFF_BASE_S = 0.5
+BACKOFF_MAX_S = 8.0
+# Upper bound on a server-sent Retry-After (Groq sends it with 429s)
+RETRY_AFTER_MAX_S = 30.0
+
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+T = TypeVar("T")
+
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+_executor: concurrent.futures.ThreadPoolExecutor | None = None
+
+
+def session_for(url: str) -> requests.Session:
+    """The pooled session for url's scheme://host:port (created on first use)."""
+    parts = urlsplit(url)
+    origin = f"{parts.scheme}://{parts.netloc}"
+    with _sessions_lock:
+        session = _sessions.get(origin)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE)
+            session.mount(origin, adapter)
+            _sessions[origin] = session
+        return session
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff: uniform in [0, base * 2**attempt], capped."""
+    return random.uniform(0, min(BACKOFF_MAX_S, BACKOFF_BASE_S * 2**attempt))
+
+
+def _retry_after(resp: requests.Response) -> float | None:
+    value = resp.headers.get("Retry-After")
+    try:
+        return min(RETRY_AFTER_MAX_S, max(0.0, float(value))) if value else None
+    except ValueError:  # HTTP-date form: not worth parsing here
+        return None
+
+
+def post(url: str, retries: int = MAX_RETRIES, **kwargs: Any) -> requests.Response:
+    """
+    POST through the pooled session, retrying transient failures.
+
+    kwargs go to requests.Session.post (json, headers, timeout, stream...).
+    The last response is returned even if its status is retryable, so the
+    caller's raise_for_status() reports it as before.
+    """
+    session = session_for(url)
+    for attempt in range(retries + 1):
+        try:
+            resp = session.post(url, **kwargs)
+        except requests.ConnectionError as e:
+            if attempt == retries:
+                raise
+            delay = backoff_delay(attempt)
+            reason = type(e).__name__
+        else:
+            if resp.status_code not in RETRY_STATUSES or attempt == retries:
+                return resp
+            delay = _retry_after(resp) or backoff_delay(attempt)
+            reason = f"HTTP {resp.status_code}"
+            resp.close()
+        print(f"[llm_http] {reason} from {url}; retry {attempt + 1}/{retries} in {delay:.2f}s")
+        time.sleep(delay)
+    raise AssertionError("unreachable")
+
+
+def submit(fn: Callable[..., T], *args: Any, **kwargs: Any) -> "concurrent.futures.Future[T]":
+    """
+    Run a blocking client call on the LLM thread pool.
+
+    The pool has POOL_MAXSIZE threads (the default executor's size depends
+    on the CPU count), matching the connections kept per host.
+    """
+    global _executor
+    with _sessions_lock:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(POOL_MAXSIZE, thread_name_prefix="llm-http")
+    return _executor.submit(functools.partial(fn, *args, **kwargs))
+
+
+async def run_blocking(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Await a blocking client call on the LLM thread pool (see submit)."""
+    return await asyncio.wrap_future(submit(fn, *args, **kwargs))
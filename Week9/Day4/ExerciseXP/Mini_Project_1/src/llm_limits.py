@@ -0,0 +1,77 @@
+"""
+Limits on outgoing LLM requests, shared by every agent in a process.
+
+- Concurrency: at most `max_concurrency` requests in flight at once (a local
+  Ollama serves OLLAMA_NUM_PARALLEL requests at a time; more only queue up
+  inside the server and time out there).
+- Rate: per backend, at most `rpm` requests per minute (Groq's free tier
+  rejects bursts with HTTP 429). Requests are spaced evenly, with a burst
+  allowance of `burst` requests.
+
+Agents call the LLM from worker threads, so this uses threading primitives.
+Cache hits never take a slot: only requests that reach a backend do.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import threading
+import time
+from typing import Dict, Iterator
+
+from config import Config
+
+
+class RateLimiter:
+    """Evenly spaced requests: `rpm` per minute, up to `burst` back to back."""
+
+    def __init__(self, rpm: float, burst: int = 1):
+        self.interval = 60.0 / rpm
+        self.burst = max(1, burst)
+        self._lock = threading.Lock()
+        self._next_free = time.monotonic()  # when the bucket is empty again
+
+    def acquire(self) -> float:
+        """Block until a request may go out; returns seconds waited."""
+        with self._lock:
+            now = time.monotonic()
+            # Each request pushes the "empty" time back by one interval;
+            # up to `burst` requests may be ahead of the clock.
+            start = max(now, self._next_free - (self.burst - 1) * self.interval)
+            self._next_free = max(now, self._next_free) + self.interval
+        wait = start - now
+        if wait > 0:
+            time.sleep(wait)
+        return max(0.0, wait)
+
+
+class LLMLimiter:
+    """Concurrency cap for all backends plus a RateLimiter per backend."""
+
+    def __init__(self, max_concurrency: int, rpm: Dict[str, float] | None = None, burst: int = 1):
+        self._slots = threading.BoundedSemaphore(max(1, max_concurrency))
+        self._rates = {backend: RateLimiter(r, burst) for backend, r in (rpm or {}).items() if r > 0}
+        self.max_concurrency = max(1, max_concurrency)
+
+    @classmethod
+    def from_config(cls, config: Config) -> "LLMLimiter":
+        return cls(
+            config.llm_max_concurrency,
+            rpm={"ollama": config.ollama_rpm, "groq": config.groq_rpm},
+            burst=config.llm_rate_burst,
+        )
+
+    @contextlib.contextmanager
+    def slot(self, backend: str) -> Iterator[float]:
+        """
+        Hold one request slot for `backend`; yields the seconds spent waiting
+        (for a free slot and for the rate limit).
+        """
+        t0 = time.perf_counter()
+        # Wait for the backend's rate limit before taking a slot: a request
+        # paced for Groq must not keep an Ollama request from going out.
+        rate = self._rates.get(backend)
+        if rate is not None:
+            rate.acquire()
+        with self._slots:
+            yield time.perf_counter() - t0
@@ -2,12 +2,43 @@
 Very small Ollama chat helper with graceful fallback.
 
 Primary attempt: /api/chat
-If that is not found (404), fallback to older /api/generate.
+If that is not found (404), fallback to older /api/generate. The endpoint
+that answered is remembered per base URL, so the probe happens once per
+process, not on every call.
+
+Requests go through llm_http.post(): pooled keep-alive connections and
+retries with jittered backoff. achat_with_usage() is the asyncio variant.
+
+chat_stream() is the streaming variant: it can stop reading (and so stop
+generation) as soon as the first complete JSON object has arrived.
+
+chat_with_usage() also returns token counts and Ollama's own timings
+(prompt_eval/eval durations, see llm_usage.py).
+
+`format` is passed through to Ollama's structured outputs: "json" for any
+JSON, or a JSON Schema dict (Ollama >= 0.5) to constrain the answer to it.
+
+`keep_alive` (e.g. "30m") keeps the model loaded between calls. A loaded
+model reuses the evaluated prefix of the previous prompt, so an unchanged
+system prompt is not evaluated again at every agent step.
 """
 
-from typing import List, Dict
+import json
+import time
+from typing import Any, Iterator, List, Dict, Optional, Tuple
 import requests
 
+from llm_http import post, run_blocking
+from llm_stream import StreamedChat, consume
+from llm_usage import LLMUsage
+
+
+# Generous timeout because model load can be slow on older machines.
+TIMEOUT_S = 600
+
+# base URL -> "chat" or "generate": the endpoint that answered last time
+_endpoints: Dict[str, str] = {}
+
 
 def _messages_to_prompt(messages: List[Dict[str, str]]) -> str:
     """
@@ -24,35 +55,144 @@ def _messages_to_prompt(messages: List[Dict[str, str]]) -> str:
     return "\n".join(parts)
 
 
-def chat(base_url: str, model: str, messages: List[Dict[str, str]]) -> str:
+def _post(
+    base_url: str,
+    model: str,
+    messages: List[Dict[str, str]],
+    temperature: Optional[float],
+    format: Optional[Any],
+    stream: bool,
+    keep_alive: Optional[str] = None,
+) -> requests.Response:
     """
-    Call Ollama and return assistant text.
+    POST to /api/chat, or to /api/generate when /api/chat is not found.
 
-    1) Try /api/chat (newer Ollama).
-    2) If 404, fallback to /api/generate (older Ollama).
+    Once an endpoint has answered successfully it is used directly for that
+    base URL. A 404 from a known /api/chat (e.g. unknown model) is returned
+    as-is rather than retried on /api/generate.
     """
-    url_chat = f"{base_url.rstrip('/')}/api/chat"
-    payload_chat = {"model": model, "messages": messages, "stream": False}
+    base = base_url.rstrip("/")
+    known = _endpoints.get(base)
 
-    # Generous timeout because model load can be slow on older machines.
-    timeout_seconds = 600
+    def payload(**fields: Any) -> Dict[str, Any]:
+        body = {"model": model, **fields, "stream": stream}
+        if temperature is not None:
+            body["options"] = {"temperature": temperature}
+        if format is not None:
+            body["format"] = format
+        if keep_alive:
+            body["keep_alive"] = keep_alive
+        return body
 
-    # First try /api/chat
-    resp = requests.post(url_chat, json=payload_chat, timeout=timeout_seconds)
+    if known != "generate":
+        resp = post(f"{base}/api/chat", json=payload(messages=messages), timeout=TIMEOUT_S, stream=stream)
+        if resp.status_code != 404 or known == "chat":
+            if resp.ok:
+                _endpoints[base] = "chat"
+            return resp
+        resp.close()
+        print(f"[llm_ollama] /api/chat not found on {base}; falling back to /api/generate")
 
-    if resp.status_code == 404:
-        # Fallback to /api/generate for older Ollama versions.
-        url_gen = f"{base_url.rstrip('/')}/api/generate"
-        prompt = _messages_to_prompt(messages)
-        payload_gen = {"model": model, "prompt": prompt, "stream": False}
-        resp = requests.post(url_gen, json=payload_gen, timeout=timeout_seconds)
-        resp.raise_for_status()
-        data = resp.json()
-        # Older generate API returns {"response": "..."}.
-        return data.get("response", "")
+    resp = post(
+        f"{base}/api/generate",
+        json=payload(prompt=_messages_to_prompt(messages)),
+        timeout=TIMEOUT_S,
+        stream=stream,
+    )
+    if resp.ok:
+        _endpoints[base] = "generate"
+    return resp
+
+
+def chat(
+    base_url: str,
+    model: str,
+    messages: List[Dict[str, str]],
+    temperature: Optional[float] = None,
+    format: Optional[Any] = None,
+    keep_alive: Optional[str] = None,
+) -> str:
+    """Call Ollama and return assistant text (see chat_with_usage)."""
+    return chat_with_usage(base_url, model, messages, temperature, format, keep_alive)[0]
+
+
+def chat_with_usage(
+    base_url: str,
+    model: str,
+    messages: List[Dict[str, str]],
+    temperature: Optional[float] = None,
+    format: Optional[Any] = None,
+    keep_alive: Optional[str] = None,
+) -> Tuple[str, Optional[LLMUsage]]:
+    """
+    Call Ollama and return (assistant text, token counts and timings).
 
-    # For other errors, propagate normally so the app can surface them.
+    1) Try /api/chat (newer Ollama).
+    2) If 404, fallback to /api/generate (older Ollama).
+    """
+    resp = _post(base_url, model, messages, temperature, format, stream=False, keep_alive=keep_alive)
+    # For errors, propagate normally so the app can surface them.
     resp.raise_for_status()
     data = resp.json()
-    # Newer chat API returns {"message": {"content": "..."}}
-    return data.get("message", {}).get("content", "")
\ No newline at end of file
+    # Newer chat API returns {"message": {"content": "..."}},
+    # older generate API returns {"response": "..."}.
+    text = data["message"].get("content", "") if "message" in data else data.get("response", "")
+    return text, LLMUsage.from_ollama(data)
+
+
+async def achat_with_usage(
+    base_url: str,
+    model: str,
+    messages: List[Dict[str, str]],
+    temperature: Optional[float] = None,
+    format: Optional[Any] = None,
+    keep_alive: Optional[str] = None,
+) -> Tuple[str, Optional[LLMUsage]]:
+    """chat_with_usage() for asyncio callers (runs on the llm_http thread pool)."""
+    return await run_blocking(chat_with_usage, base_url, model, messages, temperature, format, keep_alive)
+
+
+def _stream_deltas(resp: requests.Response, final: Dict[str, Any]) -> Iterator[str]:
+    """
+    Text deltas from Ollama's NDJSON stream (/api/chat or /api/generate).
+
+    The last message (done=true, with token counts and durations) is copied
+    into `final`.
+    """
+    for line in resp.iter_lines():
+        if not line:
+            continue
+        data = json.loads(line)
+        if "error" in data:
+            raise RuntimeError(f"Ollama error: {data['error']}")
+        # /api/chat: {"message": {"content": ...}}, /api/generate: {"response": ...}
+        yield data.get("message", {}).get("content") or data.get("response") or ""
+        if data.get("done"):
+            final.update(data)
+            return
+
+
+def chat_stream(
+    base_url: str,
+    model: str,
+    messages: List[Dict[str, str]],
+    temperature: Optional[float] = None,
+    stop_at_json: bool = True,
+    format: Optional[Any] = None,
+    keep_alive: Optional[str] = None,
+) -> StreamedChat:
+    """
+    Streaming version of chat().
+
+    With stop_at_json=True the response is closed as soon as the first
+    top-level JSON object is complete; Ollama then aborts the generation.
+    """
+    started = time.perf_counter()
+    resp = _post(base_url, model, messages, temperature, format, stream=True, keep_alive=keep_alive)
+
+    final: Dict[str, Any] = {}
+    with resp:
+        resp.raise_for_status()
+        result = consume(_stream_deltas(resp, final), started, stop_at_json=stop_at_json)
+    result.usage = LLMUsage.from_ollama(final)
+    return result
\ No newline at end of file
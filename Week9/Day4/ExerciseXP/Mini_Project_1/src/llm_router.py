@@ -0,0 +1,217 @@
+"""
+Latency-aware choice between the LLM backends (LLM_BACKEND=auto).
+
+Each backend keeps a moving profile: an exponentially weighted mean latency,
+its recent latencies (for a p90) and an error rate. A call goes to the
+healthy backend with the lowest expected latency; a backend without samples
+yet is tried first, so both get measured.
+
+A backend failing with a backend-side error (connection, timeout, HTTP 429
+or 5xx, malformed answer) is benched for LLM_ROUTER_COOLDOWN seconds and
+the call falls back to the next backend. Other 4xx errors (e.g. a rejected
+response format) say nothing about the backend's health: they are raised
+unchanged so the agent can react to them.
+
+With LLM_HEDGE=on, a call still running after the chosen backend's p90
+latency is also sent to the second backend, and the first answer wins. The
+slower request finishes in the background and only updates its profile.
+
+Latencies are measured around the whole call, limiter waits included: a
+rate-limited Groq or a busy Ollama shows up as slow and loses traffic.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Tuple, TypeVar
+
+import requests
+
+from config import Config
+from llm_http import submit
+
+
+# Weight of the newest sample in the moving latency / error averages
+EWMA_ALPHA = 0.3
+# Latencies kept per backend for the p90 hedging deadline
+LATENCY_WINDOW = 50
+# Samples needed before a backend's p90 is trusted for hedging
+MIN_HEDGE_SAMPLES = 5
+
+T = TypeVar("T")
+
+
+def is_backend_failure(exc: BaseException) -> bool:
+    """False for client errors (4xx other than 429), which a fallback would not fix."""
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        status = exc.response.status_code
+        return status == 429 or status >= 500
+    return True
+
+
+@dataclass
+class BackendProfile:
+    latency_s: float | None = None  # moving average
+    error_rate: float = 0.0  # moving average of failures
+    benched_until: float = 0.0  # time.monotonic() deadline of the cooldown
+    recent: Deque[float] = field(default_factory=lambda: deque(maxlen=LATENCY_WINDOW))
+
+    def record(self, seconds: float | None) -> None:
+        """One finished call: its latency, or None if it failed."""
+        failed = seconds is None
+        self.error_rate += EWMA_ALPHA * (failed - self.error_rate)
+        if failed:
+            return
+        self.recent.append(seconds)
+        self.latency_s = seconds if self.latency_s is None else self.latency_s + EWMA_ALPHA * (seconds - self.latency_s)
+
+    def expected_s(self) -> float:
+        """Latency to expect, inflated by the error rate (0.0 when unmeasured)."""
+        if self.latency_s is None:
+            return 0.0
+        return self.latency_s / max(0.1, 1.0 - self.error_rate)
+
+    def p90(self) -> float | None:
+        if len(self.recent) < MIN_HEDGE_SAMPLES:
+            return None
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(0.9 * len(ordered)))]
+
+
+@dataclass
+class RouteDecision:
+    """How one call was routed; as_log() goes into the step log."""
+
+    backend: str  # first choice
+    reason: str  # "fastest", "unmeasured", "only healthy" or "single backend"
+    winner: str | None = None  # backend whose answer was used
+    hedged_to: str | None = None
+    hedge_after_s: float | None = None
+    fallbacks: List[str] = field(default_factory=list)  # "<backend>: <error>"
+    expected_s: Dict[str, float] = field(default_factory=dict)
+
+    def as_log(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"backend": self.backend, "reason": self.reason, "winner": self.winner}
+        if self.hedged_to:
+            out["hedged_to"] = self.hedged_to
+            out["hedge_after_s"] = round(self.hedge_after_s or 0.0, 3)
+        if self.fallbacks:
+            out["fallbacks"] = self.fallbacks
+        out["expected_s"] = {b: round(s, 3) for b, s in self.expected_s.items()}
+        return out
+
+
+class LLMRouter:
+    """Shared by all agents of a process (see batch_runner.py); thread-safe."""
+
+    def __init__(self, backends: List[str], hedge: bool = False, cooldown_s: float = 30.0):
+        if not backends:
+            raise ValueError("LLMRouter needs at least one backend")
+        self.backends = list(backends)
+        self.hedge = hedge
+        self.cooldown_s = cooldown_s
+        self._profiles = {b: BackendProfile() for b in self.backends}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Config) -> "LLMRouter":
+        """Ollama, plus Groq when its GROQ_* settings are complete."""
+        backends = ["ollama"]
+        if config.groq_base_url and config.groq_model and config.groq_api_key:
+            backends.append("groq")
+        return cls(backends, hedge=config.llm_hedge == "on", cooldown_s=config.llm_router_cooldown_s)
+
+    def rank(self) -> Tuple[List[str], str]:
+        """Backends in the order to try them, and why the first one leads."""
+        now = time.monotonic()
+        with self._lock:
+            healthy = [b for b in self.backends if self._profiles[b].benched_until <= now]
+            benched = sorted(
+                (b for b in self.backends if b not in healthy), key=lambda b: self._profiles[b].benched_until
+            )
+            # sorted() is stable: ties keep the configured order
+            healthy.sort(key=lambda b: self._profiles[b].expected_s())
+            if len(self.backends) == 1:
+                reason = "single backend"
+            elif len(healthy) <= 1:
+                reason = "only healthy"
+            elif self._profiles[healthy[0]].latency_s is None:
+                reason = "unmeasured"
+            else:
+                reason = "fastest"
+        return healthy + benched, reason
+
+    def _timed(self, fn: Callable[[str], T], backend: str) -> T:
+        t0 = time.perf_counter()
+        try:
+            result = fn(backend)
+        except Exception as e:
+            if is_backend_failure(e):
+                with self._lock:
+                    self._profiles[backend].record(None)
+                    self._profiles[backend].benched_until = time.monotonic() + self.cooldown_s
+            raise
+        with self._lock:
+            self._profiles[backend].record(time.perf_counter() - t0)
+        return result
+
+    def _run(self, fn: Callable[[str], T], backend: str, hedge_to: str | None, decision: RouteDecision) -> T:
+        """Call backend; past its p90, race it against hedge_to."""
+        with self._lock:
+            deadline = self._profiles[backend].p90() if hedge_to else None
+        if deadline is None:
+            result = self._timed(fn, backend)
+            decision.winner = backend
+            return result
+
+        # Both requests run on the LLM clients' shared pool (llm_http.submit)
+        futures = {submit(self._timed, fn, backend): backend}
+        done, _ = concurrent.futures.wait(futures, timeout=deadline)
+        if not done:
+            decision.hedged_to, decision.hedge_after_s = hedge_to, deadline
+            futures[submit(self._timed, fn, hedge_to)] = hedge_to  # type: ignore[index]
+
+        pending = set(futures)
+        error: BaseException | None = None
+        while pending:
+            done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    decision.winner = futures[future]
+                    return future.result()
+                error = future.exception()
+        raise error  # type: ignore[misc]
+
+    def call(self, fn: Callable[[str], T]) -> Tuple[T, RouteDecision]:
+        """
+        Run fn(backend) on the best backend, with hedging and fallback.
+
+        Raises the last error if every backend failed, or a client error
+        (see is_backend_failure) as soon as it happens.
+        """
+        order, reason = self.rank()
+        with self._lock:
+            expected = {b: self._profiles[b].expected_s() for b in self.backends}
+        decision = RouteDecision(backend=order[0], reason=reason, expected_s=expected)
+
+        tried: List[str] = []
+        last: BaseException | None = None
+        for backend in order:
+            if backend in tried:
+                continue
+            hedge_to = next((b for b in order if b != backend and b not in tried), None) if self.hedge else None
+            try:
+                return self._run(fn, backend, hedge_to, decision), decision
+            except Exception as e:
+                if not is_backend_failure(e):
+                    raise
+                last = e
+                tried.append(backend)
+                if decision.hedged_to:
+                    tried.append(decision.hedged_to)
+                decision.fallbacks.append(f"{backend}: {e!r}"[:200])
+        raise last  # type: ignore[misc]
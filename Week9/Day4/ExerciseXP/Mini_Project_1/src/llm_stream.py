@@ -0,0 +1,168 @@
+"""
+Helpers for streaming LLM responses.
+
+Small local models often keep talking after the JSON plan ("Here is my
+reasoning..."). When streaming, JsonObjectScanner spots the end of the first
+complete top-level {...} object as tokens arrive, so the caller can close the
+connection (which makes Ollama stop generating) instead of waiting for the
+model to finish on its own.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import dataclass
+from typing import Iterator, List
+
+from llm_usage import LLMUsage
+
+
+class JsonObjectScanner:
+    """
+    Incremental, string-aware brace matcher.
+
+    feed() text chunks in order; it returns the text of the first complete
+    top-level JSON object once its closing brace arrives (None until then).
+    Braces inside string literals, including escaped quotes, are ignored.
+    A balanced {...} that is not valid JSON (e.g. "{step one}" in chatter
+    before the plan) is skipped and the scan resumes at the next '{'.
+    """
+
+    def __init__(self) -> None:
+        self._buf = ""
+        self._pos = 0  # next character to scan
+        self._start = -1  # '{' of the current candidate, -1 = none yet
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self.result: str | None = None
+
+    def feed(self, chunk: str) -> str | None:
+        if self.result is not None:
+            return self.result
+        self._buf += chunk
+
+        while True:
+            if self._start < 0:
+                self._start = self._buf.find("{", self._pos)
+                if self._start < 0:
+                    self._pos = len(self._buf)
+                    return None
+                self._pos = self._start
+                self._depth = 0
+                self._in_string = False
+                self._escape = False
+
+            end = self._scan()
+            if end is None:
+                return None
+            candidate = self._buf[self._start : end]
+            try:
+                ok = isinstance(json.loads(candidate, strict=False), dict)
+            except json.JSONDecodeError:
+                ok = False
+            if ok:
+                self.result = candidate
+                return candidate
+            # Not JSON: try again from the next '{' after this one
+            self._pos = self._start + 1
+            self._start = -1
+
+    def _scan(self) -> int | None:
+        """Advance over the buffer; index just past the closing brace, or None."""
+        buf = self._buf
+        for i in range(self._pos, len(buf)):
+            ch = buf[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._pos = i + 1
+                    return i + 1
+        self._pos = len(buf)
+        return None
+
+
+@dataclass
+class StreamedChat:
+    """Text of a streamed response plus when things happened (seconds from request)."""
+
+    text: str
+    object_complete: bool
+    stopped_early: bool
+    first_token_s: float | None
+    object_s: float | None
+    total_s: float
+    # Tokens / server timings from the final stream message (None if the
+    # stream was closed before it arrived)
+    usage: LLMUsage | None = None
+
+    @property
+    def saved_s(self) -> float | None:
+        """
+        Generation time after the JSON object was complete, i.e. what early
+        stop saves. Only known when the stream ran to the end
+        (LLM_STREAM=measure); None after an early stop, since the rest of
+        the answer was never generated.
+        """
+        if self.stopped_early or self.object_s is None:
+            return None
+        return self.total_s - self.object_s
+
+    def as_log(self) -> dict:
+        return {
+            "first_token_s": None if self.first_token_s is None else round(self.first_token_s, 3),
+            "object_s": None if self.object_s is None else round(self.object_s, 3),
+            "total_s": round(self.total_s, 3),
+            "stopped_early": self.stopped_early,
+            "saved_s": None if self.saved_s is None else round(self.saved_s, 3),
+        }
+
+
+def consume(deltas: Iterator[str], started_at: float, stop_at_json: bool = True) -> StreamedChat:
+    """
+    Read text deltas until the first JSON object is complete (stop_at_json)
+    or the stream ends.
+
+    started_at is the time.perf_counter() value when the request was sent.
+    The caller is responsible for closing the underlying HTTP response.
+    """
+    scanner = JsonObjectScanner()
+    parts: List[str] = []
+    first_token_s = None
+    object_s = None
+    stopped_early = False
+
+    for delta in deltas:
+        if not delta:
+            continue
+        if first_token_s is None:
+            first_token_s = time.perf_counter() - started_at
+        parts.append(delta)
+        if object_s is None and scanner.feed(delta) is not None:
+            object_s = time.perf_counter() - started_at
+            if stop_at_json:
+                stopped_early = True
+                break
+
+    total_s = time.perf_counter() - started_at
+    text = scanner.result if stopped_early else "".join(parts)
+    return StreamedChat(
+        text=text,
+        object_complete=scanner.result is not None,
+        stopped_early=stopped_early,
+        first_token_s=first_token_s,
+        object_s=object_s,
+        total_s=total_s,
+    )
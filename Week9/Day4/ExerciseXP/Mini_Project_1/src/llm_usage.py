@@ -0,0 +1,78 @@
+"""
+Token counts and server-side timings reported by the LLM backends.
+
+Ollama (final /api/chat or /api/generate object, durations in ns):
+    prompt_eval_count, eval_count, prompt_eval_duration, eval_duration,
+    load_duration, total_duration
+Groq (OpenAI-style "usage", seconds; in streams under x_groq.usage):
+    prompt_tokens, completion_tokens, prompt_time, completion_time,
+    queue_time, total_time
+
+Both map onto LLMUsage so step logs and run totals read the same whichever
+backend answered. A stream that was closed early (LLM_STREAM=on) never gets
+the final object, so its usage is None.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, fields
+from typing import Any, Dict, Iterable
+
+
+@dataclass
+class LLMUsage:
+    prompt_tokens: int | None = None
+    completion_tokens: int | None = None
+    # Seconds, as measured by the backend
+    prompt_eval_s: float | None = None  # reading the prompt
+    eval_s: float | None = None  # generating the answer
+    load_s: float | None = None  # loading the model (Ollama) / queueing (Groq)
+    backend_total_s: float | None = None
+
+    @classmethod
+    def from_ollama(cls, data: Dict[str, Any]) -> "LLMUsage | None":
+        if "eval_count" not in data and "prompt_eval_count" not in data:
+            return None
+
+        def secs(key: str) -> float | None:
+            return data[key] / 1e9 if data.get(key) is not None else None
+
+        return cls(
+            prompt_tokens=data.get("prompt_eval_count"),
+            completion_tokens=data.get("eval_count"),
+            prompt_eval_s=secs("prompt_eval_duration"),
+            eval_s=secs("eval_duration"),
+            load_s=secs("load_duration"),
+            backend_total_s=secs("total_duration"),
+        )
+
+    @classmethod
+    def from_groq(cls, usage: Dict[str, Any] | None) -> "LLMUsage | None":
+        if not usage:
+            return None
+        return cls(
+            prompt_tokens=usage.get("prompt_tokens"),
+            completion_tokens=usage.get("completion_tokens"),
+            prompt_eval_s=usage.get("prompt_time"),
+            eval_s=usage.get("completion_time"),
+            load_s=usage.get("queue_time"),
+            backend_total_s=usage.get("total_time"),
+        )
+
+    def as_log(self) -> Dict[str, Any]:
+        return {
+            f.name: round(v, 3) if isinstance(v, float) else v
+            for f in fields(self)
+            if (v := getattr(self, f.name)) is not None
+        }
+
+
+def sum_usage(usages: Iterable[LLMUsage | None]) -> Dict[str, Any]:
+    """Field-wise totals over the calls that reported usage."""
+    totals: Dict[str, Any] = {}
+    for usage in usages:
+        if usage is None:
+            continue
+        for key, value in usage.as_log().items():
+            totals[key] = round(totals.get(key, 0) + value, 3)
+    return totals
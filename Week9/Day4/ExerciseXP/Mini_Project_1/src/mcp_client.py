@@ -2,33 +2,61 @@
 Thin MCP client wrapper.
 
 - Starts each MCP server over stdio using commands from Config.
-- Calls a given tool with arguments.
-- Uses the official MCP client pattern (async with ClientSession).
+- Keeps one initialized session per server alive (see mcp_pool.py), so only
+  the first call to a server pays for process spawn + handshake.
+- Calls a given tool with arguments and reports spawn/handshake/call timings.
+- Runs all MCP I/O on one asyncio loop in a background thread. Sync callers
+  (agent, Streamlit) get blocking calls or futures; async callers await
+  call_tool_async() directly.
+- With MCP_GATEWAY=on, every call goes through a single session to the
+  gateway server (mcp_gateway.py), which hosts all three servers; callers
+  keep using the logical server and tool names.
 """
 
 from __future__ import annotations
 
 import asyncio
+import concurrent.futures
 import logging
+import os
 import shlex
-from dataclasses import dataclass
-from typing import Any, Dict
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Awaitable, Dict, TypeVar
 
-import mcp
-from mcp.client.stdio import stdio_client, StdioServerParameters
-from mcp.types import CallToolResult
+from mcp.client.stdio import StdioServerParameters
+from mcp.types import CallToolResult, Tool
 
 from config import Config
+from mcp_pool import MCPSessionPool, is_transport_error
+
+
+T = TypeVar("T")
+
+# Pool name of the gateway session, and how it namespaces tool names
+GATEWAY_SERVER = "gateway"
+GATEWAY_SEP = "__"
+
+
+def gateway_tool_name(server: str, tool: str) -> str:
+    """Name of `tool` of `server` on the gateway, e.g. "filesystem__write_file"."""
+    return f"{server}{GATEWAY_SEP}{tool}"
 
 
 @dataclass
 class MCPToolCallResult:
     """
     Normalized result of a tool call, used by the agent and UI.
+
+    timings holds seconds spent in each phase: "spawn" and "handshake" are 0.0
+    when a pooled session was reused, "call" covers the tool round trip.
     """
     success: bool
     text: str | None
     error: str | None
+    timings: Dict[str, float] = field(default_factory=dict)
 
 
 class MCPClient:
@@ -38,13 +66,53 @@ class MCPClient:
     It knows how to:
     - Map logical server names ("fetch", "filesystem", "kb_metadata")
       to command lines from Config.
-    - Start the server via stdio.
+    - Start the server via stdio (once; sessions are pooled).
     - Call a tool with JSON arguments.
+
+    All sessions live on a single event loop running in a daemon thread for
+    the lifetime of the client. Call close() (or use the client as a context
+    manager) to shut down the pooled server processes and the loop.
     """
 
     def __init__(self, config: Config, logger: logging.Logger | None = None):
         self.config = config
         self.log = logger or logging.getLogger(__name__)
+        self._gateway = config.mcp_gateway == "on"
+        self._pool = MCPSessionPool(
+            self._server_params_for,
+            idle_timeout=config.mcp_idle_timeout_s,
+            logger=self.log,
+        )
+        self._server_slots: Dict[str, asyncio.Semaphore] = {}
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._run_loop, name="mcp-client-loop", daemon=True
+        )
+        self._thread.start()
+        self._reaper = self.submit(self._reap_idle_forever())
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The event loop that owns every MCP session of this client."""
+        return self._loop
+
+    def submit(self, coro: Awaitable[T]) -> concurrent.futures.Future[T]:
+        """Schedule a coroutine on the client loop from any thread."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    async def _reap_idle_forever(self) -> None:
+        """Close idle sessions even when no calls are coming in."""
+        interval = max(1.0, min(30.0, self.config.mcp_idle_timeout_s / 2))
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self._pool.reap_idle()
+            except Exception:
+                self.log.warning("Error while closing idle MCP sessions", exc_info=True)
 
     def _server_params_for(self, server: str) -> StdioServerParameters:
         """
@@ -61,6 +129,8 @@ class MCPClient:
             cmdline = self.config.filesystem_cmd
         elif server == "kb_metadata":
             cmdline = self.config.kb_metadata_cmd
+        elif server == GATEWAY_SERVER:
+            cmdline = self.config.mcp_gateway_cmd
         else:
             raise ValueError(f"Unknown MCP server name: {server}")
 
@@ -74,8 +144,34 @@ class MCPClient:
         # Helpful debug when servers start
         print(f"[mcp_client] Starting MCP server '{server}' with command: {command} {args}")
 
+        if server == GATEWAY_SERVER:
+            # The gateway builds its own Config (child commands, KB paths) from
+            # the environment; stdio_client only passes a minimal one by default.
+            return StdioServerParameters(command=command, args=args, env=dict(os.environ))
         return StdioServerParameters(command=command, args=args)
 
+    def _route(self, server: str, tool_name: str) -> tuple[str, str]:
+        """Pooled session and tool name that serve server.tool_name."""
+        if self._gateway:
+            return GATEWAY_SERVER, gateway_tool_name(server, tool_name)
+        return server, tool_name
+
+    async def _list_tools(self, server: str) -> list[Tool]:
+        pooled, _ = await self._pool.acquire(server)
+        catalog = await self._pool.catalog_for(pooled)
+        pooled.last_used = time.monotonic()
+        return list(catalog.tools.values())
+
+    async def list_tools_async(self, server: str) -> list[Tool]:
+        """
+        Tools of `server` (starting it if needed), as reported by the server
+        itself; used by the gateway to re-export its children's tools.
+        """
+        coro = self._list_tools(server)
+        if asyncio.get_running_loop() is self._loop:
+            return await coro
+        return await asyncio.wrap_future(self.submit(coro))
+
     async def _async_call_tool(
         self,
         server: str,
@@ -83,61 +179,105 @@ class MCPClient:
         arguments: Dict[str, Any],
     ) -> MCPToolCallResult:
         """
-        Async part: start server, call tool, capture output.
+        Async part: validate against the cached catalog, get a pooled
+        session, call tool, capture output.
 
-        Follows the official MCP stdio client pattern:
-            async with stdio_client(params) as (read, write):
-                async with ClientSession(read, write) as session:
-                    await session.initialize()
-                    ...
+        If the server process died (crash, killed), the call is retried once
+        on a freshly started session.
         """
-        params = self._server_params_for(server)
-
-        async with stdio_client(params) as (read, write):
-            # Official pattern: use ClientSession as an async context manager
-            async with mcp.ClientSession(read, write) as session:
-                print(f"[mcp_client] Initializing MCP session for server '{server}'")
-                await session.initialize()
-                print(f"[mcp_client] MCP session initialized for server '{server}'")
+        target, target_tool = self._route(server, tool_name)
 
-                # List tools and ensure the requested tool exists
-                tools = await session.list_tools()
-                tool_names = [t.name for t in tools.tools]
-                print(f"[mcp_client] Tools on server '{server}': {tool_names}")
+        # Fast path: reject unknown tools / bad arguments from the cached
+        # catalog without touching (or spawning) the server.
+        known = self._pool.known_catalog(target)
+        if known is not None:
+            problem = known.validate(target_tool, arguments)
+            if problem:
+                return MCPToolCallResult(success=False, text=None, error=problem)
 
-                if tool_name not in tool_names:
+        for attempt in (1, 2):
+            pooled, started = await self._pool.acquire(target)
+            timings = {
+                "spawn": pooled.timings.spawn_s if started else 0.0,
+                "handshake": pooled.timings.handshake_s if started else 0.0,
+            }
+            session = pooled.session
+            try:
+                # Tool list is cached per session (refreshed on list_changed / reconnect)
+                catalog = await self._pool.catalog_for(pooled)
+                problem = catalog.validate(target_tool, arguments)
+                if problem:
                     return MCPToolCallResult(
                         success=False,
                         text=None,
-                        error=f"Tool '{tool_name}' not found on server '{server}'. Available: {tool_names}",
+                        error=problem,
+                        timings=timings,
                     )
 
                 print(f"[mcp_client] Calling tool '{tool_name}' on server '{server}' with args={arguments!r}")
-                result: CallToolResult = await session.call_tool(tool_name, arguments)
-                print(f"[mcp_client] Tool '{tool_name}' call completed on server '{server}'")
+                t0 = time.perf_counter()
+                result: CallToolResult = await pooled.request(
+                    session.call_tool(
+                        target_tool,
+                        arguments,
+                        read_timeout_seconds=timedelta(seconds=self.config.mcp_call_timeout_s),
+                    )
+                )
+                timings["call"] = time.perf_counter() - t0
+            except Exception as exc:
+                if not is_transport_error(exc):
+                    raise
+                await self._pool.discard(target, pooled)
+                if attempt == 2:
+                    raise
+                self.log.warning(f"MCP server '{target}' connection lost ({exc!r}); restarting and retrying.")
+                continue
+            finally:
+                pooled.last_used = time.monotonic()
 
-                # Extract plain text from the result content
-                text_chunks: list[str] = []
-                for item in result.content or []:
-                    val = getattr(item, "text", None)
-                    if isinstance(val, str):
-                        text_chunks.append(val)
+            print(
+                f"[mcp_client] Tool '{tool_name}' call completed on server '{server}' "
+                f"(spawn={timings['spawn']:.3f}s handshake={timings['handshake']:.3f}s call={timings['call']:.3f}s)"
+            )
 
-                print(f"[mcp_client] Closing MCP session for server '{server}'")
+            # Extract plain text from the result content
+            text_chunks: list[str] = []
+            for item in result.content or []:
+                val = getattr(item, "text", None)
+                if isinstance(val, str):
+                    text_chunks.append(val)
 
-        # async with blocks handle closing session and transport
-        text = "\n".join(text_chunks) if text_chunks else None
-        return MCPToolCallResult(success=True, text=text, error=None)
+            text = "\n".join(text_chunks) if text_chunks else None
+            if result.isError:
+                # The tool ran but reported a failure (e.g. write_file on a bad path)
+                return MCPToolCallResult(
+                    success=False,
+                    text=None,
+                    error=text or f"Tool '{tool_name}' reported an error",
+                    timings=timings,
+                )
+            return MCPToolCallResult(success=True, text=text, error=None, timings=timings)
 
-    def call_tool(self, server: str, tool_name: str, arguments: Dict[str, Any]) -> MCPToolCallResult:
-        """
-        Synchronous wrapper used by the agent.
+        raise AssertionError("unreachable")
 
-        It runs the async call and catches any unexpected exceptions so that
-        the agent can log them instead of crashing.
+    async def _safe_call_tool(
+        self,
+        server: str,
+        tool_name: str,
+        arguments: Dict[str, Any],
+    ) -> MCPToolCallResult:
         """
+        Runs on the client loop. Limits in-flight calls per server to
+        config.mcp_server_concurrency and catches any unexpected exceptions
+        so that the agent can log them instead of crashing.
+        """
+        slots = self._server_slots.get(server)
+        if slots is None:
+            slots = asyncio.Semaphore(max(1, self.config.mcp_server_concurrency))
+            self._server_slots[server] = slots
         try:
-            return asyncio.run(self._async_call_tool(server, tool_name, arguments))
+            async with slots:
+                return await self._async_call_tool(server, tool_name, arguments)
         except Exception as exc:
             if self.log:
                 self.log.error(
@@ -148,4 +288,54 @@ class MCPClient:
                 success=False,
                 text=None,
                 error=str(exc),
-            )
\ No newline at end of file
+            )
+
+    def call_tool_future(
+        self, server: str, tool_name: str, arguments: Dict[str, Any]
+    ) -> concurrent.futures.Future[MCPToolCallResult]:
+        """Start a tool call and return immediately with a future for its result."""
+        return self.submit(self._safe_call_tool(server, tool_name, arguments))
+
+    def call_tool(self, server: str, tool_name: str, arguments: Dict[str, Any]) -> MCPToolCallResult:
+        """
+        Synchronous wrapper used by the agent.
+
+        Blocks until the call finishes on the client loop. Never raises for
+        tool/server errors; they come back as success=False.
+        """
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("call_tool() would deadlock on the client loop; use call_tool_async()")
+        return self.call_tool_future(server, tool_name, arguments).result()
+
+    async def call_tool_async(
+        self, server: str, tool_name: str, arguments: Dict[str, Any]
+    ) -> MCPToolCallResult:
+        """
+        Async API. Coroutines already running on the client loop (see `loop`)
+        call straight into the session; other loops are bridged with a future.
+        """
+        coro = self._safe_call_tool(server, tool_name, arguments)
+        if asyncio.get_running_loop() is self._loop:
+            return await coro
+        return await asyncio.wrap_future(self.submit(coro))
+
+    def close(self) -> None:
+        """Shut down all pooled MCP server processes and stop the client loop."""
+        if self._loop.is_closed():
+            return
+        if self._loop.is_running():
+            self._reaper.cancel()
+            try:
+                self.submit(self._pool.close_all()).result(timeout=30)
+            except Exception:
+                self.log.warning("Error while closing MCP sessions", exc_info=True)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+        if not self._loop.is_running():
+            self._loop.close()
+
+    def __enter__(self) -> "MCPClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
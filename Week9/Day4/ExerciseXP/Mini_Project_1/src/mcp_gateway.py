@@ -0,0 +1,124 @@
+"""
+MCP gateway: one stdio server in front of fetch, filesystem and kb_metadata.
+
+Without it the agent holds three sessions to three different runtimes (uvx,
+npx, Python), each with its own process start and handshake. The gateway
+re-exports every child tool under a namespaced name,
+
+    fetch__fetch, filesystem__write_file, kb_metadata__add_metadata, ...
+
+with the child's description and input schema, and forwards calls through an
+MCPClient:
+
+- All children are started concurrently as soon as the gateway runs, and
+  are never closed for being idle.
+- Calls are handled concurrently, with up to MCP_SERVER_CONCURRENCY calls in
+  flight per child. A crashed child is restarted on its next call.
+
+With MCP_GATEWAY=on the agent's MCPClient opens a single session to this
+process. The cold starts of the three servers overlap and are paid once per
+gateway, not on the first call to each server.
+
+Usage (normally spawned by MCPClient via MCP_GATEWAY_CMD, from the project root):
+    python src/mcp_gateway.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import sys
+from io import TextIOWrapper
+from typing import Any, Dict, List
+
+import anyio
+from mcp import types
+from mcp.server.lowlevel import Server
+from mcp.server.stdio import stdio_server
+
+from config import Config, get_config
+from mcp_client import GATEWAY_SEP, MCPClient, gateway_tool_name
+
+
+CHILD_SERVERS = ("fetch", "filesystem", "kb_metadata")
+
+
+def _log(msg: str) -> None:
+    # stdout carries the MCP protocol
+    print(f"[mcp_gateway] {msg}", file=sys.stderr, flush=True)
+
+
+def _error(text: str) -> types.CallToolResult:
+    return types.CallToolResult(content=[types.TextContent(type="text", text=text)], isError=True)
+
+
+def build_server(client: MCPClient) -> Server:
+    """Low-level MCP server whose tools are the children's, namespaced."""
+    server: Server = Server("mcp_gateway")
+
+    @server.list_tools()
+    async def list_tools() -> List[types.Tool]:
+        # Catalogs are cached per child session; this only waits for
+        # children that are still starting (or restarting).
+        listed = await asyncio.gather(
+            *(client.list_tools_async(name) for name in CHILD_SERVERS), return_exceptions=True
+        )
+        tools: List[types.Tool] = []
+        for name, child_tools in zip(CHILD_SERVERS, listed):
+            if isinstance(child_tools, BaseException):
+                _log(f"Child '{name}' unavailable: {child_tools!r}")
+                continue
+            for tool in child_tools:
+                tools.append(
+                    tool.model_copy(
+                        update={
+                            "name": gateway_tool_name(name, tool.name),
+                            "description": f"[{name}] {tool.description or ''}".strip(),
+                            # Results are forwarded as text only
+                            "outputSchema": None,
+                        }
+                    )
+                )
+        return tools
+
+    # Arguments are validated by MCPClient against the child's own catalog
+    @server.call_tool(validate_input=False)
+    async def call_tool(name: str, arguments: Dict[str, Any]) -> types.CallToolResult:
+        child, sep, tool = name.partition(GATEWAY_SEP)
+        if not sep or child not in CHILD_SERVERS:
+            return _error(f"Unknown gateway tool '{name}'; expected '<server>{GATEWAY_SEP}<tool>'")
+        result = await client.call_tool_async(child, tool, arguments)
+        if not result.success:
+            return _error(result.error or f"Tool '{tool}' on '{child}' failed")
+        return types.CallToolResult(content=[types.TextContent(type="text", text=result.text or "")])
+
+    return server
+
+
+async def serve(config: Config) -> None:
+    protocol_out = anyio.wrap_file(TextIOWrapper(sys.stdout.buffer, encoding="utf-8"))
+    # MCPClient and the session pool report progress with print(); keep it
+    # off the protocol stream.
+    sys.stdout = sys.stderr
+
+    # Children stay up for the gateway's lifetime and never talk to a
+    # gateway themselves.
+    child_config = dataclasses.replace(config, mcp_gateway="off", mcp_idle_timeout_s=float("inf"))
+    with MCPClient(child_config) as client:
+        server = build_server(client)
+        warmup = asyncio.gather(
+            *(client.list_tools_async(name) for name in CHILD_SERVERS), return_exceptions=True
+        )
+        async with stdio_server(stdout=protocol_out) as (read, write):
+            await server.run(read, write, server.create_initialization_options())
+        warmup.cancel()
+
+
+def main() -> None:
+    config = get_config()
+    _log(f"Starting; children: {', '.join(CHILD_SERVERS)}")
+    asyncio.run(serve(config))
+
+
+if __name__ == "__main__":
+    main()
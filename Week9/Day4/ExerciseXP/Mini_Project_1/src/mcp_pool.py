@@ -0,0 +1,296 @@
+"""
+Pool of long-lived MCP stdio sessions, one per logical server.
+
+- Each server process is spawned and initialized once, then reused for
+  every tool call instead of paying spawn + handshake per call.
+- A session whose process died is dropped and restarted on next use.
+- Sessions idle for longer than `idle_timeout` seconds are closed.
+- Requests go through PooledSession.request(), which fails fast (and lets
+  the caller retry on a restarted session) if the process exits mid-call.
+- Each session caches its tool catalog (tools/list) until the server sends
+  notifications/tools/list_changed or the session is replaced.
+
+Every session is owned by a dedicated asyncio task: the stdio transport and
+ClientSession are anyio context managers that must be entered and exited from
+the same task, so the owner task opens them, parks until asked to stop, and
+closes them itself. Other tasks only send requests through the session.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, TypeVar
+
+import anyio
+import mcp
+from mcp import types
+from mcp.client.stdio import stdio_client, StdioServerParameters
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED
+
+from tool_catalog import ToolCatalog
+
+T = TypeVar("T")
+
+# Errors meaning "the server process/transport is gone", as opposed to a tool error.
+_TRANSPORT_ERRORS = (
+    anyio.ClosedResourceError,
+    anyio.BrokenResourceError,
+    anyio.EndOfStream,
+    BrokenPipeError,
+    ConnectionResetError,
+)
+
+
+def is_transport_error(exc: BaseException) -> bool:
+    """True if `exc` means the session is unusable and should be restarted."""
+    if isinstance(exc, _TRANSPORT_ERRORS):
+        return True
+    if isinstance(exc, McpError):
+        return exc.error.code == CONNECTION_CLOSED
+    return False
+
+
+@dataclass
+class SessionStartTimings:
+    """How long it took to bring a session up (0.0 when it was reused)."""
+
+    spawn_s: float = 0.0
+    handshake_s: float = 0.0
+
+
+@dataclass
+class PooledSession:
+    """One initialized ClientSession plus the task that keeps it open."""
+
+    server: str
+    params: StdioServerParameters
+    session: mcp.ClientSession | None = None
+    last_used: float = field(default_factory=time.monotonic)
+    timings: SessionStartTimings = field(default_factory=SessionStartTimings)
+    error: BaseException | None = None
+    catalog: ToolCatalog | None = None
+    on_tools_changed: Callable[[str], None] | None = field(default=None, repr=False)
+    _task: asyncio.Task | None = field(default=None, init=False, repr=False)
+    _ready: asyncio.Event = field(default_factory=asyncio.Event, init=False, repr=False)
+    _stop: asyncio.Event = field(default_factory=asyncio.Event, init=False, repr=False)
+
+    @property
+    def alive(self) -> bool:
+        return (
+            self.session is not None
+            and self._task is not None
+            and not self._task.done()
+            and not self._stop.is_set()
+        )
+
+    async def start(self) -> None:
+        """Spawn the server and run the initialize handshake."""
+        self._task = asyncio.get_running_loop().create_task(
+            self._run(), name=f"mcp-session-{self.server}"
+        )
+        await self._ready.wait()
+        if self.session is None:
+            raise RuntimeError(
+                f"MCP server '{self.server}' failed to start: {self.error!r}"
+            ) from self.error
+
+    async def _run(self) -> None:
+        try:
+            t0 = time.perf_counter()
+            async with stdio_client(self.params) as (read, write):
+                self.timings.spawn_s = time.perf_counter() - t0
+                # Relay the server's output so we notice when it ends (process exit)
+                relay_send, relay_recv = anyio.create_memory_object_stream(0)
+                async with anyio.create_task_group() as tg:
+                    tg.start_soon(self._relay, read, relay_send)
+                    async with mcp.ClientSession(
+                        relay_recv, write, message_handler=self._on_message
+                    ) as session:
+                        t1 = time.perf_counter()
+                        await session.initialize()
+                        self.timings.handshake_s = time.perf_counter() - t1
+                        self.session = session
+                        self._ready.set()
+                        await self._stop.wait()
+                    tg.cancel_scope.cancel()
+        except Exception as exc:
+            # Process crashed or failed to start; the pool restarts it on next use.
+            self.error = exc
+        finally:
+            self.session = None
+            self._stop.set()
+            self._ready.set()
+
+    async def _relay(self, read, send) -> None:
+        async with send:
+            async for message in read:
+                await send.send(message)
+        if not self._stop.is_set():
+            self.error = ConnectionResetError(f"MCP server '{self.server}' closed its output")
+            self._stop.set()
+
+    async def _on_message(self, message) -> None:
+        if isinstance(message, types.ServerNotification) and isinstance(
+            message.root, types.ToolListChangedNotification
+        ):
+            print(f"[mcp_pool] Tool list changed on server '{self.server}'; dropping cached catalog")
+            self.catalog = None
+            if self.on_tools_changed is not None:
+                self.on_tools_changed(self.server)
+
+    async def tool_catalog(self) -> ToolCatalog:
+        """The server's tools and input schemas, fetched once per session."""
+        catalog = self.catalog
+        if catalog is not None:
+            return catalog
+
+        tools: list[types.Tool] = []
+        result = await self.request(self.session.list_tools())
+        tools.extend(result.tools)
+        while result.nextCursor:
+            result = await self.request(self.session.list_tools(result.nextCursor))
+            tools.extend(result.tools)
+
+        catalog = ToolCatalog.from_tools(self.server, tools)
+        print(f"[mcp_pool] Tools on server '{self.server}': {catalog.names}")
+        self.catalog = catalog
+        return catalog
+
+    async def request(self, coro: Awaitable[T]) -> T:
+        """
+        Await a request on this session, failing fast if the server goes away.
+
+        Without this, a request written just as the process dies would wait
+        for a response that can never arrive.
+        """
+        call = asyncio.ensure_future(coro)
+        stopped = asyncio.ensure_future(self._stop.wait())
+        try:
+            await asyncio.wait({call, stopped}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            stopped.cancel()
+        if call.done():
+            return call.result()
+        call.cancel()
+        await asyncio.gather(call, return_exceptions=True)
+        raise ConnectionResetError(f"MCP server '{self.server}' connection lost")
+
+    async def close(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(self._task), timeout)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+class MCPSessionPool:
+    """
+    Keeps one initialized session per logical server name.
+
+    `params_for(server)` builds the StdioServerParameters (MCPClient already
+    knows how to map names like "fetch" to command lines).
+    """
+
+    def __init__(
+        self,
+        params_for: Callable[[str], StdioServerParameters],
+        idle_timeout: float = 300.0,
+        logger: logging.Logger | None = None,
+    ):
+        self._params_for = params_for
+        self.idle_timeout = idle_timeout
+        self.log = logger or logging.getLogger(__name__)
+        self._sessions: Dict[str, PooledSession] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        # Last catalog seen per server; kept after an idle close so bad calls
+        # can still be rejected without respawning the server. A crashed
+        # server may come back with different tools: its catalog is dropped.
+        self._catalogs: Dict[str, ToolCatalog] = {}
+
+    async def acquire(self, server: str) -> tuple[PooledSession, bool]:
+        """
+        Return a live session for `server`, starting (or restarting) it if needed.
+
+        The bool is True if a new process was spawned for this call.
+        """
+        lock = self._locks.setdefault(server, asyncio.Lock())
+        async with lock:
+            pooled = self._sessions.get(server)
+            if pooled is not None and pooled.alive:
+                pooled.last_used = time.monotonic()
+                return pooled, False
+
+            if pooled is not None:
+                self.log.warning(
+                    f"MCP server '{server}' is no longer running "
+                    f"(last error: {pooled.error!r}); restarting it."
+                )
+                self._forget_catalog(server)
+                await pooled.close()
+
+            pooled = PooledSession(
+                server=server,
+                params=self._params_for(server),
+                on_tools_changed=self._forget_catalog,
+            )
+            try:
+                await pooled.start()
+            except Exception:
+                self._sessions.pop(server, None)
+                raise
+            print(
+                f"[mcp_pool] Started MCP server '{server}' "
+                f"(spawn={pooled.timings.spawn_s:.3f}s handshake={pooled.timings.handshake_s:.3f}s)"
+            )
+            self._sessions[server] = pooled
+            return pooled, True
+
+    def _forget_catalog(self, server: str) -> None:
+        self._catalogs.pop(server, None)
+
+    def known_catalog(self, server: str) -> ToolCatalog | None:
+        """Most recent tool catalog for `server`, if any (no I/O)."""
+        return self._catalogs.get(server)
+
+    async def catalog_for(self, pooled: PooledSession) -> ToolCatalog:
+        """Catalog of a live session; also refreshes the last-known catalog."""
+        catalog = await pooled.tool_catalog()
+        self._catalogs[pooled.server] = catalog
+        return catalog
+
+    async def discard(
+        self, server: str, pooled: PooledSession | None = None, forget_catalog: bool = True
+    ) -> None:
+        """
+        Close and forget the session for `server` (e.g. after a transport error).
+
+        If `pooled` is given, only discard it if it is still the current session,
+        so a caller holding a stale session cannot close a fresh restart.
+        With forget_catalog=False the last-known catalog is kept (idle closes).
+        """
+        current = self._sessions.get(server)
+        if current is None or (pooled is not None and current is not pooled):
+            return
+        del self._sessions[server]
+        if forget_catalog:
+            self._forget_catalog(server)
+        await current.close()
+
+    async def reap_idle(self) -> None:
+        """Close sessions that have not been used for `idle_timeout` seconds."""
+        now = time.monotonic()
+        for server, pooled in list(self._sessions.items()):
+            if now - pooled.last_used > self.idle_timeout:
+                print(f"[mcp_pool] Closing idle MCP server '{server}'")
+                await self.discard(server, forget_catalog=False)
+
+    async def close_all(self) -> None:
+        for server in list(self._sessions):
+            await self.discard(server)
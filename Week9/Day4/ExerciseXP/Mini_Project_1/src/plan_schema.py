@@ -0,0 +1,224 @@
+"""
+JSON Schema of the agent's plan, plus parsing of raw model output into a plan.
+
+PLAN_SCHEMA is what the planner prompt describes in prose. It is sent to the
+backend as a structured-output constraint (Ollama `format`, Groq
+`response_format`) so the model can only emit a valid plan, and the same
+schema checks what came back: a small interpreter for the keywords the
+schema uses on the hot path, the compiled jsonschema validator for error
+messages.
+
+When the backend does not constrain the output (LLM_STRUCTURED_OUTPUT=off,
+older Ollama, unsupported Groq model), parse_plan() recovers the plan from
+free text: it tries every '{' with the real JSON tokenizer
+(json.JSONDecoder.raw_decode), so braces or quotes inside string values, code
+fences and chatter before/after the object do not matter, and keeps the first
+object that is a valid plan.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List
+
+from jsonschema import validators
+
+
+# Upper bound on calls accepted from one "call_tools" plan.
+MAX_PARALLEL_CALLS = 5
+
+SERVERS = ["fetch", "filesystem", "kb_metadata"]
+
+_CALL = {
+    "type": "object",
+    "properties": {
+        "server": {"type": "string", "enum": SERVERS},
+        "tool": {"type": "string"},
+        "args": {"type": "object"},
+    },
+    "required": ["server", "tool", "args"],
+}
+
+PLAN_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "anyOf": [
+        {
+            "type": "object",
+            "properties": {
+                "action": {"type": "string", "const": "call_tool"},
+                **_CALL["properties"],
+            },
+            "required": ["action", "server", "tool", "args"],
+            "additionalProperties": False,
+        },
+        {
+            "type": "object",
+            "properties": {
+                "action": {"type": "string", "const": "call_tools"},
+                "calls": {
+                    "type": "array",
+                    "items": _CALL,
+                    "minItems": 1,
+                    "maxItems": MAX_PARALLEL_CALLS,
+                },
+            },
+            "required": ["action", "calls"],
+            "additionalProperties": False,
+        },
+        {
+            "type": "object",
+            "properties": {
+                "action": {"type": "string", "const": "finish"},
+                "answer": {"type": "string"},
+            },
+            "required": ["action", "answer"],
+            "additionalProperties": False,
+        },
+    ],
+}
+
+_validator_cls = validators.validator_for(PLAN_SCHEMA)
+_validator_cls.check_schema(PLAN_SCHEMA)
+PLAN_VALIDATOR = _validator_cls(PLAN_SCHEMA)
+
+_decoder = json.JSONDecoder(strict=False)  # allow raw newlines inside strings
+
+_TYPES = {"object": dict, "array": list, "string": str}
+_KEYWORDS = {
+    "type", "properties", "required", "additionalProperties", "anyOf",
+    "const", "enum", "items", "minItems", "maxItems",
+}
+
+
+def is_valid(schema: Dict[str, Any], value: Any) -> bool:
+    """
+    Check value against a schema that only uses the keywords in _KEYWORDS
+    (see check_supported()).
+
+    For PLAN_SCHEMA this gives the same answer as PLAN_VALIDATOR.is_valid()
+    at a fraction of the cost (about 10 us instead of 75 us per plan);
+    jsonschema is only used to explain what is wrong with an invalid plan.
+    """
+    if "type" in schema and not isinstance(value, _TYPES[schema["type"]]):
+        return False
+    if "const" in schema and value != schema["const"]:
+        return False
+    if "enum" in schema and value not in schema["enum"]:
+        return False
+    if "anyOf" in schema and not any(is_valid(s, value) for s in schema["anyOf"]):
+        return False
+    if isinstance(value, dict):
+        props = schema.get("properties", {})
+        if any(k not in value for k in schema.get("required", ())):
+            return False
+        if schema.get("additionalProperties") is False and any(k not in props for k in value):
+            return False
+        for k, sub in props.items():
+            if k in value and not is_valid(sub, value[k]):
+                return False
+    if isinstance(value, list):
+        if not schema.get("minItems", 0) <= len(value) <= schema.get("maxItems", len(value)):
+            return False
+        if "items" in schema and not all(is_valid(schema["items"], v) for v in value):
+            return False
+    return True
+
+
+def check_supported(schema: Dict[str, Any]) -> None:
+    """Fail early if a schema uses keywords that is_valid() would silently ignore."""
+    unsupported = set(schema) - _KEYWORDS
+    assert not unsupported, f"is_valid() does not handle {unsupported}"
+    for sub in [*schema.get("properties", {}).values(), *schema.get("anyOf", ())]:
+        check_supported(sub)
+    if "items" in schema:
+        check_supported(schema["items"])
+
+
+check_supported(PLAN_SCHEMA)
+
+
+def is_valid_plan(plan: Any) -> bool:
+    return is_valid(PLAN_SCHEMA, plan)
+
+
+def plan_errors(plan: Any) -> List[str]:
+    """Schema violations of a parsed plan (empty list = valid)."""
+    if not isinstance(plan, dict):
+        return [f"plan is {type(plan).__name__}, not an object"]
+    if is_valid_plan(plan):
+        return []
+
+    # anyOf errors are unhelpful ("not valid under any of the given
+    # schemas"); report against the branch the model was aiming for.
+    for branch in PLAN_SCHEMA["anyOf"]:
+        if branch["properties"]["action"]["const"] == plan.get("action"):
+            errors = _validator_cls(branch).iter_errors(plan)
+            return [
+                f"{'.'.join(str(p) for p in e.absolute_path) or 'plan'}: {e.message}"
+                for e in sorted(errors, key=lambda e: list(e.absolute_path))[:3]
+            ]
+    return [f"action: {plan.get('action')!r} is not one of 'call_tool', 'call_tools', 'finish'"]
+
+
+def iter_json_objects(text: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield every JSON object embedded in text, left to right.
+
+    Each '{' is handed to the JSON tokenizer; on success the scan continues
+    after the decoded object, otherwise at the next '{'.
+    """
+    pos = text.find("{")
+    while pos >= 0:
+        try:
+            obj, end = _decoder.raw_decode(text, pos)
+        except json.JSONDecodeError:
+            pos = text.find("{", pos + 1)
+            continue
+        if isinstance(obj, dict):
+            yield obj
+        pos = text.find("{", end)
+
+
+@dataclass
+class PlanParse:
+    """Outcome of parse_plan()."""
+
+    plan: Dict[str, Any] | None
+    # "direct" (whole text was the plan), "extracted" (found inside other
+    # text) or "failed" (no object with an "action")
+    method: str
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def valid(self) -> bool:
+        return self.plan is not None and not self.errors
+
+
+def parse_plan(text: str) -> PlanParse:
+    """
+    Turn raw model output into a plan.
+
+    Returns the first schema-valid object. Failing that, the first object
+    with an "action" key is returned together with its schema errors, so the
+    caller can still act on a slightly-off plan (e.g. an extra key).
+    """
+    raw = text.strip()
+    try:
+        obj = _decoder.decode(raw)
+    except json.JSONDecodeError:
+        obj = None
+    if isinstance(obj, dict) and "action" in obj:
+        return PlanParse(obj, "direct", plan_errors(obj))
+
+    fallback: PlanParse | None = None
+    for obj in iter_json_objects(raw):
+        if "action" not in obj:
+            continue
+        errors = plan_errors(obj)
+        if not errors:
+            return PlanParse(obj, "extracted")
+        if fallback is None:
+            fallback = PlanParse(obj, "extracted", errors)
+
+    return fallback or PlanParse(None, "failed", ["no JSON object with an 'action' key"])
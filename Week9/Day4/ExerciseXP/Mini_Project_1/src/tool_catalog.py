@@ -0,0 +1,70 @@
+"""
+Cached tool catalog of one MCP server.
+
+Holds the result of `tools/list` (names + input schemas) with a compiled
+JSON Schema validator per tool, so tool names and arguments can be checked
+locally before anything is sent to (or spawned for) the server.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+from jsonschema import validators
+from jsonschema.exceptions import SchemaError
+from mcp.types import Tool
+
+
+@dataclass
+class ToolCatalog:
+    """Tools of one server, keyed by name, plus their argument validators."""
+
+    server: str
+    tools: Dict[str, Tool]
+    fetched_at: float = field(default_factory=time.monotonic)
+    _validators: Dict[str, Any] = field(default_factory=dict, init=False, repr=False)
+
+    @classmethod
+    def from_tools(cls, server: str, tools: List[Tool]) -> "ToolCatalog":
+        catalog = cls(server=server, tools={t.name: t for t in tools})
+        for tool in tools:
+            schema = tool.inputSchema or {"type": "object"}
+            validator_cls = validators.validator_for(schema)
+            try:
+                validator_cls.check_schema(schema)
+            except SchemaError:
+                # A server with a broken schema should still be callable;
+                # the server itself will validate.
+                continue
+            catalog._validators[tool.name] = validator_cls(schema)
+        return catalog
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.tools)
+
+    def validate(self, tool_name: str, arguments: Dict[str, Any]) -> str | None:
+        """
+        Check a planned call against the catalog.
+
+        Returns None if the call looks valid, otherwise a short error message
+        meant to be fed back to the LLM.
+        """
+        if tool_name not in self.tools:
+            return f"Tool '{tool_name}' not found on server '{self.server}'. Available: {self.names}"
+
+        validator = self._validators.get(tool_name)
+        if validator is None:
+            return None
+
+        errors = sorted(validator.iter_errors(arguments), key=lambda e: list(e.absolute_path))
+        if not errors:
+            return None
+
+        details = []
+        for err in errors[:3]:
+            where = ".".join(str(p) for p in err.absolute_path) or "args"
+            details.append(f"{where}: {err.message}")
+        return f"Invalid arguments for '{self.server}.{tool_name}': " + "; ".join(details)
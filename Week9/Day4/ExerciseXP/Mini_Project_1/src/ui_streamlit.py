@@ -3,7 +3,8 @@ Streamlit UI for the MCP research agent.
 
 - Shows read-only configuration in the sidebar.
 - Lets the user enter a research goal.
-- Runs the agent and displays the final answer + tool call log.
+- Runs the agent and displays the final answer + tool call log, with a
+  per-step latency/token breakdown and run totals.
 """
 
 from __future__ import annotations
@@ -11,10 +12,12 @@ from __future__ import annotations
 import json
 import logging
 import os
+from typing import Any, Dict, List
 
 import streamlit as st
 
 from config import get_config
+from llm_router import LLMRouter
 from mcp_client import MCPClient
 from agent import ResearchAgent
 
@@ -35,13 +38,56 @@ def _setup_logging(level: str) -> logging.Logger:
     return logger
 
 
+# StepLog.timings keys shown in the breakdown table, in pipeline order
+_TIMING_COLUMNS = ["llm_wait", "llm", "load", "prompt_eval", "eval", "spawn", "handshake", "tool", "tool_total"]
+
+
+def _timing_rows(logs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """One table row per tool call: what ran, then seconds per phase and tokens."""
+    rows = []
+    for entry in logs:
+        timings = entry.get("timings") or {}
+        tokens = entry.get("tokens") or {}
+        row: Dict[str, Any] = {
+            "step": entry["step"],
+            "call": f"{entry['server']}.{entry['tool']}",
+            "ok": entry["success"],
+            "llm cache": entry.get("llm_cache"),
+            "backend": (entry.get("llm_route") or {}).get("winner"),
+        }
+        row.update({f"{k} (s)": timings.get(k) for k in _TIMING_COLUMNS})
+        row["prompt tok"] = tokens.get("prompt")
+        row["history tok"] = (entry.get("history") or {}).get("tokens")
+        row["completion tok"] = tokens.get("completion")
+        rows.append(row)
+    return rows
+
+
+@st.cache_resource
+def _get_mcp_client(_cfg, _logger: logging.Logger) -> MCPClient:
+    """
+    One MCPClient per Streamlit process.
+
+    Streamlit re-runs main() on every interaction; caching the client keeps
+    its pooled MCP server sessions alive across runs.
+    """
+    return MCPClient(_cfg, logger=_logger)
+
+
+@st.cache_resource
+def _get_llm_router(_cfg) -> LLMRouter:
+    """One LLMRouter per Streamlit process, so backend profiles survive reruns."""
+    return LLMRouter.from_config(_cfg)
+
+
 def main() -> None:
     cfg = get_config()
     logger = _setup_logging(cfg.log_level)
 
     # MCP client + agent
-    mcp_client = MCPClient(cfg, logger=logger)
-    agent = ResearchAgent(cfg, mcp_client, logger=logger)
+    mcp_client = _get_mcp_client(cfg, logger)
+    router = _get_llm_router(cfg) if cfg.llm_backend == "auto" else None
+    agent = ResearchAgent(cfg, mcp_client, logger=logger, llm_router=router)
 
     st.title("MCP Research Agent (Mini Project)")
 
@@ -55,14 +101,27 @@ def main() -> None:
     elif cfg.llm_backend == "groq":
         st.sidebar.text(f"Groq base URL: {cfg.groq_base_url}")
         st.sidebar.text(f"Groq model: {cfg.groq_model}")
+    elif cfg.llm_backend == "auto":
+        st.sidebar.text(f"Ollama model: {cfg.ollama_model}")
+        st.sidebar.text(f"Groq model: {cfg.groq_model or '(not configured)'}")
+        st.sidebar.text(f"Hedging: {cfg.llm_hedge}")
 
     st.sidebar.text(f"KB root dir: {os.path.abspath(cfg.kb_root_dir)}")
     st.sidebar.text(f"Metadata file: {os.path.abspath(cfg.kb_metadata_path)}")
+    st.sidebar.text(f"LLM cache: {cfg.llm_cache_mode} ({os.path.abspath(cfg.llm_cache_dir)})")
+    st.sidebar.text(f"Structured output: {cfg.llm_structured_output}")
+    st.sidebar.text(f"Fast path for URL goals: {cfg.agent_fast_path}")
+    st.sidebar.text(f"MCP gateway: {cfg.mcp_gateway}")
 
     # Main controls
     max_steps = st.sidebar.slider(
         "Max planning steps", min_value=1, max_value=10, value=5, step=1
     )
+    bypass_llm_cache = st.sidebar.checkbox(
+        "Bypass LLM cache (fresh answers)",
+        value=cfg.llm_cache_mode == "refresh",
+        disabled=cfg.llm_cache_mode == "off",
+    )
 
     user_goal = st.text_area(
         "Research goal / query",
@@ -78,15 +137,37 @@ def main() -> None:
             return
 
         with st.spinner("Running agent..."):
-            final_answer, logs = agent.run_research(user_goal.strip(), max_steps=max_steps)
+            final_answer, logs = agent.run_research(
+                user_goal.strip(), max_steps=max_steps, bypass_llm_cache=bypass_llm_cache
+            )
 
         st.subheader("Final answer (markdown)")
         st.markdown(final_answer)
 
+        stats = agent.last_run_stats
+        st.subheader("Run totals")
+        cols = st.columns(4)
+        cols[0].metric("Wall clock", f"{stats.get('seconds', 0):.2f}s")
+        cols[1].metric("LLM", f"{stats.get('llm_s', 0):.2f}s", f"{stats.get('llm_calls', 0)} calls", delta_color="off")
+        cols[2].metric(
+            "Tokens",
+            f"{stats.get('prompt_tokens', 0) + stats.get('completion_tokens', 0)}",
+            f"{stats.get('prompt_tokens', 0)} prompt / {stats.get('completion_tokens', 0)} completion",
+            delta_color="off",
+        )
+        cols[3].metric("MCP tools", f"{stats.get('tool_s', 0):.2f}s", f"{stats.get('tool_calls', 0)} calls", delta_color="off")
+        with st.expander("All run totals"):
+            st.json(stats)
+
         st.subheader("Tool call log (per step)")
         if not logs:
             st.write("No tools were called.")
         else:
+            st.caption(
+                "Seconds per phase. LLM columns belong to the planning call and appear on the "
+                "first tool call of its step; load/prompt_eval/eval are the backend's own timings."
+            )
+            st.dataframe(_timing_rows(logs), use_container_width=True, hide_index=True)
             for entry in logs:
                 st.code(json.dumps(entry, indent=2), language="json")
 
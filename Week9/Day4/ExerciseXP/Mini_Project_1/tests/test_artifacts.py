@@ -0,0 +1,60 @@
+"""Tool-output handles in plan arguments (artifacts.py)."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from artifacts import ArtifactError, ArtifactStore, step_handle  # noqa: E402
+
+
+@pytest.fixture
+def store():
+    s = ArtifactStore()
+    s.put(step_handle(1), "PAGE")
+    s.put(step_handle(2, 1), "first")
+    s.put(step_handle(2, 2), "second")
+    return s
+
+
+def test_step_handle():
+    assert step_handle(3) == "@step3"
+    assert step_handle(3, 2) == "@step3.2"
+
+
+def test_whole_value_reference(store):
+    assert store.expand("@step1") == ("PAGE", 4)
+    assert store.expand("  @step2.2 ") == ("second", 6)
+
+
+def test_inline_references(store):
+    value, inserted = store.expand("# Notes\n\n{{@step1}}\n---\n{{ @step2.1 }}")
+    assert value == "# Notes\n\nPAGE\n---\nfirst"
+    assert inserted == len("PAGE") + len("first")
+
+
+def test_plain_strings_are_untouched(store):
+    # A handle mentioned in text (not braced) is not a reference
+    assert store.expand("see @step1 above") == ("see @step1 above", 0)
+    assert store.expand("{{ not a handle }}") == ("{{ not a handle }}", 0)
+
+
+def test_nested_values(store):
+    value, inserted = store.expand({"path": "a.md", "parts": ["@step1", {"x": "{{@step2.2}}!"}], "n": 3})
+    assert value == {"path": "a.md", "parts": ["PAGE", {"x": "second!"}], "n": 3}
+    assert inserted == 10
+
+
+def test_unknown_handle_lists_the_available_ones(store):
+    with pytest.raises(ArtifactError, match=r"@step9.*@step1, @step2\.1, @step2\.2"):
+        store.expand({"content": "{{@step9}}"})
+    with pytest.raises(ArtifactError, match="none yet"):
+        ArtifactStore().expand("@step1")
+
+
+def test_describe_and_handles(store):
+    assert "@step1" in store
+    assert store.describe("@step1") == "@step1 (4 chars)"
+    assert store.handles == ["@step1", "@step2.1", "@step2.2"]
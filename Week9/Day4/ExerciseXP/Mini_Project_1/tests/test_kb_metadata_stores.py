@@ -0,0 +1,209 @@
+"""kb_metadata storage backends (kb_metadata_server/jsonl_store.py, sqlite_store.py)."""
+
+import json
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from kb_metadata_server.jsonl_store import JsonlStore  # noqa: E402
+from kb_metadata_server.sqlite_store import SQLiteStore  # noqa: E402
+
+
+LEGACY = [
+    {"topic": "old", "summary": "first legacy note", "created_at": "2024-01-01T00:00:00Z"},
+    {"topic": "old", "summary": "second legacy note", "created_at": "2024-01-02T00:00:00Z"},
+]
+
+
+def write_jsonl(path, entries):
+    with open(path, "w", encoding="utf-8") as f:
+        for e in entries:
+            f.write(json.dumps(e) + "\n")
+
+
+@pytest.fixture
+def jsonl_path(tmp_path):
+    return str(tmp_path / "metadata.jsonl")
+
+
+def test_sqlite_migrate_keeps_every_legacy_entry(tmp_path, jsonl_path):
+    write_jsonl(jsonl_path, LEGACY + [{"topic": "t", "file_path": "a.md", "summary": "x", "created_at": "2025"}])
+    store = SQLiteStore(str(tmp_path / "m.sqlite3"), jsonl_path=jsonl_path)
+    try:
+        assert store.sync_jsonl() == 3
+        summaries = sorted(e["summary"] for e in store.list("old"))
+        assert summaries == ["first legacy note", "second legacy note"]
+        assert all(e["file_path"] is None for e in store.list("old"))
+        # Nothing new: a second sync writes nothing
+        assert store.sync_jsonl() == 0
+        assert len(store.list()) == 3
+    finally:
+        store.close()
+
+
+def test_sqlite_reimport_does_not_duplicate_legacy_entries(tmp_path, jsonl_path):
+    write_jsonl(jsonl_path, LEGACY)
+    store = SQLiteStore(str(tmp_path / "m.sqlite3"), jsonl_path=jsonl_path)
+    try:
+        store.sync_jsonl()
+        # Replaced file (new inode): read again from the start
+        os.replace(jsonl_path, jsonl_path + ".old")
+        write_jsonl(jsonl_path, LEGACY)
+        store.sync_jsonl()
+        assert len(store.list()) == 2
+    finally:
+        store.close()
+
+
+def test_sqlite_upgrade_restores_collapsed_legacy_entries(tmp_path, jsonl_path):
+    write_jsonl(jsonl_path, LEGACY)
+    db = str(tmp_path / "m.sqlite3")
+    # Database from before legacy entries had their own rows: file_path NOT
+    # NULL, and both legacy lines collapsed into one "" row.
+    conn = sqlite3.connect(db)
+    conn.executescript(
+        """
+        CREATE TABLE entries (
+            id INTEGER PRIMARY KEY, topic TEXT NOT NULL, file_path TEXT NOT NULL,
+            summary TEXT NOT NULL, created_at TEXT NOT NULL, deleted INTEGER NOT NULL DEFAULT 0
+        );
+        INSERT INTO entries (topic, file_path, summary, created_at) VALUES ('old', '', 'second legacy note', '2024');
+        """
+    )
+    conn.close()
+    store = SQLiteStore(db, jsonl_path=jsonl_path)
+    try:
+        assert sorted(e["summary"] for e in store.list()) == ["first legacy note", "second legacy note"]
+        hits, total = store.search("legacy")
+        assert total == 2
+    finally:
+        store.close()
+
+
+def test_jsonl_compaction_keeps_every_legacy_entry(jsonl_path):
+    write_jsonl(jsonl_path, LEGACY)
+    store = JsonlStore(jsonl_path)
+    try:
+        assert len(store.list()) == 2
+        assert store.compact()["after_lines"] == 2
+        assert len(store.list()) == 2
+    finally:
+        store.close()
+
+
+def entry(file_path, summary, topic="t", created_at="2025-01-01T00:00:00Z"):
+    return {"topic": topic, "file_path": file_path, "summary": summary, "created_at": created_at}
+
+
+def tombstone(file_path, created_at="2025-01-02T00:00:00Z"):
+    return {"file_path": file_path, "deleted": True, "created_at": created_at}
+
+
+@pytest.fixture(params=["jsonl", "sqlite"])
+def store(request, tmp_path, jsonl_path):
+    if request.param == "jsonl":
+        s = JsonlStore(jsonl_path)
+    else:
+        s = SQLiteStore(str(tmp_path / "m.sqlite3"))
+    yield s
+    s.close()
+
+
+def test_upsert_replaces_and_moves_to_the_end(store):
+    store.add_many([entry("a.md", "alpha"), entry("b.md", "beta")])
+    store.add(entry("a.md", "alpha v2", topic="u", created_at="2025-01-03T00:00:00Z"))
+    assert [(e["file_path"], e["summary"]) for e in store.list()] == [("b.md", "beta"), ("a.md", "alpha v2")]
+    assert store.list("t") == [entry("b.md", "beta")]
+    assert store.get("a.md")["summary"] == "alpha v2"
+
+
+def test_tombstone_deletes(store):
+    store.add_many([entry("a.md", "alpha"), entry("b.md", "beta")])
+    store.add(tombstone("a.md"))
+    assert [e["file_path"] for e in store.list()] == ["b.md"]
+    assert store.get("a.md") is None
+    assert store.search("alpha")[1] == 0
+
+
+def test_search_follows_upserts(store):
+    store.add_many([entry("a.md", "solar panels"), entry("b.md", "wind turbines and solar farms")])
+    store.add(entry("a.md", "hydrogen storage", created_at="2025-01-03T00:00:00Z"))
+    hits, total = store.search("solar")
+    assert total == 1 and hits[0]["file_path"] == "b.md"
+    hits, total = store.search("hydrogen")
+    assert total == 1 and hits[0]["file_path"] == "a.md"
+
+
+def test_search_ranks_and_paginates(store):
+    store.add_many(
+        [
+            entry("1.md", "mcp servers"),
+            entry("2.md", "mcp mcp protocol servers", created_at="2025-01-02T00:00:00Z"),
+            entry("3.md", "unrelated", created_at="2025-01-03T00:00:00Z"),
+        ]
+    )
+    hits, total = store.search("mcp", limit=1)
+    assert total == 2 and len(hits) == 1
+    page2, _ = store.search("mcp", limit=1, offset=1)
+    assert {hits[0]["file_path"], page2[0]["file_path"]} == {"1.md", "2.md"}
+    assert store.search("mcp", created_after="2025-01-02")[1] == 1
+    # Empty query: newest first
+    assert store.search("")[0][0]["file_path"] == "3.md"
+
+
+def test_concurrent_writes_are_all_committed(store):
+    futures = [store.write([entry(f"{i}.md", f"note {i}")]) for i in range(50)]
+    for f in futures:
+        f.result()
+    assert len(store.list()) == 50
+
+
+def test_jsonl_tail_index_reads_appends_and_rotation(jsonl_path):
+    store = JsonlStore(jsonl_path)
+    try:
+        write_jsonl(jsonl_path, [entry("a.md", "alpha")])
+        assert len(store.list()) == 1
+        # Another writer appends: only the new line is parsed
+        with open(jsonl_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry("b.md", "beta")) + "\n")
+            f.write('{"topic": "half-written')
+        assert [e["file_path"] for e in store.list()] == ["a.md", "b.md"]
+        # Replaced file: the index is rebuilt from scratch
+        os.replace(jsonl_path, jsonl_path + ".old")
+        write_jsonl(jsonl_path, [entry("c.md", "gamma")])
+        assert [e["file_path"] for e in store.list()] == ["c.md"]
+    finally:
+        store.close()
+
+
+def test_jsonl_compaction_keeps_only_live_entries(jsonl_path):
+    store = JsonlStore(jsonl_path)
+    try:
+        store.add_many([entry("a.md", "v1"), entry("b.md", "beta")])
+        store.add(entry("a.md", "v2", created_at="2025-01-03T00:00:00Z"))
+        store.add(tombstone("b.md"))
+        assert store.stale_fraction() == pytest.approx(0.75)
+        report = store.compact()
+        assert (report["before_lines"], report["after_lines"]) == (4, 1)
+        assert [json.loads(line)["summary"] for line in open(jsonl_path, encoding="utf-8")] == ["v2"]
+        assert store.list() == [entry("a.md", "v2", created_at="2025-01-03T00:00:00Z")]
+        assert store.stale_fraction() == 0.0
+    finally:
+        store.close()
+
+
+def test_sqlite_keeps_newest_and_does_not_resurrect_deleted(tmp_path, jsonl_path):
+    store = SQLiteStore(str(tmp_path / "m.sqlite3"), jsonl_path=jsonl_path)
+    try:
+        store.add(entry("a.md", "new", created_at="2025-02-01T00:00:00Z"))
+        store.add(tombstone("b.md", created_at="2025-02-01T00:00:00Z"))
+        # Older JSONL lines for the same files are ignored on import
+        write_jsonl(jsonl_path, [entry("a.md", "old"), entry("b.md", "deleted later")])
+        store.sync_jsonl()
+        assert [(e["file_path"], e["summary"]) for e in store.list()] == [("a.md", "new")]
+    finally:
+        store.close()
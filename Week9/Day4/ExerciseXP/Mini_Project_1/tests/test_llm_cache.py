@@ -0,0 +1,70 @@
+"""Disk-backed LLM response cache (llm_cache.py)."""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from llm_cache import LLMResponseCache, cache_key  # noqa: E402
+
+
+MESSAGES = [{"role": "user", "content": "plan"}]
+
+
+def test_key_covers_every_request_field():
+    base = cache_key("ollama", "m", 0.0, MESSAGES)
+    assert base == cache_key("ollama", "m", 0.0, [dict(m) for m in MESSAGES])
+    assert base != cache_key("groq", "m", 0.0, MESSAGES)
+    assert base != cache_key("ollama", "m2", 0.0, MESSAGES)
+    assert base != cache_key("ollama", "m", 0.5, MESSAGES)
+    assert base != cache_key("ollama", "m", 0.0, MESSAGES, format="json")
+
+
+def test_get_or_call_hit_miss_and_bypass(tmp_path):
+    cache = LLMResponseCache(str(tmp_path))
+    calls = []
+
+    def call():
+        calls.append(1)
+        return f"answer {len(calls)}"
+
+    assert cache.get_or_call("k" * 64, call) == ("answer 1", "miss")
+    assert cache.get_or_call("k" * 64, call) == ("answer 1", "hit")
+    assert cache.get_or_call("k" * 64, call, bypass=True) == ("answer 2", "bypass")
+    assert cache.get("k" * 64) == "answer 2"
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+
+def test_expired_entries_are_misses_and_removed(tmp_path):
+    cache = LLMResponseCache(str(tmp_path), ttl_s=60)
+    cache.put("a" * 64, "fresh")
+    assert cache.get("a" * 64) == "fresh"
+    path = cache._path("a" * 64)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"created_at": %f, "response": "stale"}' % (time.time() - 120))
+    assert cache.get("a" * 64) is None
+    assert not os.path.exists(path)
+
+
+def test_eviction_drops_least_recently_used(tmp_path):
+    value = "x" * 400
+    cache = LLMResponseCache(str(tmp_path), max_bytes=2000)
+    keys = [f"{i:02d}" + "0" * 62 for i in range(4)]
+    for i, key in enumerate(keys):
+        cache.put(key, value)
+        os.utime(cache._path(key), (1000 + i, 1000 + i))
+    # Reading the oldest entry makes it the most recently used
+    assert cache.get(keys[0]) == value
+    cache.put("99" + "0" * 62, value)  # over 2000 bytes: evict down to 90%
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == value
+    assert cache.get("99" + "0" * 62) == value
+    total = sum(os.path.getsize(p) for _, p, _ in cache._scan())
+    assert total <= 2000 * 0.9
+
+
+def test_meta_is_kept_for_replay(tmp_path):
+    cache = LLMResponseCache(str(tmp_path))
+    cache.put("b" * 64, "plan", meta={"kind": "plan"})
+    assert cache.iter_records()[0]["meta"] == {"kind": "plan"}
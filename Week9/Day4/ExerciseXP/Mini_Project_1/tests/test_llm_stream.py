@@ -0,0 +1,75 @@
+"""Early stop on the first complete JSON object (llm_stream.py)."""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from llm_stream import JsonObjectScanner, consume  # noqa: E402
+
+
+PLAN = '{"action": "call_tool", "args": {"content": "a } inside \\" a string {"}}'
+
+
+def feed_all(chunks):
+    scanner = JsonObjectScanner()
+    for chunk in chunks:
+        found = scanner.feed(chunk)
+        if found is not None:
+            return found
+    return None
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, len(PLAN)])
+def test_object_found_whatever_the_chunking(size):
+    text = "Sure, here is the plan:\n" + PLAN + "\nHope this helps!"
+    chunks = [text[i:i + size] for i in range(0, len(text), size)]
+    found = feed_all(chunks)
+    assert found == PLAN
+    assert json.loads(found)["args"]["content"] == 'a } inside " a string {'
+
+
+def test_incomplete_object_is_none():
+    scanner = JsonObjectScanner()
+    assert scanner.feed('{"action": "finish", "answer": "not') is None
+    assert scanner.feed(' yet"') is None
+    assert scanner.feed("}") == '{"action": "finish", "answer": "not yet"}'
+
+
+def test_balanced_braces_that_are_not_json_are_skipped():
+    found = feed_all(["First {step one}, then {", '"action": "finish"}'])
+    assert found == '{"action": "finish"}'
+
+
+def test_result_is_sticky():
+    scanner = JsonObjectScanner()
+    assert scanner.feed('{"a": 1}') == '{"a": 1}'
+    assert scanner.feed('{"b": 2}') == '{"a": 1}'
+
+
+def test_top_level_arrays_and_scalars_are_not_objects():
+    assert feed_all(["[1, 2] 3 "]) is None
+
+
+def test_consume_stops_at_the_object():
+    read = []
+
+    def deltas():
+        for chunk in ["{", '"a": ', "1}", " trailing", " chatter"]:
+            read.append(chunk)
+            yield chunk
+
+    result = consume(deltas(), started_at=0.0, stop_at_json=True)
+    assert result.text == '{"a": 1}'
+    assert result.object_complete and result.stopped_early
+    assert read == ["{", '"a": ', "1}"]
+
+
+def test_consume_to_the_end_keeps_the_object_time():
+    result = consume(iter(["{", '"a": 1}', " more"]), started_at=0.0, stop_at_json=False)
+    assert result.text == '{"a": 1} more'
+    assert result.object_complete and not result.stopped_early
+    assert result.object_s is not None and result.object_s <= result.total_s
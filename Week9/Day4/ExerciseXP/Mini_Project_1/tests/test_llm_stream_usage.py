@@ -0,0 +1,102 @@
+"""Streamed LLM calls report token usage (llm_usage.py)."""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import agent  # noqa: E402
+import llm_groq  # noqa: E402
+import llm_ollama  # noqa: E402
+from config import get_config  # noqa: E402
+from llm_stream import StreamedChat  # noqa: E402
+from llm_usage import LLMUsage  # noqa: E402
+
+
+PLAN = '{"action": "finish", "answer": "done"}'
+
+
+class FakeResponse:
+    def __init__(self, lines):
+        self.lines = lines
+        self.ok = True
+        self.status_code = 200
+
+    def iter_lines(self, decode_unicode=False):
+        return iter(self.lines)
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def ollama_lines():
+    lines = [json.dumps({"message": {"content": PLAN[i:i + 5]}, "done": False}) for i in range(0, len(PLAN), 5)]
+    lines.append(
+        json.dumps(
+            {
+                "message": {"content": ""},
+                "done": True,
+                "prompt_eval_count": 120,
+                "eval_count": 14,
+                "prompt_eval_duration": 300_000_000,
+                "eval_duration": 200_000_000,
+            }
+        )
+    )
+    return lines
+
+
+def test_ollama_stream_to_end_returns_usage(monkeypatch):
+    monkeypatch.setattr(llm_ollama, "_post", lambda *a, **kw: FakeResponse(ollama_lines()))
+    result = llm_ollama.chat_stream("http://ollama", "m", [{"role": "user", "content": "x"}], stop_at_json=False)
+    assert result.text == PLAN
+    assert result.usage is not None
+    assert (result.usage.prompt_tokens, result.usage.completion_tokens) == (120, 14)
+    assert result.usage.prompt_eval_s == 0.3
+
+
+def test_groq_stream_to_end_returns_usage(monkeypatch):
+    lines = [f'data: {json.dumps({"choices": [{"delta": {"content": PLAN}}]})}'.encode()]
+    usage = {"prompt_tokens": 90, "completion_tokens": 12, "total_time": 0.2}
+    lines.append(f'data: {json.dumps({"choices": [], "x_groq": {"usage": usage}})}'.encode())
+    lines.append(b"data: [DONE]")
+    monkeypatch.setattr(llm_groq, "post", lambda *a, **kw: FakeResponse(lines))
+    result = llm_groq.chat_stream("http://groq", "m", "key", [{"role": "user", "content": "x"}], stop_at_json=False)
+    assert result.usage is not None
+    assert (result.usage.prompt_tokens, result.usage.completion_tokens) == (90, 12)
+
+
+def test_agent_schema_stream_keeps_usage(monkeypatch):
+    """With the shipped defaults (LLM_STREAM=on, schema output) planning calls carry usage."""
+    monkeypatch.setenv("LLM_CACHE", "off")
+    monkeypatch.delenv("LLM_STREAM", raising=False)
+    monkeypatch.delenv("LLM_STRUCTURED_OUTPUT", raising=False)
+    seen = {}
+
+    def fake_stream(config, messages, stop_at_json=True, format=None, backend=None):
+        seen["stop_at_json"] = stop_at_json
+        return StreamedChat(
+            text=PLAN,
+            object_complete=True,
+            stopped_early=False,
+            first_token_s=0.1,
+            object_s=0.2,
+            total_s=0.2,
+            usage=LLMUsage(prompt_tokens=100, completion_tokens=10),
+        )
+
+    monkeypatch.setattr(agent, "llm_chat_stream", fake_stream)
+    research = agent.ResearchAgent(get_config(), mcp_client=None)
+    call = research._llm([{"role": "user", "content": "x"}], expect_json=True)
+    assert seen["stop_at_json"] is False
+    assert call.tokens() == {"prompt": 100, "completion": 10}